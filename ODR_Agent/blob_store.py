@@ -0,0 +1,236 @@
+"""Content-addressed storage for large text payloads kept out of the Deep Research agent's graph state."""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from ODR_Agent.configuration import BlobCompression, BlobStoreBackend, Configuration
+
+# Prefix identifying a blob reference stored in graph state in place of the text it points to
+BLOB_REF_PREFIX = "blob:sha256:"
+
+
+##########################
+# Compression Utils
+##########################
+
+def compress_bytes(data: bytes, compression: BlobCompression) -> bytes:
+	"""Compress data with the given codec, prefixing the codec name so it can be decoded later."""
+	if compression == BlobCompression.ZSTD:
+		import zstandard
+		payload = zstandard.ZstdCompressor().compress(data)
+	elif compression == BlobCompression.ZLIB:
+		payload = zlib.compress(data)
+	else:
+		payload = data
+	return compression.value.encode() + b"\n" + payload
+
+
+def decompress_bytes(data: bytes) -> bytes:
+	"""Decompress data written by compress_bytes using the codec named in its prefix."""
+	codec, _, payload = data.partition(b"\n")
+	compression = BlobCompression(codec.decode())
+	if compression == BlobCompression.ZSTD:
+		import zstandard
+		return zstandard.ZstdDecompressor().decompress(payload)
+	elif compression == BlobCompression.ZLIB:
+		return zlib.decompress(payload)
+	return payload
+
+
+##########################
+# Blob Store Backends
+##########################
+
+class BlobStore(ABC):
+	"""Base class for content-addressed text stores."""
+	
+	def __init__(self, path: str, compression: BlobCompression = BlobCompression.NONE):
+		self.path = path
+		self.compression = compression
+	
+	def put(self, text: str) -> str:
+		"""Store text and return its blob reference. Storing the same text twice is a no-op."""
+		data = text.encode("utf-8")
+		digest = hashlib.sha256(data).hexdigest()
+		if not self.contains(digest):
+			self.write(digest, compress_bytes(data, self.compression))
+		return BLOB_REF_PREFIX + digest
+	
+	def get(self, ref: str) -> str:
+		"""Load the text a blob reference points to."""
+		data = self.read(ref.removeprefix(BLOB_REF_PREFIX))
+		if data is None:
+			raise KeyError(f"Blob not found in {self.path}: {ref}")
+		return decompress_bytes(data).decode("utf-8")
+	
+	@abstractmethod
+	def contains(self, digest: str) -> bool:
+		"""Check whether a blob with the given digest is already stored."""
+	
+	@abstractmethod
+	def write(self, digest: str, data: bytes):
+		"""Write encoded blob data under its digest."""
+	
+	@abstractmethod
+	def read(self, digest: str) -> Optional[bytes]:
+		"""Read encoded blob data by digest, or None if it is missing."""
+
+
+class FileBlobStore(BlobStore):
+	"""Blob store keeping one file per blob, sharded by the first two hex digits of the digest."""
+	
+	def blob_path(self, digest: str) -> str:
+		"""Get the file path for a blob digest."""
+		return os.path.join(self.path, digest[:2], digest)
+	
+	def contains(self, digest: str) -> bool:
+		return os.path.exists(self.blob_path(digest))
+	
+	def write(self, digest: str, data: bytes):
+		# Write to a temporary file first so concurrent readers never see a partial blob
+		blob_path = self.blob_path(digest)
+		os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+		file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+		with os.fdopen(file_descriptor, "wb") as f:
+			f.write(data)
+		os.replace(temp_path, blob_path)
+	
+	def read(self, digest: str) -> Optional[bytes]:
+		try:
+			with open(self.blob_path(digest), "rb") as f:
+				return f.read()
+		except FileNotFoundError:
+			return None
+
+
+class SQLiteBlobStore(BlobStore):
+	"""Blob store keeping all blobs in a single SQLite database file."""
+	
+	def __init__(self, path: str, compression: BlobCompression = BlobCompression.NONE):
+		super().__init__(path, compression)
+		if os.path.dirname(path):
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(path, check_same_thread=False)
+		self.connection.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB NOT NULL)")
+		self.connection.commit()
+	
+	def contains(self, digest: str) -> bool:
+		with self.lock:
+			return self.connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is not None
+	
+	def write(self, digest: str, data: bytes):
+		with self.lock:
+			self.connection.execute("INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)", (digest, data))
+			self.connection.commit()
+	
+	def read(self, digest: str) -> Optional[bytes]:
+		with self.lock:
+			row = self.connection.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+		return row[0] if row else None
+
+
+##########################
+# Blob Store Access Utils
+##########################
+
+# Default location of each backend, kept apart so switching backends never opens the other's data
+DEFAULT_BLOB_STORE_PATHS = {BlobStoreBackend.FILE: ".blob_store", BlobStoreBackend.SQLITE: ".blob_store.sqlite"}
+
+# Open blob stores shared across runs, keyed by backend, location and compression
+blob_stores: dict[tuple, BlobStore] = {}
+blob_stores_lock = threading.Lock()
+
+
+def get_blob_store_path(backend: BlobStoreBackend, configurable: Configuration) -> str:
+	"""Get the configured blob store location, checking it can hold the backend's data.
+
+	Args:
+		backend: The blob store backend
+		configurable: Configuration with blob store settings
+
+	Returns:
+		The configured path, or the backend's default path if none is configured
+
+	Raises:
+		ValueError: If the path is a directory for the SQLite backend or a file for the file backend
+	"""
+	path = configurable.blob_store_path or DEFAULT_BLOB_STORE_PATHS[backend]
+	if backend == BlobStoreBackend.SQLITE and os.path.isdir(path):
+		raise ValueError(f"Blob store path {path} is a directory, but the SQLite backend needs a database file")
+	if backend == BlobStoreBackend.FILE and os.path.isfile(path):
+		raise ValueError(f"Blob store path {path} is a file, but the file backend needs a directory")
+	return path
+
+
+def get_blob_store(configurable: Configuration) -> Optional[BlobStore]:
+	"""Get the shared blob store described by the configuration, or None if blob storage is disabled.
+
+	Args:
+		configurable: Configuration with blob store settings
+
+	Returns:
+		The blob store instance, created on first use
+
+	Raises:
+		ValueError: If the configured path cannot hold the backend's data
+	"""
+	backend = BlobStoreBackend(configurable.blob_store_backend)
+	if backend == BlobStoreBackend.NONE:
+		return None
+	
+	compression = BlobCompression(configurable.blob_store_compression)
+	path = get_blob_store_path(backend, configurable)
+	key = (backend, path, compression)
+	with blob_stores_lock:
+		if key not in blob_stores:
+			if backend == BlobStoreBackend.SQLITE:
+				blob_stores[key] = SQLiteBlobStore(path, compression)
+			else:
+				blob_stores[key] = FileBlobStore(path, compression)
+		return blob_stores[key]
+
+
+def is_blob_ref(value: str) -> bool:
+	"""Check whether a state value is a blob reference rather than inline text."""
+	return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def store_text(text: str, configurable: Configuration) -> str:
+	"""Move large text into the blob store, returning the reference to keep in state.
+
+	Args:
+		text: The text payload
+		configurable: Configuration with blob store settings
+
+	Returns:
+		A blob reference, or the text itself if it is small or blob storage is disabled
+	"""
+	blob_store = get_blob_store(configurable)
+	if blob_store is None or len(text) < configurable.blob_store_min_chars:
+		return text
+	return blob_store.put(text)
+
+
+def resolve_text(value: str, configurable: Configuration) -> str:
+	"""Load the text behind a blob reference, passing inline text through unchanged.
+
+	Args:
+		value: A blob reference or inline text taken from state
+		configurable: Configuration with blob store settings
+
+	Returns:
+		The full text
+	"""
+	if not is_blob_ref(value):
+		return value
+	blob_store = get_blob_store(configurable)
+	if blob_store is None:
+		raise ValueError(f"Cannot resolve {value}: blob storage is disabled in the configuration")
+	return blob_store.get(value)
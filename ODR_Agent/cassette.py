@@ -0,0 +1,359 @@
+"""Record and replay cassettes of model, search and MCP calls for reproducible offline runs.
+
+In record mode every model invocation, Tavily search and MCP tool call of a run is captured together with
+its latency in a gzip-compressed JSONL cassette. In replay mode the same calls are served from the
+cassette, optionally sleeping for the recorded latency (or a multiple of it), so a production run can be
+reproduced offline with deterministic results and timing. Recording to an existing cassette appends to it,
+so a resumed batch adds the calls of its remaining topics; delete the file to record from scratch.
+
+Usage:
+	with use_cassette("runs/widgets.jsonl.gz", CassetteMode.RECORD):
+		asyncio.run(deep_researcher.ainvoke(...))
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.tools import BaseTool, StructuredTool
+
+
+class CassetteMode(Enum):
+	"""Enumeration of cassette modes."""
+	
+	RECORD = "record"
+	REPLAY = "replay"
+
+
+class CassetteMiss(Exception):
+	"""Raised in strict replay when a call was not recorded in the cassette."""
+
+
+##########################
+# Cassette Key Utils
+##########################
+
+def get_today_text() -> str:
+	"""Get today's date as it appears in prompts, so recordings from another day still match."""
+	from ODR_Agent.utils import get_today_str
+	return get_today_str()
+
+
+# Message fields that differ between a live and a replayed run without being sent to the model
+UNKEYED_MESSAGE_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+
+def strip_unkeyed_fields(value: Any) -> Any:
+	"""Remove run-specific message fields from a serialized prompt, keeping tool call ids."""
+	if isinstance(value, dict):
+		stripped = {key: strip_unkeyed_fields(item) for key, item in value.items()}
+		if isinstance(stripped.get("kwargs"), dict):
+			for field in UNKEYED_MESSAGE_FIELDS:
+				stripped["kwargs"].pop(field, None)
+		return stripped
+	if isinstance(value, list):
+		return [strip_unkeyed_fields(item) for item in value]
+	return value
+
+
+def get_call_key(kind: str, *parts: Any) -> str:
+	"""Hash the identifying parts of a call into a cassette key."""
+	payload = json.dumps([kind, *parts], sort_keys=True, default=str).replace(get_today_text(), "<today>")
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_model_call_key(prompt: str, llm_string: str) -> str:
+	"""Build the key of a model call from the serialized prompt and model settings used by LangChain's cache.
+
+	Message ids and usage are assigned per run, so they are left out; API keys are already masked in the
+	model settings.
+	"""
+	try:
+		prompt = strip_unkeyed_fields(json.loads(prompt))
+	except json.JSONDecodeError:
+		pass
+	return get_call_key("model", prompt, llm_string)
+
+
+##########################
+# Cassette
+##########################
+
+class Cassette(BaseCache):
+	"""Recorded calls of a run, served back in recording order for calls made more than once.
+
+	The cassette doubles as LangChain's global LLM cache, which sees every chat model call of the graph
+	before and after it reaches the provider.
+	"""
+	
+	def __init__(self, path: str, mode: CassetteMode, latency_scale: float = 1.0, allow_live: bool = False):
+		self.path = path
+		self.mode = mode
+		self.latency_scale = latency_scale
+		self.allow_live = allow_live
+		self.lock = threading.Lock()
+		self.entries: dict[str, list[dict]] = defaultdict(list)
+		self.replay_positions: dict[str, int] = defaultdict(int)
+		self.started: dict[str, deque] = defaultdict(deque)
+		self.recorded: list[dict] = []
+		if mode == CassetteMode.REPLAY:
+			with gzip.open(path, "rt", encoding="utf-8") as f:
+				for line in f:
+					if line.strip():
+						entry = json.loads(line)
+						self.entries[entry["key"]].append(entry)
+	
+	# ---------------- Recording & Replay ----------------
+	def record(self, kind: str, key: str, response: Any, latency: float):
+		"""Add a finished call to the recording."""
+		with self.lock:
+			self.recorded.append({"kind": kind, "key": key, "latency": round(latency, 4), "response": response})
+	
+	def find(self, key: str) -> Optional[dict]:
+		"""Get the next recorded response for a key, repeating the last one once all have been served."""
+		with self.lock:
+			entries = self.entries.get(key)
+			if not entries:
+				return None
+			position = self.replay_positions[key]
+			self.replay_positions[key] = position + 1
+			return entries[min(position, len(entries) - 1)]
+	
+	def miss(self, kind: str, description: str):
+		"""Handle a call missing from the cassette, raising unless live calls are allowed."""
+		if not self.allow_live:
+			raise CassetteMiss(f"No recorded {kind} call matches {description[:200]!r} in {self.path}")
+	
+	def get_replay_delay(self, entry: dict) -> float:
+		"""Get how long to wait before serving a recorded response."""
+		return entry["latency"] * self.latency_scale
+	
+	async def call(self, kind: str, key: str, description: str, live_call: Callable[[], Awaitable[Any]],
+	               encode: Callable[[Any], Any] = lambda value: value,
+	               decode: Callable[[Any], Any] = lambda value: value) -> Any:
+		"""Serve an async call from the cassette in replay mode, or make it live and record it.
+
+		Args:
+			kind: Kind of call, such as "search" or "mcp"
+			key: Cassette key of the call
+			description: Readable description of the call for errors
+			live_call: Makes the real call
+			encode: Turns a live response into JSON-serializable form for the cassette
+			decode: Turns a recorded response back into the live form
+
+		Returns:
+			The recorded or live response
+		"""
+		if self.mode == CassetteMode.REPLAY:
+			entry = self.find(key)
+			if entry is not None:
+				await asyncio.sleep(self.get_replay_delay(entry))
+				return decode(entry["response"])
+			self.miss(kind, description)
+			return await live_call()
+		
+		start = time.perf_counter()
+		response = await live_call()
+		self.record(kind, key, encode(response), time.perf_counter() - start)
+		return response
+	
+	def save(self):
+		"""Append the recorded calls to the cassette file, keeping calls recorded by earlier runs."""
+		if os.path.dirname(self.path):
+			os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		# Appending adds a gzip member, which readers decompress as one stream with the earlier recordings
+		with gzip.open(self.path, "at", encoding="utf-8") as f:
+			for entry in self.recorded:
+				f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+	
+	# ---------------- Model Calls (LangChain cache interface) ----------------
+	def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+		key = get_model_call_key(prompt, llm_string)
+		if self.mode == CassetteMode.RECORD:
+			# Note when the call started so its latency can be recorded once the response arrives
+			with self.lock:
+				self.started[key].append(time.perf_counter())
+			return None
+		
+		entry = self.find(key)
+		if entry is None:
+			self.miss("model", prompt)
+			return None
+		time.sleep(self.get_replay_delay(entry))
+		return decode_generations(entry["response"])
+	
+	def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+		if self.mode != CassetteMode.RECORD:
+			return
+		key = get_model_call_key(prompt, llm_string)
+		with self.lock:
+			start = self.started[key].popleft() if self.started[key] else time.perf_counter()
+		self.record("model", key, encode_generations(return_val), time.perf_counter() - start)
+	
+	async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+		if self.mode == CassetteMode.RECORD:
+			return self.lookup(prompt, llm_string)
+		entry = self.find(get_model_call_key(prompt, llm_string))
+		if entry is None:
+			self.miss("model", prompt)
+			return None
+		await asyncio.sleep(self.get_replay_delay(entry))
+		return decode_generations(entry["response"])
+	
+	async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+		self.update(prompt, llm_string, return_val)
+	
+	def clear(self, **kwargs):
+		with self.lock:
+			self.recorded.clear()
+
+
+def encode_generations(generations: Sequence[Generation]) -> list[dict]:
+	"""Serialize model generations for the cassette."""
+	return [{"message": message_to_dict(generation.message), "generation_info": generation.generation_info} for
+	        generation in generations]
+
+
+def decode_generations(encoded: list[dict]) -> list[ChatGeneration]:
+	"""Rebuild model generations recorded in the cassette."""
+	return [ChatGeneration(message=messages_from_dict([generation["message"]])[0],
+	                       generation_info=generation["generation_info"]) for generation in encoded]
+
+
+##########################
+# Search & MCP Calls
+##########################
+
+class CassetteTavilyClient:
+	"""Tavily client that records or replays searches through the active cassette."""
+	
+	def __init__(self, cassette: Cassette, get_live_client: Callable[[], Any]):
+		self.cassette = cassette
+		self.get_live_client = get_live_client
+	
+	async def search(self, query: str, **kwargs) -> dict:
+		key = get_call_key("search", query, kwargs)
+		return await self.cassette.call("search", key, query,
+		                                lambda: self.get_live_client().search(query, **kwargs))
+
+
+def encode_tool_result(result: Any) -> Any:
+	"""Serialize an MCP tool result, keeping artifacts only when they are plain JSON."""
+	if isinstance(result, tuple):
+		content, artifact = result
+		try:
+			json.dumps(artifact)
+		except TypeError:
+			artifact = None
+		return {"content": content, "artifact": artifact, "tuple": True}
+	return {"content": result, "tuple": False}
+
+
+def decode_tool_result(encoded: dict) -> Any:
+	"""Rebuild an MCP tool result recorded in the cassette."""
+	return (encoded["content"], encoded["artifact"]) if encoded["tuple"] else encoded["content"]
+
+
+def wrap_cassette_tool(tool: BaseTool, cassette: Cassette, server_key: str) -> BaseTool:
+	"""Copy an MCP tool so that its calls are recorded or replayed through the cassette."""
+	tool = tool.model_copy()
+	live_coroutine = tool.coroutine
+	
+	async def cassette_coroutine(**kwargs):
+		key = get_call_key("mcp", server_key, tool.name, kwargs)
+		return await cassette.call("mcp", key, f"{tool.name}({kwargs})", lambda: live_coroutine(**kwargs),
+		                           encode_tool_result, decode_tool_result)
+	
+	tool.coroutine = cassette_coroutine
+	return tool
+
+
+def get_tool_schema(tool: BaseTool) -> dict:
+	"""Describe an MCP tool well enough to rebuild it from a cassette."""
+	args_schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.args_schema.model_json_schema()
+	return {"name":        tool.name, "description": tool.description, "args_schema": args_schema,
+	        "response_format": tool.response_format}
+
+
+async def unrecorded_tool_call(**kwargs):
+	raise CassetteMiss("Tools rebuilt from a cassette cannot make live MCP calls")
+
+
+async def get_cassette_mcp_tools(cassette: Cassette, server_config: dict,
+                                 load_tools: Callable[[dict], Awaitable[List[BaseTool]]]) -> List[BaseTool]:
+	"""Load MCP tools through the cassette, so replay needs no connection to the MCP server.
+
+	Args:
+		cassette: The active cassette
+		server_config: MCP server configuration, whose URLs identify the recorded tools
+		load_tools: Loads the tools from the live server
+
+	Returns:
+		Tools whose calls are recorded or replayed
+	"""
+	server_key = json.dumps(sorted(server.get("url", "") for server in server_config.values()))
+	key = get_call_key("mcp_tools", server_key)
+	if cassette.mode == CassetteMode.REPLAY:
+		entry = cassette.find(key)
+		if entry is not None:
+			tools = [StructuredTool(coroutine=unrecorded_tool_call, **schema) for schema in entry["response"]]
+			return [wrap_cassette_tool(tool, cassette, server_key) for tool in tools]
+		cassette.miss("mcp_tools", server_key)
+	
+	tools = await load_tools(server_config)
+	if cassette.mode == CassetteMode.RECORD:
+		cassette.record("mcp_tools", key, [get_tool_schema(tool) for tool in tools], 0)
+	return [wrap_cassette_tool(tool, cassette, server_key) for tool in tools]
+
+
+##########################
+# Activation
+##########################
+
+# Cassette used by the current process, if any
+active_cassette: Optional[Cassette] = None
+
+
+def get_active_cassette() -> Optional[Cassette]:
+	"""Get the cassette currently recording or replaying calls, if any."""
+	return active_cassette
+
+
+@contextmanager
+def use_cassette(path: str, mode: CassetteMode, latency_scale: float = 1.0,
+                 allow_live: bool = False) -> Iterator[Cassette]:
+	"""Record or replay every model, search and MCP call made while the context is active.
+
+	Args:
+		path: Cassette file, appended to on exit in record mode and read on entry in replay mode
+		mode: Whether to record live calls or replay recorded ones
+		latency_scale: Multiple of the recorded latency to wait before serving a replayed call (0 for none)
+		allow_live: In replay mode, make calls missing from the cassette live instead of raising CassetteMiss
+
+	Yields:
+		The active cassette
+	"""
+	global active_cassette
+	cassette = Cassette(path, CassetteMode(mode), latency_scale, allow_live)
+	previous_cache, previous_cassette = get_llm_cache(), active_cassette
+	set_llm_cache(cassette)
+	active_cassette = cassette
+	try:
+		yield cassette
+	finally:
+		set_llm_cache(previous_cache)
+		active_cassette = previous_cassette
+		if cassette.mode == CassetteMode.RECORD:
+			cassette.save()
@@ -0,0 +1,256 @@
+"""Long-lived HTTP clients shared across runs of the Deep Research agent."""
+
+import asyncio
+import atexit
+import functools
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+
+from ODR_Agent.cassette import CassetteTavilyClient, get_active_cassette, get_cassette_mcp_tools
+
+# Connection pool limits of the shared HTTP session
+HTTP_CONNECTION_LIMIT = 100
+HTTP_CONNECTION_LIMIT_PER_HOST = 20
+HTTP_KEEPALIVE_SECONDS = 60
+HTTP_TIMEOUT_SECONDS = 120
+
+# Seconds a loaded MCP tool list is reused before the server is asked again
+MCP_TOOLS_TTL_SECONDS = 300
+# Maximum number of MCP server configurations (e.g. one per user token) kept in the cache
+MCP_CLIENT_CACHE_SIZE = 32
+
+# aiohttp, the Tavily SDK and the MCP adapters are imported on first use, so runs that do not search with
+# Tavily or use MCP never load them
+if TYPE_CHECKING:
+	import aiohttp
+	from langchain_mcp_adapters.client import MultiServerMCPClient
+
+##########################
+# HTTP Session Pool
+##########################
+
+# Shared aiohttp sessions, one per event loop since a session is bound to the loop that created it
+http_sessions: dict[asyncio.AbstractEventLoop, "aiohttp.ClientSession"] = {}
+
+
+def get_http_session() -> "aiohttp.ClientSession":
+	"""Get the shared HTTP session of the running event loop, created on first use.
+
+	The session keeps connections alive between requests and bounds the connections per host,
+	so TLS and TCP setup is paid once per host rather than once per request.
+
+	Returns:
+		The shared aiohttp client session
+	"""
+	import aiohttp
+	
+	loop = asyncio.get_running_loop()
+	
+	# Drop sessions of event loops that have since been closed
+	for closed_loop in [other for other in http_sessions if other.is_closed()]:
+		del http_sessions[closed_loop]
+	
+	session = http_sessions.get(loop)
+	if session is None or session.closed:
+		connector = aiohttp.TCPConnector(limit=HTTP_CONNECTION_LIMIT, limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+		                                 keepalive_timeout=HTTP_KEEPALIVE_SECONDS)
+		session = aiohttp.ClientSession(connector=connector,
+		                                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS))
+		http_sessions[loop] = session
+	return session
+
+
+##########################
+# Tavily Client Pool
+##########################
+
+@functools.cache
+def get_pooled_tavily_client_class() -> type:
+	"""Define the pooled Tavily client on first use, importing the Tavily SDK only when it is needed.
+
+	The SDK opens an aiohttp session per request. Its module is pointed at a view of aiohttp whose sessions
+	borrow the shared session's connector, so requests reuse pooled connections while the SDK still builds
+	the requests and maps the errors. An SDK that stops using aiohttp this way keeps working, just unpooled.
+	"""
+	import aiohttp
+	import tavily.asynclient
+	from tavily import AsyncTavilyClient, TavilyError
+	
+	class PooledAiohttp:
+		"""View of the aiohttp module whose client sessions use the shared connection pool."""
+		
+		def __getattr__(self, name: str):
+			return getattr(aiohttp, name)
+		
+		@staticmethod
+		def ClientSession(*args, **kwargs) -> "aiohttp.ClientSession":
+			# Closing the per-request session leaves the shared connector and its connections open
+			return aiohttp.ClientSession(*args, connector=get_http_session().connector, connector_owner=False,
+			                             **kwargs)
+	
+	if getattr(tavily.asynclient, "aiohttp", None) is aiohttp:
+		tavily.asynclient.aiohttp = PooledAiohttp()
+	
+	class PooledTavilyClient(AsyncTavilyClient):
+		"""Tavily client sending searches over the shared HTTP connection pool instead of new connections."""
+		
+		async def search(self, *args, **kwargs) -> Dict[str, Any]:
+			try:
+				return await super().search(*args, **kwargs)
+			except TypeError as e:
+				# The SDK's timeout handler names a class that is not an exception, so every error raised during
+				# the request surfaces as a TypeError; raise the original error as the SDK intended instead
+				if isinstance(e.__context__, (TavilyError, asyncio.TimeoutError)):
+					raise e.__context__ from None
+				if isinstance(e.__context__, aiohttp.ClientError):
+					raise TavilyError(f"Request failed: {str(e.__context__)}") from e.__context__
+				raise
+	
+	return PooledTavilyClient
+
+
+def __getattr__(name: str):
+	if name == "PooledTavilyClient":
+		return get_pooled_tavily_client_class()
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Tavily clients shared across runs, keyed by API key
+tavily_clients: dict[Optional[str], Any] = {}
+
+
+def get_tavily_client(api_key: Optional[str]):
+	"""Get the shared Tavily client for an API key, created on first use.
+
+	While a cassette is active, searches go through it instead and the live client is only created if needed.
+	"""
+	cassette = get_active_cassette()
+	if cassette is not None:
+		return CassetteTavilyClient(cassette, lambda: get_live_tavily_client(api_key))
+	return get_live_tavily_client(api_key)
+
+
+def get_live_tavily_client(api_key: Optional[str]):
+	"""Get the shared Tavily client that calls the live API."""
+	if api_key not in tavily_clients:
+		tavily_clients[api_key] = get_pooled_tavily_client_class()(api_key=api_key)
+	return tavily_clients[api_key]
+
+
+##########################
+# MCP Client Pool
+##########################
+
+# MCP clients and their loaded tools shared across runs, keyed by server configuration in insertion order
+mcp_clients: dict[str, tuple["MultiServerMCPClient", List[BaseTool], float]] = {}
+
+
+def get_mcp_cache_key(server_config: dict) -> str:
+	"""Build a cache key for an MCP server configuration, including its auth headers."""
+	return repr(sorted((name, connection.get("url"), sorted((connection.get("headers") or {}).items())) for
+	                   name, connection in server_config.items()))
+
+
+async def get_mcp_tools(server_config: dict) -> List[BaseTool]:
+	"""Get the tools of the configured MCP servers, reusing the client and tool list of earlier runs.
+
+	While a cassette is active, the tools and their calls are recorded or replayed through it.
+
+	Args:
+		server_config: MultiServerMCPClient connection settings keyed by server name
+
+	Returns:
+		The tools offered by the servers
+	"""
+	cassette = get_active_cassette()
+	if cassette is not None:
+		return await get_cassette_mcp_tools(cassette, server_config, get_live_mcp_tools)
+	return await get_live_mcp_tools(server_config)
+
+
+async def get_live_mcp_tools(server_config: dict) -> List[BaseTool]:
+	"""Get the tools of the configured MCP servers from the shared clients, connecting when the cache is stale."""
+	key = get_mcp_cache_key(server_config)
+	cached = mcp_clients.get(key)
+	if cached and time.monotonic() - cached[2] < MCP_TOOLS_TTL_SECONDS:
+		return cached[1]
+	
+	from langchain_mcp_adapters.client import MultiServerMCPClient
+	
+	client = MultiServerMCPClient(server_config)
+	tools = await client.get_tools()
+	
+	# Evict the oldest configurations once the cache is full
+	mcp_clients.pop(key, None)
+	while len(mcp_clients) >= MCP_CLIENT_CACHE_SIZE:
+		del mcp_clients[next(iter(mcp_clients))]
+	mcp_clients[key] = (client, tools, time.monotonic())
+	return tools
+
+
+class CircuitBreaker:
+	"""Skips a failing MCP server for a while after several consecutive failures."""
+	
+	def __init__(self):
+		self.failures = 0
+		self.open_until = 0.0
+	
+	def allow(self) -> bool:
+		"""Whether the server may be contacted; once the reset time has passed it gets one more try."""
+		return time.monotonic() >= self.open_until
+	
+	def record_success(self):
+		"""Close the breaker after the server answered."""
+		self.failures = 0
+		self.open_until = 0.0
+	
+	def record_failure(self, max_failures: int, reset_seconds: float):
+		"""Count a failure, opening the breaker once there were too many in a row."""
+		self.failures += 1
+		if self.failures >= max_failures:
+			self.open_until = time.monotonic() + reset_seconds
+
+
+# Circuit breakers of the MCP servers, keyed by server URL
+mcp_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(url: str) -> CircuitBreaker:
+	"""Get the circuit breaker of an MCP server, created on first use."""
+	if url not in mcp_circuit_breakers:
+		mcp_circuit_breakers[url] = CircuitBreaker()
+	return mcp_circuit_breakers[url]
+
+
+##########################
+# Shutdown Utils
+##########################
+
+async def close_clients():
+	"""Close the shared HTTP session of the running event loop and forget the cached clients."""
+	session = http_sessions.pop(asyncio.get_running_loop(), None)
+	if session is not None and not session.closed:
+		await session.close()
+	tavily_clients.clear()
+	mcp_clients.clear()
+
+
+def close_clients_at_exit():
+	"""Close shared HTTP sessions at interpreter exit on event loops that are still open."""
+	for loop, session in list(http_sessions.items()):
+		if loop.is_closed() or session.closed:
+			continue
+		try:
+			if loop.is_running():
+				asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=5)
+			else:
+				loop.run_until_complete(session.close())
+		except Exception as e:
+			logging.warning(f"Failed to close shared HTTP session at exit: {e}")
+	http_sessions.clear()
+
+
+atexit.register(close_clients_at_exit)
@@ -2,7 +2,7 @@
 
 import os
 from enum import Enum
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
@@ -16,6 +16,44 @@ class SearchAPI(Enum):
 	NONE = "none"
 
 
+class BlobStoreBackend(Enum):
+	"""Enumeration of available blob store backends for large text payloads."""
+	
+	NONE = "none"
+	FILE = "file"
+	SQLITE = "sqlite"
+
+
+class BlobCompression(Enum):
+	"""Enumeration of compression codecs for stored blobs."""
+	
+	NONE = "none"
+	ZLIB = "zlib"
+	ZSTD = "zstd"
+
+
+class MCPToolCachePolicy(BaseModel):
+	"""Result caching policy for an MCP tool."""
+	
+	cacheable: bool = Field(default=True)
+	"""Whether the tool is idempotent, so its results may be reused for calls with the same arguments"""
+	ttl_seconds: float = Field(default=300)
+	"""How long a cached result is reused"""
+
+
+class MCPServerConfig(BaseModel):
+	"""Connection settings for one of several Model Context Protocol (MCP) servers."""
+	
+	url: str
+	"""The URL of the MCP server"""
+	tools: Optional[List[str]] = Field(default=None, optional=True, )
+	"""The tools of this server to make available to the LLM"""
+	auth_required: Optional[bool] = Field(default=False, optional=True, )
+	"""Whether the MCP server requires authentication"""
+	timeout_seconds: Optional[float] = Field(default=None, optional=True, )
+	"""Seconds to wait for this server's tools, overriding the timeout of the MCP configuration"""
+
+
 class MCPConfig(BaseModel):
 	"""Configuration for Model Context Protocol (MCP) servers."""
 	
@@ -25,6 +63,22 @@ class MCPConfig(BaseModel):
 	"""The tools to make available to the LLM"""
 	auth_required: Optional[bool] = Field(default=False, optional=True, )
 	"""Whether the MCP server requires authentication"""
+	servers: Optional[List[MCPServerConfig]] = Field(default=None, optional=True, )
+	"""Further MCP servers whose tools are loaded alongside those of the server at url"""
+	timeout_seconds: float = Field(default=10)
+	"""Seconds to wait for a server's token and tool catalog before skipping the server"""
+	circuit_breaker_failures: int = Field(default=3)
+	"""Consecutive failures after which a server is skipped without being contacted"""
+	circuit_breaker_reset_seconds: float = Field(default=60)
+	"""Seconds a failing server is skipped before it is tried again"""
+	cache_policies: Optional[Dict[str, MCPToolCachePolicy]] = Field(default=None, optional=True, )
+	"""Result caching policies keyed by tool name, with "*" applying to tools without their own policy. Tools
+	without a policy are never cached"""
+	
+	def get_servers(self) -> List[MCPServerConfig]:
+		"""Get every configured server, starting with the one given by url."""
+		servers = [MCPServerConfig(url=self.url, tools=self.tools, auth_required=self.auth_required)] if self.url else []
+		return servers + list(self.servers or [])
 
 
 class Configuration(BaseModel):
@@ -44,6 +98,13 @@ class Configuration(BaseModel):
 		                                   "researcher to use multiple sub-agents to conduct research. Note: with "
 		                                   "more "
 		                                   "concurrency, you may run into rate limits."}})
+	incremental_research_results: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Hand research results back to the Research Supervisor as soon as each "
+		                                   "sub-agent finishes instead of waiting for the slowest one. Unfinished "
+		                                   "research keeps running and is delivered on a later iteration. Runs "
+		                                   "in this mode cannot be resumed from a checkpoint, as running research "
+		                                   "is not part of the checkpointed state."}})
 	# Research Configuration
 	search_api: SearchAPI = Field(default=SearchAPI.TAVILY, metadata={
 		"x_oap_ui_config": {"type": "select", "default": "tavily", "description": "Search API to use for "
@@ -54,16 +115,47 @@ class Configuration(BaseModel):
 		                    "options": [{"label": "Tavily", "value": SearchAPI.TAVILY.value},
 		                                {"label": "Anthropic Native Web Search", "value": SearchAPI.ANTHROPIC.value},
 		                                {"label": "None", "value": SearchAPI.NONE.value}]}})
+	prefetch_search_results: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Speculatively search and summarize results for each research topic while "
+		                                   "the research sub-agent plans its first step. The results are added to the "
+		                                   "sub-agent's first Tavily search. Only applies to Tavily search."}})
 	max_researcher_iterations: int = Field(default=6, metadata={
 		"x_oap_ui_config": {"type":        "slider", "default": 6, "min": 1, "max": 10, "step": 1,
 		                    "description": "Maximum number of research iterations for the Research Supervisor. This "
 		                                   "is "
 		                                   "the number of times the Research Supervisor will reflect on the research "
 		                                   "and ask follow-up questions."}})
+	supervisor_context_window: int = Field(default=0, metadata={
+		"x_oap_ui_config": {"type":        "slider", "default": 0, "min": 0, "max": 10, "step": 1,
+		                    "description": "Number of most recent Research Supervisor iterations sent to the model "
+		                                   "verbatim. Older research results are condensed into a running digest to "
+		                                   "keep the supervisor's prompt small. Set to 0 to always send the full "
+		                                   "history."}})
 	max_react_tool_calls: int = Field(default=10, metadata={
 		"x_oap_ui_config": {"type":        "slider", "default": 10, "min": 1, "max": 30, "step": 1,
 		                    "description": "Maximum number of tool calling iterations to make in a single researcher "
 		                                   "step."}})
+	min_search_novelty: float = Field(default=0, metadata={
+		"x_oap_ui_config": {"type":        "slider", "default": 0, "min": 0, "max": 1, "step": 0.05,
+		                    "description": "Share of new content below which a researcher's round of searches counts "
+		                                   "as bringing no new evidence, e.g. 0.1. Content from URLs the researcher has "
+		                                   "already seen never counts as new. Set to 0 to disable novelty-based early "
+		                                   "stopping."}})
+	max_low_novelty_rounds: int = Field(default=2, metadata={
+		"x_oap_ui_config": {"type":        "slider", "default": 2, "min": 1, "max": 10, "step": 1,
+		                    "description": "Number of consecutive low-novelty rounds of searches after which a "
+		                                   "researcher stops searching and compresses its findings."}})
+	researcher_timeout_seconds: float = Field(default=0, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 0, "min": 0, "max": 3600,
+		                    "description": "Wall-clock deadline in seconds for a single research sub-agent. When it "
+		                                   "expires the sub-agent stops searching and compresses what it has "
+		                                   "gathered so far. Set to 0 to disable."}})
+	research_timeout_seconds: float = Field(default=0, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 0, "min": 0, "max": 7200,
+		                    "description": "Wall-clock deadline in seconds for the whole research phase. Running "
+		                                   "sub-agents are sent to compression and the supervisor stops delegating "
+		                                   "once it expires. Set to 0 to disable."}})
 	# Model Configuration
 	summarization_model: str = Field(default="gemini-2.0-flash", metadata={
 		"x_oap_ui_config": {"type":        "text", "default": "gemini-2.0-flash",
@@ -71,9 +163,52 @@ class Configuration(BaseModel):
 	summarization_model_max_tokens: int = Field(default=8192, metadata={
 		"x_oap_ui_config": {"type":        "number", "default": 8192,
 		                    "description": "Maximum output tokens for summarization model"}})
+	summarization_fallback_models: List[str] = Field(default=[], metadata={
+		"x_oap_ui_config": {"type":        "list", "default": [],
+		                    "description": "Models to fall back to, in order, when the summarization model fails or is "
+		                                   "throttled. Use a provider prefix such as anthropic: to fail over to "
+		                                   "another provider."}})
 	max_content_length: int = Field(default=50000, metadata={
 		"x_oap_ui_config": {"type":        "number", "default": 50000, "min": 1000, "max": 200000,
 		                    "description": "Maximum character length for webpage content before summarization"}})
+	summarization_top_k: int = Field(default=5, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 5, "min": 0, "max": 50,
+		                    "description": "Number of search results per search call that are summarized, picked "
+		                                   "locally by relevance to their query and diversity. The other results are "
+		                                   "passed to the researcher as their short search snippets. Set to 0 to "
+		                                   "summarize every result."}})
+	summarization_diversity: float = Field(default=0.5, metadata={
+		"x_oap_ui_config": {"type":        "slider", "default": 0.5, "min": 0, "max": 1, "step": 0.05,
+		                    "description": "How strongly the pick of search results to summarize favors results "
+		                                   "that differ from those already picked, from 0 (relevance only) to 1."}})
+	batch_summarization: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Summarize several search result pages in a single summarization model "
+		                                   "call instead of one call per page. Very large pages are still summarized "
+		                                   "on their own."}})
+	summarization_batch_max_chars: int = Field(default=60000, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 60000, "min": 5000, "max": 500000,
+		                    "description": "Maximum combined character length of the pages packed into one batched "
+		                                   "summarization call. Capped further by the summarization model's context "
+		                                   "window and output token limit."}})
+	summarization_batch_page_max_chars: int = Field(default=15000, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 15000, "min": 1000, "max": 200000,
+		                    "description": "Pages longer than this many characters are summarized with their own "
+		                                   "call instead of being batched"}})
+	summarization_routing: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Route search result pages by size: short pages are passed through "
+		                                   "as-is, medium pages get a local extractive summary, and only long or dense "
+		                                   "pages are sent to the summarization model."}})
+	summarization_min_chars: int = Field(default=2000, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 2000, "min": 0, "max": 50000,
+		                    "description": "Pages shorter than this many characters are passed through without "
+		                                   "summarization when summarization routing is enabled"}})
+	extractive_summary_max_chars: int = Field(default=8000, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 8000, "min": 0, "max": 200000,
+		                    "description": "Prose pages up to this many characters are summarized locally by sentence "
+		                                   "extraction when summarization routing is enabled. Longer or denser pages "
+		                                   "use the summarization model."}})
 	research_model: str = Field(default="gemini-2.0-flash", metadata={
 		"x_oap_ui_config": {"type":        "text", "default": "gemini-2.0-flash",
 		                    "description": "Model for conducting research. NOTE: Make sure your Researcher Model "
@@ -81,6 +216,11 @@ class Configuration(BaseModel):
 	research_model_max_tokens: int = Field(default=10000, metadata={
 		"x_oap_ui_config": {"type":        "number", "default": 10000,
 		                    "description": "Maximum output tokens for research model"}})
+	research_fallback_models: List[str] = Field(default=[], metadata={
+		"x_oap_ui_config": {"type":        "list", "default": [],
+		                    "description": "Models to fall back to, in order, when the research model fails or is "
+		                                   "throttled. Use a provider prefix such as anthropic: to fail over to "
+		                                   "another provider."}})
 	compression_model: str = Field(default="gemini-2.0-flash", metadata={
 		"x_oap_ui_config": {"type":        "text", "default": "gemini-2.0-flash",
 		                    "description": "Model for compressing research findings from sub-agents. NOTE: Make sure "
@@ -88,12 +228,119 @@ class Configuration(BaseModel):
 	compression_model_max_tokens: int = Field(default=8192, metadata={
 		"x_oap_ui_config": {"type":        "number", "default": 8192,
 		                    "description": "Maximum output tokens for compression model"}})
+	compression_fallback_models: List[str] = Field(default=[], metadata={
+		"x_oap_ui_config": {"type":        "list", "default": [],
+		                    "description": "Models to fall back to, in order, when the compression model fails or is "
+		                                   "throttled. Use a provider prefix such as anthropic: to fail over to "
+		                                   "another provider."}})
 	final_report_model: str = Field(default="gemini-2.0-flash", metadata={
 		"x_oap_ui_config": {"type":        "text", "default": "gemini-2.0-flash",
 		                    "description": "Model for writing the final report from all research findings"}})
 	final_report_model_max_tokens: int = Field(default=10000, metadata={
 		"x_oap_ui_config": {"type":        "number", "default": 10000,
 		                    "description": "Maximum output tokens for final report model"}})
+	final_report_fallback_models: List[str] = Field(default=[], metadata={
+		"x_oap_ui_config": {"type":        "list", "default": [],
+		                    "description": "Models to fall back to, in order, when the final report model fails or is "
+		                                   "throttled. Use a provider prefix such as anthropic: to fail over to "
+		                                   "another provider."}})
+	hedged_requests: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Send a backup request for summarization and compression calls that run "
+		                                   "longer than usual and keep whichever returns first. The backup uses the "
+		                                   "first fallback model, or repeats the request without fallbacks."}})
+	hedge_latency_percentile: float = Field(default=95, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 95, "min": 50, "max": 99.9,
+		                    "description": "Percentile of recent call latencies after which a hedged request sends "
+		                                   "its backup call"}})
+	hedge_delay_seconds: float = Field(default=15, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 15, "min": 0, "max": 600,
+		                    "description": "Seconds to wait before sending a backup call until enough latencies have "
+		                                   "been recorded to use the percentile"}})
+	model_routing: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Pick the cheapest sufficient model for summarization, compression, the "
+		                                   "Research Supervisor and the final report from each stage's configured "
+		                                   "model and the routing candidates, based on input size and the latency "
+		                                   "target"}})
+	model_routing_candidates: List[str] = Field(default=[], metadata={
+		"x_oap_ui_config": {"type":        "list", "default": [],
+		                    "description": "Additional models the router may choose for each stage. Models missing "
+		                                   "from the model registry are never chosen."}})
+	model_latency_target_seconds: float = Field(default=0, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 0, "min": 0, "max": 600,
+		                    "description": "Routed models must be expected to finish a call within this many "
+		                                   "seconds. Set to 0 to disable."}})
+	# Storage Configuration
+	blob_store_backend: BlobStoreBackend = Field(default=BlobStoreBackend.NONE, metadata={
+		"x_oap_ui_config": {"type": "select", "default": "none", "description": "Where to keep large raw research "
+		                                                                      "notes. With a blob store, graph state "
+		                                                                      "only carries references to the notes.",
+		                    "options": [{"label": "Keep in state", "value": BlobStoreBackend.NONE.value},
+		                                {"label": "Files", "value": BlobStoreBackend.FILE.value},
+		                                {"label": "SQLite", "value": BlobStoreBackend.SQLITE.value}]}})
+	blob_store_path: str = Field(default="", metadata={
+		"x_oap_ui_config": {"type":        "text", "default": "",
+		                    "description": "Directory (file backend) or database file (SQLite backend) of the blob "
+		                                   "store. Leave empty for .blob_store (file) or .blob_store.sqlite (SQLite)."}})
+	blob_store_compression: BlobCompression = Field(default=BlobCompression.ZLIB, metadata={
+		"x_oap_ui_config": {"type": "select", "default": "zlib", "description": "Compression applied to stored blobs",
+		                    "options": [{"label": "None", "value": BlobCompression.NONE.value},
+		                                {"label": "zlib", "value": BlobCompression.ZLIB.value},
+		                                {"label": "Zstandard", "value": BlobCompression.ZSTD.value}]}})
+	blob_store_min_chars: int = Field(default=4096, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 4096, "min": 0,
+		                    "description": "Raw notes shorter than this many characters stay inline in graph state"}})
+	report_cache: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Reuse a recent final report when the research brief matches an earlier "
+		                                   "run with the same model and search settings, and let identical runs "
+		                                   "submitted at the same time share one research run"}})
+	report_cache_path: str = Field(default=".report_cache.sqlite", metadata={
+		"x_oap_ui_config": {"type":        "text", "default": ".report_cache.sqlite",
+		                    "description": "SQLite database file of the report cache"}})
+	report_cache_ttl_seconds: float = Field(default=86400, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 86400, "min": 0,
+		                    "description": "Cached reports older than this many seconds are researched again"}})
+	report_cache_wait_seconds: float = Field(default=1800, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 1800, "min": 0,
+		                    "description": "How long a run waits for an identical run already in progress before "
+		                                   "researching on its own. Set to 0 to disable sharing in-flight runs."}})
+	refresh_change_threshold: float = Field(default=0.4, metadata={
+		"x_oap_ui_config": {"type":        "slider", "default": 0.4, "min": 0.0, "max": 1.0, "step": 0.05,
+		                    "description": "When refreshing a past report, sub-topics whose search results changed by "
+		                                   "more than this share are researched again and the rest keep their earlier "
+		                                   "findings"}})
+	refresh_fingerprints: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Fingerprint the sub-topics of every finished report in the background, "
+		                                   "with one search each, so a later refresh only researches sub-topics whose "
+		                                   "evidence changed. Without fingerprints, refreshing a report researches "
+		                                   "all of its sub-topics again."}})
+	refresh_probe_results: int = Field(default=5, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 5, "min": 1, "max": 20,
+		                    "description": "Search results compared per sub-topic to detect changed evidence when "
+		                                   "refreshing a past report"}})
+	research_cache: bool = Field(default=False, metadata={
+		"x_oap_ui_config": {"type":        "boolean", "default": False,
+		                    "description": "Reuse recent compressed research when the Research Supervisor delegates a "
+		                                   "topic similar to one researched before with the same model and search "
+		                                   "settings, instead of starting a new researcher"}})
+	research_cache_path: str = Field(default=".research_cache.sqlite", metadata={
+		"x_oap_ui_config": {"type":        "text", "default": ".research_cache.sqlite",
+		                    "description": "SQLite database file of the research cache"}})
+	research_cache_similarity: float = Field(default=0.85, metadata={
+		"x_oap_ui_config": {"type":        "slider", "default": 0.85, "min": 0.5, "max": 1.0, "step": 0.01,
+		                    "description": "Lowest cosine similarity between research topics for cached research to "
+		                                   "be reused"}})
+	research_cache_ttl_seconds: float = Field(default=604800, metadata={
+		"x_oap_ui_config": {"type":        "number", "default": 604800, "min": 0,
+		                    "description": "Cached research older than this many seconds is researched again"}})
+	research_cache_embedding_model: str = Field(default="", metadata={
+		"x_oap_ui_config": {"type":        "text", "default": "",
+		                    "description": "Embedding model for matching research topics, such as "
+		                                   "openai:text-embedding-3-small. Leave empty to match topics with local "
+		                                   "hashed word embeddings."}})
 	# MCP server configuration
 	mcp_config: Optional[MCPConfig] = Field(default=None, optional=True, metadata={
 		"x_oap_ui_config": {"type": "mcp", "description": "MCP server configuration"}})
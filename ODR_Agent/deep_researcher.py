@@ -1,21 +1,27 @@
 # Shri Krishnaay Namah
 """Main LangGraph implementation for the Deep Research agent."""
 
+import functools
+import time
+import uuid
+
 from dotenv import load_dotenv
 from langchain_core.messages import *
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Command
 
+from ODR_Agent.blob_store import get_blob_store, store_text
+from ODR_Agent.configuration import BlobStoreBackend
+from ODR_Agent.progress import report_update
 from ODR_Agent.prompts import *
+from ODR_Agent.report_cache import cache_final_report, find_cached_report, get_report_cache_key, publish_report
+from ODR_Agent.research_cache import cache_research, find_cached_research
 from ODR_Agent.state import *
 from ODR_Agent.utils import *
 
 
 load_dotenv(dotenv_path=".env")
 
-# Initialize a configurable model that we will use throughout the agent
-configurable_model = init_chat_model(configurable_fields=("model", "max_tokens", "api_key", "model_provider"), )
-
 
 async def clarify_with_user(state: AgentState, config: RunnableConfig) -> Command[
 	Literal["write_research_brief", "__end__"]]:
@@ -39,13 +45,11 @@ async def clarify_with_user(state: AgentState, config: RunnableConfig) -> Comman
 	
 	# Step 2: Prepare the model for structured clarification analysis
 	messages = state["messages"]
-	model_config = {"model":          configurable.research_model, "max_tokens": configurable.research_model_max_tokens,
-	                "api_key":        get_api_key_for_model(configurable.research_model, config),
-	                "model_provider": "google_genai", "tags": ["langsmith:nostream"]}
 	
-	# Configure model with structured output and retry logic
-	clarification_model = (
-		configurable_model.with_structured_output(ClarifyWithUser).with_retry(stop_after_attempt=configurable.max_structured_output_retries).with_config(model_config))
+	# Configure model with structured output, local repair of malformed output, retry logic and fallback models
+	clarification_model, _ = build_stage_chat_models(configurable.research_model, configurable.research_fallback_models,
+	                                                 configurable.research_model_max_tokens, configurable, config,
+	                                                 schema=ClarifyWithUser)
 	
 	# Step 3: Analyze whether clarification is needed
 	prompt_content = clarify_with_user_instructions.format(messages=get_buffer_string(messages), date=get_today_str())
@@ -60,7 +64,8 @@ async def clarify_with_user(state: AgentState, config: RunnableConfig) -> Comman
 		return Command(goto="write_research_brief", update={"messages": [AIMessage(content=response.verification)]})
 
 
-async def write_research_brief(state: AgentState, config: RunnableConfig) -> Command[Literal["research_supervisor"]]:
+async def write_research_brief(state: AgentState, config: RunnableConfig) -> Command[
+	Literal["research_supervisor", "__end__"]]:
 	"""Transform user messages into a structured research brief and initialize supervisor.
 
 	This function analyzes the user's messages and generates a focused research brief
@@ -72,27 +77,38 @@ async def write_research_brief(state: AgentState, config: RunnableConfig) -> Com
 		config: Runtime configuration with model settings
 
 	Returns:
-		Command to proceed to research supervisor with initialized context
+		Command to proceed to research supervisor with initialized context, or to end with a cached report
 	"""
 	# Step 1: Set up the research model for structured output
 	configurable = Configuration.from_runnable_config(config)
-	research_model_config = {"model":          configurable.research_model,
-	                         "max_tokens":     configurable.research_model_max_tokens,
-	                         "api_key":        get_api_key_for_model(configurable.research_model, config),
-	                         "model_provider": "google_genai", "tags": ["langsmith:nostream"]}
 	
-	# Configure model for structured research question generation
-	research_model = (
-		configurable_model.with_structured_output(ResearchQuestion).with_retry(stop_after_attempt=configurable.max_structured_output_retries).with_config(research_model_config))
+	# Configure model for structured research question generation, with fallback models
+	research_model, _ = build_stage_chat_models(configurable.research_model, configurable.research_fallback_models,
+	                                            configurable.research_model_max_tokens, configurable, config,
+	                                            schema=ResearchQuestion)
 	
 	# Step 2: Generate structured research brief from user messages
 	prompt_content = transform_messages_into_research_topic_prompt.format(messages=get_buffer_string(state.get("messages", [])), date=get_today_str())
 	response = await research_model.ainvoke([HumanMessage(content=prompt_content)])
 	
-	# Step 3: Initialize supervisor with research brief and instructions
+	# Step 3: Reuse a recent report for the same brief, or wait for an identical run already in progress
+	report_cache_key, report_cache_token = None, None
+	if configurable.report_cache:
+		report_cache_key = get_report_cache_key(response.research_brief, configurable)
+		cached_report, report_cache_token = await find_cached_report(report_cache_key, configurable)
+		if cached_report:
+			return Command(goto=END, update={"research_brief": response.research_brief,
+			                                 "final_report":   cached_report["final_report"],
+			                                 "notes":          {"type": "override", "value": cached_report["notes"]},
+			                                 "messages":       [AIMessage(content=cached_report["final_report"])]})
+	
+	# Step 4: Initialize supervisor with research brief and instructions
 	supervisor_system_prompt = lead_researcher_prompt.format(date=get_today_str(), max_concurrent_research_units=configurable.max_concurrent_research_units, max_researcher_iterations=configurable.max_researcher_iterations)
 	
 	return Command(goto="research_supervisor", update={"research_brief":      response.research_brief,
+	                                                   "research_deadline": get_deadline(configurable.research_timeout_seconds),
+	                                                   "report_cache_key":  report_cache_key,
+	                                                   "report_cache_token": report_cache_token,
 	                                                   "supervisor_messages": {"type":  "override", "value": [
 		                                                   SystemMessage(content=supervisor_system_prompt),
 		                                                   HumanMessage(content=response.research_brief)]}})
@@ -113,27 +129,316 @@ async def supervisor(state: SupervisorState, config: RunnableConfig) -> Command[
 		Command to proceed to supervisor_tools for tool execution
 	"""
 	
-	# Step 1: Configure the supervisor model with available tools
+	# Step 1: Build the model context, condensing older iterations into a digest if a window is configured
 	configurable = Configuration.from_runnable_config(config)
-	research_model_config = {"model":          configurable.research_model,
-	                         "max_tokens":     configurable.research_model_max_tokens,
-	                         "api_key":        get_api_key_for_model(configurable.research_model, config),
-	                         "model_provider": "google_genai", "tags": ["langsmith:nostream"]}
+	supervisor_messages = state.get("supervisor_messages", [])
+	digest_update = {}
+	if configurable.supervisor_context_window:
+		supervisor_messages, digest_update = await build_supervisor_context(state, configurable, config)
+	
+	# Step 2: Configure the supervisor model with available tools, routed by context size if enabled
+	supervisor_model = route_model("supervisor", configurable, len(get_buffer_string(supervisor_messages)))
 	
 	# Available tools: research delegation, completion signaling, and strategic thinking
 	lead_researcher_tools = [ConductResearch, ResearchComplete, think_tool]
 	
-	# Configure model with tools, retry logic, and model settings
-	research_model = (
-		configurable_model.bind_tools(lead_researcher_tools).with_retry(stop_after_attempt=configurable.max_structured_output_retries).with_config(research_model_config))
+	# Configure model with tools, retry logic, model settings and fallback models
+	research_model, _ = build_stage_chat_models(supervisor_model, configurable.research_fallback_models,
+	                                            configurable.research_model_max_tokens, configurable, config,
+	                                            tools=lead_researcher_tools)
 	
-	# Step 2: Generate supervisor response based on current context
-	supervisor_messages = state.get("supervisor_messages", [])
-	response = await research_model.ainvoke(supervisor_messages)
+	# Step 3: Generate supervisor response based on current context, bounded by the research deadline
+	try:
+		response = await asyncio.wait_for(research_model.ainvoke(supervisor_messages),
+		                                  timeout=seconds_until(state.get("research_deadline")))
+	except asyncio.TimeoutError:
+		# Research deadline reached - supervisor_tools will end the research phase
+		return Command(goto="supervisor_tools", update=digest_update)
 	
-	# Step 3: Update state and proceed to tool execution
+	# Step 4: Update state and proceed to tool execution
 	return Command(goto="supervisor_tools", update={"supervisor_messages": [response],
-	                                                "research_iterations": state.get("research_iterations", 0) + 1})
+	                                                "research_iterations": state.get("research_iterations", 0) + 1,
+	                                                **digest_update})
+
+
+def split_supervisor_turns(messages: list[MessageLikeRepresentation]) -> tuple[list, list[list]]:
+	"""Split supervisor history into its opening messages and turns of an AI message plus its tool results.
+
+	Args:
+		messages: Full supervisor message history
+
+	Returns:
+		Tuple of (messages before the first AI message, list of turns)
+	"""
+	prefix, turns = [], []
+	for message in messages:
+		if isinstance(message, AIMessage):
+			turns.append([message])
+		elif turns:
+			turns[-1].append(message)
+		else:
+			prefix.append(message)
+	return prefix, turns
+
+
+def format_supervisor_turns(messages: list[MessageLikeRepresentation]) -> str:
+	"""Render supervisor messages as plain text for the digest, including delegated research topics."""
+	lines = []
+	for message in messages:
+		if isinstance(message, AIMessage):
+			for tool_call in message.tool_calls:
+				if tool_call["name"] == "ConductResearch":
+					lines.append(f"Delegated research: {tool_call['args'].get('research_topic', '')}")
+		elif isinstance(message, ToolMessage) and not message.additional_kwargs.get("research_pending"):
+			lines.append(f"Result of {message.name}:\n{message.content}")
+	return "\n\n".join(lines)
+
+
+async def build_supervisor_context(state: SupervisorState, configurable: Configuration, config: RunnableConfig):
+	"""Build the supervisor's model context from a running digest plus the most recent turns.
+
+	Turns older than the configured window are folded into the digest with the compression model.
+	Only turns that were not digested before are sent, so each turn is condensed once. The full
+	history stays in state for note extraction.
+
+	Args:
+		state: Current supervisor state with messages and the digest so far
+		configurable: Configuration with the context window and compression model settings
+		config: Runtime configuration for API keys
+
+	Returns:
+		Tuple of (messages to send to the supervisor model, state update for the digest)
+	"""
+	supervisor_messages = state.get("supervisor_messages", [])
+	prefix, turns = split_supervisor_turns(supervisor_messages)
+	if len(turns) <= configurable.supervisor_context_window:
+		return supervisor_messages, {}
+	
+	# Step 1: Find the messages leaving the window that have not been digested yet
+	old_turns = turns[:-configurable.supervisor_context_window]
+	digest_until = len(prefix) + sum(len(turn) for turn in old_turns)
+	digested_until = max(state.get("supervisor_digest_until", 0), len(prefix))
+	digest = state.get("supervisor_digest", "")
+	removed_research = format_supervisor_turns(list(supervisor_messages)[digested_until:digest_until])
+	
+	# Step 2: Fold them into the running digest
+	if removed_research:
+		digest_model = get_configurable_model().with_config(get_model_config(configurable.compression_model,
+		                                                               configurable.compression_model_max_tokens,
+		                                                               config))
+		prompt_content = supervisor_digest_prompt.format(research_brief=state.get("research_brief", ""),
+		                                                 current_digest=digest, removed_research=removed_research,
+		                                                 date=get_today_str())
+		try:
+			response = await digest_model.ainvoke([HumanMessage(content=prompt_content)])
+			digest = str(response.content)
+		except Exception as e:
+			# Keep the removed research verbatim rather than losing it
+			logging.warning(f"Supervisor digest update failed with error: {str(e)}, appending research verbatim")
+			digest = f"{digest}\n\n{removed_research}".strip()
+	
+	# Step 3: Send the opening messages, the digest and the recent turns
+	recent_messages = [message for turn in turns[-configurable.supervisor_context_window:] for message in turn]
+	digest_message = HumanMessage(content=f"<Research Digest>\nDigest of the research completed in earlier "
+	                                      f"iterations:\n\n{digest}\n</Research Digest>")
+	return prefix + [digest_message] + recent_messages, {"supervisor_digest":       digest,
+	                                                     "supervisor_digest_until": digest_until}
+
+
+# Research units still running in incremental mode, keyed by the ids recorded in SupervisorState.pending_research.
+# The tasks only live in this process, so incremental mode cannot be resumed from a checkpoint: pending research
+# recorded in a checkpoint is reported to the supervisor as lost instead of being delivered.
+in_flight_research: dict[str, asyncio.Task] = {}
+
+# Observation recorded for pending research whose task is not running in this process
+LOST_RESEARCH_OBSERVATION = {"compressed_research": "Error conducting research: the research was interrupted and "
+                                                    "cannot be resumed from a checkpoint. Please delegate it again "
+                                                    "if it is still needed.", "raw_notes": []}
+
+
+def start_research_unit(tool_call: dict, config: RunnableConfig, research_deadline: Optional[float] = None) -> asyncio.Task:
+	"""Start a researcher subgraph for a single ConductResearch call as a background task.
+
+	Args:
+		tool_call: The ConductResearch tool call issued by the supervisor
+		config: Runtime configuration passed through to the researcher
+		research_deadline: Deadline of the whole research phase, if any
+
+	Returns:
+		Task resolving to the researcher's output state
+	"""
+	configurable = Configuration.from_runnable_config(config)
+	research_topic = tool_call["args"]["research_topic"]
+	researcher_input = {"researcher_messages": [HumanMessage(content=research_topic)], "research_topic": research_topic,
+	                    "deadline":            get_deadline(configurable.researcher_timeout_seconds, research_deadline)}
+	
+	# Speculatively search the topic while the researcher's first model call plans its queries
+	prefetch_id = None
+	if configurable.prefetch_search_results and SearchAPI(get_config_value(configurable.search_api)) == SearchAPI.TAVILY:
+		prefetch_id = start_search_prefetch(research_topic, config)
+		config = {**config, "configurable": {**config.get("configurable", {}), "search_prefetch_id": prefetch_id}}
+	
+	async def run_researcher():
+		try:
+			# Reuse recent research on a similar topic instead of researching it again
+			if configurable.research_cache:
+				cached_research, embedding = await find_cached_research(research_topic, configurable)
+				if cached_research:
+					return {**cached_research, "research_topic": research_topic}
+			
+			observation = await get_researcher_subgraph().ainvoke(researcher_input, config)
+			if configurable.research_cache:
+				await cache_research(research_topic, embedding, observation, configurable)
+			return {**observation, "research_topic": research_topic}
+		finally:
+			discard_search_prefetch(prefetch_id)
+	
+	return asyncio.ensure_future(run_researcher())
+
+
+def research_result_message(observation: dict, tool_call_id: str) -> ToolMessage:
+	"""Turn a researcher's output state into the ToolMessage returned to the supervisor."""
+	return ToolMessage(content=observation.get("compressed_research", "Error synthesizing research report: Maximum "
+	                                                                  "retries exceeded"), name="ConductResearch",
+	                   tool_call_id=tool_call_id)
+
+
+def collect_research_task(task: asyncio.Task) -> dict:
+	"""Read the output of a finished research task, converting failures into an error observation."""
+	try:
+		return task.result()
+	except Exception as e:
+		return {"compressed_research": f"Error conducting research: {e}", "raw_notes": []}
+
+
+def late_research_messages(entry: dict, observation: dict) -> list[MessageLikeRepresentation]:
+	"""Build the message pair that delivers research finishing after its tool call was already answered.
+
+	The original ConductResearch call received a placeholder, so the result is attached to a synthetic
+	ConductResearch call that keeps tool call / tool result pairs valid for the model provider.
+	"""
+	tool_call = entry["tool_call"]
+	result_call_id = f"{tool_call['id']}_result"
+	return [AIMessage(content="", tool_calls=[{"name": "ConductResearch", "args": tool_call["args"], "id": result_call_id,
+	                                          "type": "tool_call"}]),
+	        research_result_message(observation, result_call_id)]
+
+
+async def drain_pending_research(pending_research: list[dict]) -> tuple[list[MessageLikeRepresentation], list[dict]]:
+	"""Wait for every research unit still running in incremental mode and collect the results.
+
+	Args:
+		pending_research: Entries recorded in SupervisorState.pending_research
+
+	Returns:
+		Tuple of (messages delivering the late results, researcher output states)
+	"""
+	running = [(entry, in_flight_research.pop(entry["id"])) for entry in pending_research if
+	           entry["id"] in in_flight_research]
+	lost = [entry for entry in pending_research if entry not in [running_entry for running_entry, _ in running]]
+	if running:
+		await asyncio.wait([task for _, task in running])
+	
+	messages, observations = [], []
+	for entry, task in running:
+		observation = collect_research_task(task)
+		messages.extend(late_research_messages(entry, observation))
+		observations.append(observation)
+	for entry in lost:
+		messages.extend(late_research_messages(entry, LOST_RESEARCH_OBSERVATION))
+	return messages, observations
+
+
+def cancel_research_units(entries: list[dict]):
+	"""Cancel research units still running in incremental mode and forget their tasks."""
+	for entry in entries:
+		task = in_flight_research.pop(entry["id"], None)
+		if task:
+			task.cancel()
+
+
+async def conduct_research_incrementally(conduct_research_calls: list[dict], pending_research: list[dict],
+                                         configurable: Configuration, config: RunnableConfig,
+                                         research_deadline: Optional[float] = None):
+	"""Run research units and return as soon as any of them finishes, leaving the rest running.
+
+	New ConductResearch calls are started alongside research still running from earlier iterations. Calls that
+	finish in this step are answered directly; calls still running get a placeholder and their results are
+	delivered on a later iteration through a synthetic ConductResearch call.
+
+	Args:
+		conduct_research_calls: ConductResearch calls from the most recent supervisor message
+		pending_research: Research started on earlier iterations that has not been delivered yet
+		configurable: Parsed configuration with concurrency limits
+		config: Runtime configuration passed through to the researchers
+		research_deadline: Deadline of the whole research phase, if any
+
+	Returns:
+		Tuple of (tool messages, researcher output states collected, research still pending)
+	"""
+	# Step 1: Start new research within the concurrency budget left by research already running
+	still_running = [entry for entry in pending_research if entry["id"] in in_flight_research]
+	available_slots = max(configurable.max_concurrent_research_units - len(still_running), 0)
+	allowed_calls = conduct_research_calls[:available_slots]
+	overflow_calls = conduct_research_calls[available_slots:]
+	
+	new_entries = []
+	try:
+		for tool_call in allowed_calls:
+			entry = {"id": str(uuid.uuid4()), "tool_call": tool_call}
+			in_flight_research[entry["id"]] = start_research_unit(tool_call, config, research_deadline)
+			new_entries.append(entry)
+		
+		# Step 2: Wait until at least one research unit has finished
+		all_entries = still_running + new_entries
+		if all_entries:
+			await asyncio.wait([in_flight_research[entry["id"]] for entry in all_entries],
+			                   return_when=asyncio.FIRST_COMPLETED)
+	except Exception:
+		# New research is not recorded in state yet, so nothing else would ever collect it
+		cancel_research_units(new_entries)
+		raise
+	except BaseException:
+		# The run itself was cancelled, so no later step will collect any of the research
+		cancel_research_units(still_running + new_entries)
+		raise
+	
+	# Step 3: Answer the new calls, with placeholders for research that is still running
+	tool_messages, late_messages, observations, pending = [], [], [], []
+	for entry in pending_research:
+		if entry not in still_running:
+			# Pending research from a checkpoint whose task is not running in this process
+			late_messages.extend(late_research_messages(entry, LOST_RESEARCH_OBSERVATION))
+	for entry in all_entries:
+		task = in_flight_research[entry["id"]]
+		is_new = entry in new_entries
+		if not task.done():
+			pending.append(entry)
+			if is_new:
+				tool_messages.append(ToolMessage(content="Research on this topic is still running. Its findings will "
+				                                         "be delivered in a later turn as soon as they are ready.",
+				                                 name="ConductResearch", tool_call_id=entry["tool_call"]["id"],
+				                                 additional_kwargs={"research_pending": True}))
+			continue
+		
+		in_flight_research.pop(entry["id"])
+		observation = collect_research_task(task)
+		observations.append(observation)
+		if is_new:
+			tool_messages.append(research_result_message(observation, entry["tool_call"]["id"]))
+		else:
+			late_messages.extend(late_research_messages(entry, observation))
+	
+	# Step 4: Reject calls beyond the concurrency limit
+	for overflow_call in overflow_calls:
+		tool_messages.append(ToolMessage(content=f"Error: Did not run this research as {len(still_running)} research "
+		                                         f"units are still running and at most "
+		                                         f"{configurable.max_concurrent_research_units} may run concurrently. "
+		                                         f"Please try again later or with fewer research units.",
+		                                 name="ConductResearch", tool_call_id=overflow_call["id"]))
+	
+	# Tool results for the latest supervisor message must come before results delivered late
+	return tool_messages + late_messages, observations, pending
 
 
 async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Command[Literal["supervisor", "__end__"]]:
@@ -144,6 +449,9 @@ async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Co
 	2. ConductResearch - Delegates research tasks to sub-researchers
 	3. ResearchComplete - Signals completion of research phase
 
+	With incremental research results enabled, ConductResearch results are handed back as each
+	researcher finishes and unfinished research is carried over to later iterations.
+
 	Args:
 		state: Current supervisor state with messages and iteration count
 		config: Runtime configuration with research limits and model settings
@@ -156,8 +464,14 @@ async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Co
 	configurable = Configuration.from_runnable_config(config)
 	supervisor_messages = state.get("supervisor_messages", [])
 	research_iterations = state.get("research_iterations", 0)
+	pending_research = state.get("pending_research", [])
+	research_deadline = state.get("research_deadline")
 	most_recent_message = supervisor_messages[-1]
 	
+	# End immediately once the research deadline has passed, delivering research that is still running
+	if seconds_until(research_deadline) == 0:
+		return await end_research_phase(state, supervisor_messages, configurable)
+	
 	# Define exit criteria for research phase
 	exceeded_allowed_iterations = research_iterations > configurable.max_researcher_iterations
 	no_tool_calls = not most_recent_message.tool_calls
@@ -166,8 +480,7 @@ async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Co
 	
 	# Exit if any termination condition is met
 	if exceeded_allowed_iterations or no_tool_calls or research_complete_tool_call:
-		return Command(goto=END, update={"notes":          get_notes_from_tool_calls(supervisor_messages),
-		                                 "research_brief": state.get("research_brief", "")})
+		return await end_research_phase(state, supervisor_messages, configurable)
 	
 	# Step 2: Process all tool calls together (both think_tool and ConductResearch)
 	all_tool_messages = []
@@ -185,26 +498,37 @@ async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Co
 	conduct_research_calls = [tool_call for tool_call in most_recent_message.tool_calls if
 	                          tool_call["name"] == "ConductResearch"]
 	
-	if conduct_research_calls:
+	if configurable.incremental_research_results and (conduct_research_calls or pending_research):
+		try:
+			# Hand back whatever finishes first and keep the rest running
+			research_messages, tool_results, pending_research = await conduct_research_incrementally(
+				conduct_research_calls, pending_research, configurable, config, research_deadline)
+			all_tool_messages.extend(research_messages)
+			update_payload["pending_research"] = {"type": "override", "value": pending_research}
+			
+			update_payload["raw_notes"] = aggregate_raw_notes(tool_results, configurable)
+			update_payload["research_units"] = get_research_units(tool_results)
+		
+		except Exception as e:
+			# Research execution error - end research phase with the research still running
+			logging.warning(f"Research failed with error: {str(e)}, ending research phase")
+			return await end_research_phase(state, supervisor_messages, configurable)
+	
+	elif conduct_research_calls:
 		try:
 			# Limit concurrent research units to prevent resource exhaustion
 			allowed_conduct_research_calls = conduct_research_calls[:configurable.max_concurrent_research_units]
 			overflow_conduct_research_calls = conduct_research_calls[configurable.max_concurrent_research_units:]
 			
 			# Execute research tasks in parallel
-			research_tasks = [researcher_subgraph.ainvoke({
-				"researcher_messages": [HumanMessage(content=tool_call["args"]["research_topic"])],
-				"research_topic":      tool_call["args"]["research_topic"]}, config) for tool_call in
-				allowed_conduct_research_calls]
+			research_tasks = [start_research_unit(tool_call, config, research_deadline) for tool_call in
+			                  allowed_conduct_research_calls]
 			
 			tool_results = await asyncio.gather(*research_tasks)
 			
 			# Create tool messages with research results
 			for observation, tool_call in zip(tool_results, allowed_conduct_research_calls):
-				all_tool_messages.append(ToolMessage(content=observation.get("compressed_research", "Error synthesizing research report: "
-				                                                                                    "Maximum retries "
-				                                                                                    "exceeded"), name=
-				tool_call["name"], tool_call_id=tool_call["id"]))
+				all_tool_messages.append(research_result_message(observation, tool_call["id"]))
 			
 			# Handle overflow research calls with error messages
 			for overflow_call in overflow_conduct_research_calls:
@@ -216,39 +540,101 @@ async def supervisor_tools(state: SupervisorState, config: RunnableConfig) -> Co
 				overflow_call["id"]))
 			
 			# Aggregate raw notes from all research results
-			raw_notes_concat = "\n".join(["\n".join(observation.get("raw_notes", [])) for observation in tool_results])
-			
-			if raw_notes_concat:
-				update_payload["raw_notes"] = [raw_notes_concat]
+			update_payload["raw_notes"] = aggregate_raw_notes(tool_results, configurable)
+			update_payload["research_units"] = get_research_units(tool_results)
 		
 		except Exception as e:
 			# Handle research execution errors
+			logging.warning(f"Research failed with error: {str(e)}, ending research phase")
 			if is_token_limit_exceeded(e, configurable.research_model) or True:
 				# Token limit exceeded or other error - end research phase
-				return Command(goto=END, update={"notes":          get_notes_from_tool_calls(supervisor_messages),
-				                                 "research_brief": state.get("research_brief", "")})
+				return await end_research_phase(state, supervisor_messages, configurable)
 	
 	# Step 3: Return command with all tool results
 	update_payload["supervisor_messages"] = all_tool_messages
 	return Command(goto="supervisor", update=update_payload)
 
 
-# Supervisor Subgraph Construction
-# Creates the supervisor workflow that manages research delegation and coordination
-supervisor_builder = StateGraph(SupervisorState, context_schema=Configuration)
+def aggregate_raw_notes(observations: list[dict], configurable: Configuration) -> list[str]:
+	"""Combine the raw notes of several researchers into the raw notes update for the supervisor.
 
-# Add supervisor nodes for research management
-supervisor_builder.add_node("supervisor", supervisor)  # Main supervisor logic
-supervisor_builder.add_node("supervisor_tools", supervisor_tools)  # Tool execution handler
+	Without a blob store the notes are joined into one string as before. With a blob store the notes are
+	already references, so they are kept as a list instead of being concatenated.
 
-# Define supervisor workflow edges
-supervisor_builder.add_edge(START, "supervisor")  # Entry point to supervisor
+	Args:
+		observations: Researcher output states
+		configurable: Configuration with blob store settings
 
-# Compile supervisor subgraph for use in main workflow
-supervisor_subgraph = supervisor_builder.compile()
+	Returns:
+		List of raw notes (or references to them) to append to state
+	"""
+	raw_notes = [note for observation in observations for note in observation.get("raw_notes", []) if note]
+	if BlobStoreBackend(configurable.blob_store_backend) != BlobStoreBackend.NONE:
+		return raw_notes
+	
+	raw_notes_concat = "\n".join(["\n".join(observation.get("raw_notes", [])) for observation in observations])
+	return [raw_notes_concat] if raw_notes_concat else []
 
 
-async def researcher(state: ResearcherState, config: RunnableConfig) -> Command[Literal["researcher_tools"]]:
+def get_research_units(observations: list[dict]) -> list[dict]:
+	"""Record the topic and findings of each successful research unit so a later refresh can reuse them.
+
+	Args:
+		observations: Researcher output states, tagged with their research topic
+
+	Returns:
+		List of research units to append to state
+	"""
+	return [{"research_topic": observation["research_topic"], "compressed_research": observation["compressed_research"],
+	         "researched_at":  time.time()} for observation in observations if observation.get("research_topic") and
+	        observation.get("compressed_research") and not observation["compressed_research"].startswith("Error")]
+
+
+async def end_research_phase(state: SupervisorState, supervisor_messages: list[MessageLikeRepresentation],
+                             configurable: Configuration) -> Command:
+	"""End the supervisor loop, first collecting any research still running in incremental mode.
+
+	Args:
+		state: Current supervisor state
+		supervisor_messages: Supervisor message history to extract notes from
+		configurable: Configuration with blob store settings
+
+	Returns:
+		Command ending the research phase with notes from all delivered research
+	"""
+	update = {"notes": get_notes_from_tool_calls(supervisor_messages), "research_brief": state.get("research_brief", "")}
+	
+	pending_research = state.get("pending_research", [])
+	if pending_research:
+		late_messages, observations = await drain_pending_research(pending_research)
+		update["notes"] += get_notes_from_tool_calls(late_messages)
+		update["pending_research"] = {"type": "override", "value": []}
+		update["raw_notes"] = aggregate_raw_notes(observations, configurable)
+		update["research_units"] = get_research_units(observations)
+	
+	return Command(goto=END, update=update)
+
+
+# Supervisor Subgraph Construction
+# Creates the supervisor workflow that manages research delegation and coordination
+@functools.cache
+def get_supervisor_subgraph():
+	"""Build and compile the supervisor subgraph on first use."""
+	supervisor_builder = StateGraph(SupervisorState, context_schema=Configuration)
+	
+	# Add supervisor nodes for research management
+	supervisor_builder.add_node("supervisor", supervisor)  # Main supervisor logic
+	supervisor_builder.add_node("supervisor_tools", supervisor_tools)  # Tool execution handler
+	
+	# Define supervisor workflow edges
+	supervisor_builder.add_edge(START, "supervisor")  # Entry point to supervisor
+	
+	# Compile supervisor subgraph for use in main workflow
+	return supervisor_builder.compile()
+
+
+async def researcher(state: ResearcherState, config: RunnableConfig) -> Command[
+	Literal["researcher_tools", "compress_research"]]:
 	"""Individual researcher that conducts focused research on specific topics.
 
 	This researcher is given a specific research topic by the supervisor and uses
@@ -260,12 +646,17 @@ async def researcher(state: ResearcherState, config: RunnableConfig) -> Command[
 		config: Runtime configuration with model settings and tool availability
 
 	Returns:
-		Command to proceed to researcher_tools for tool execution
+		Command to proceed to researcher_tools for tool execution, or to compression once the
+		researcher's deadline has passed
 	"""
 	
 	# Step 1: Load configuration and validate tool availability
 	configurable = Configuration.from_runnable_config(config)
 	researcher_messages = state.get("researcher_messages", [])
+	deadline = state.get("deadline")
+	if seconds_until(deadline) == 0:
+		# Deadline reached - compress whatever has been gathered so far
+		return Command(goto="compress_research")
 	
 	# Get all available research tools (search, MCP, think_tool)
 	tools = await get_all_tools(config)
@@ -274,25 +665,26 @@ async def researcher(state: ResearcherState, config: RunnableConfig) -> Command[
 		                 "search API or add MCP tools to your configuration.")
 	
 	# Step 2: Configure the researcher model with tools
-	research_model_config = {"model":          configurable.research_model,
-	                         "max_tokens":     configurable.research_model_max_tokens,
-	                         "api_key":        get_api_key_for_model(configurable.research_model, config),
-	                         "model_provider": "google_genai", "tags": ["langsmith:nostream"]}
-	
 	# Prepare system prompt with MCP context if available
 	researcher_prompt = research_system_prompt.format(mcp_prompt=configurable.mcp_prompt or "", date=get_today_str())
 	
-	# Configure model with tools, retry logic, and settings
-	research_model = (
-		configurable_model.bind_tools(tools).with_retry(stop_after_attempt=configurable.max_structured_output_retries).with_config(research_model_config))
+	# Configure model with tools, retry logic, settings and fallback models
+	research_model, _ = build_stage_chat_models(configurable.research_model, configurable.research_fallback_models,
+	                                            configurable.research_model_max_tokens, configurable, config,
+	                                            tools=tools)
 	
 	# Step 3: Generate researcher response with system context
 	messages = [SystemMessage(content=researcher_prompt)] + researcher_messages
-	response = await research_model.ainvoke(messages)
+	try:
+		response = await asyncio.wait_for(research_model.ainvoke(messages), timeout=seconds_until(deadline))
+	except asyncio.TimeoutError:
+		# Deadline reached while waiting on the model - compress whatever has been gathered so far
+		return Command(goto="compress_research")
 	
 	# Step 4: Update state and proceed to tool execution
-	return Command(goto="researcher_tools", update={"researcher_messages":  [response],
-	                                                "tool_call_iterations": state.get("tool_call_iterations", 0) + 1})
+	update = {"researcher_messages": [response], "tool_call_iterations": state.get("tool_call_iterations", 0) + 1}
+	report_update("researcher", update)
+	return Command(goto="researcher_tools", update=update)
 
 
 # Tool Execution Helper Function
@@ -314,6 +706,9 @@ async def researcher_tools(state: ResearcherState, config: RunnableConfig) -> Co
 	3. MCP tools - External tool integrations
 	4. ResearchComplete - Signals completion of individual research task
 
+	Research also ends early when several consecutive rounds of searches bring back only URLs and
+	content the researcher has already seen.
+
 	Args:
 		state: Current researcher state with messages and iteration count
 		config: Runtime configuration with research limits and tool settings
@@ -338,27 +733,67 @@ async def researcher_tools(state: ResearcherState, config: RunnableConfig) -> Co
 	tools = await get_all_tools(config)
 	tools_by_name = {t.name if hasattr(t, "name") else t.get("name", "web_search"): t for t in tools}
 	
-	# Execute all tool calls in parallel
+	# Execute all tool calls in parallel, stopping unfinished ones when the researcher's deadline passes
 	tool_calls = most_recent_message.tool_calls
-	tool_execution_tasks = [execute_tool_safely(tools_by_name[tool_call["name"]], tool_call["args"], config) for
-	                        tool_call in tool_calls]
-	observations = await asyncio.gather(*tool_execution_tasks)
+	deadline = state.get("deadline")
+	tool_execution_tasks = [asyncio.ensure_future(execute_tool_safely(tools_by_name[tool_call["name"]],
+	                                                                  tool_call["args"], config)) for tool_call in
+	                        tool_calls]
+	if tool_execution_tasks:
+		await asyncio.wait(tool_execution_tasks, timeout=seconds_until(deadline))
+	
+	observations = []
+	for task in tool_execution_tasks:
+		if task.done():
+			observations.append(task.result())
+		else:
+			task.cancel()
+			observations.append("Error executing tool: the research deadline was reached before it finished.")
 	
 	# Create tool messages from execution results
 	tool_outputs = [ToolMessage(content=observation, name=tool_call["name"], tool_call_id=tool_call["id"]) for
 	                observation, tool_call in zip(observations, tool_calls)]
 	
-	# Step 3: Check late exit conditions (after processing tools)
-	exceeded_iterations = state.get("tool_call_iterations", 0) >= configurable.max_react_tool_calls
+	# Step 3: If novelty-based stopping is enabled, track how much new evidence the searches brought compared to
+	# earlier tool results, counting consecutive low-novelty rounds
+	low_novelty_rounds = state.get("low_novelty_rounds", 0)
+	if configurable.min_search_novelty > 0:
+		seen_urls, seen_shingles = set(), set()
+		measure_novelty([str(message.content) for message in filter_messages(researcher_messages,
+		                                                                     include_types=["tool"])], seen_urls,
+		                seen_shingles)
+		novelty = measure_novelty([str(observation) for observation in observations], seen_urls, seen_shingles)
+		if novelty is not None:
+			low_novelty_rounds = low_novelty_rounds + 1 if novelty < configurable.min_search_novelty else 0
+	update = {"researcher_messages": tool_outputs, "low_novelty_rounds": low_novelty_rounds}
+	
+	# Step 4: Check late exit conditions (after processing tools)
+	tool_call_iterations = state.get("tool_call_iterations", 0)
+	exceeded_iterations = tool_call_iterations >= configurable.max_react_tool_calls
 	research_complete_called = any(
 		tool_call["name"] == "ResearchComplete" for tool_call in most_recent_message.tool_calls)
+	deadline_reached = seconds_until(deadline) == 0
+	novelty_exhausted = configurable.min_search_novelty > 0 and low_novelty_rounds >= configurable.max_low_novelty_rounds
 	
-	if exceeded_iterations or research_complete_called:
+	if exceeded_iterations or research_complete_called or deadline_reached:
 		# End research and proceed to compression
-		return Command(goto="compress_research", update={"researcher_messages": tool_outputs})
+		report_update("researcher_tools", update)
+		return Command(goto="compress_research", update=update)
+	
+	if novelty_exhausted:
+		# Recent searches only found evidence already seen - stop early and report the work saved
+		searches = count_search_calls(researcher_messages)
+		saved_iterations = configurable.max_react_tool_calls - tool_call_iterations
+		saved_searches = round(saved_iterations * searches / tool_call_iterations) if tool_call_iterations else 0
+		logging.info(f"Researcher stopped after {low_novelty_rounds} low-novelty rounds of searches, saving up to "
+		             f"{saved_iterations} iteration(s) and about {saved_searches} search(es)")
+		report_update("researcher_tools", {**update, "novelty_stop": {"saved_iterations": saved_iterations,
+		                                                              "saved_searches":   saved_searches}})
+		return Command(goto="compress_research", update=update)
 	
 	# Continue research loop with tool results
-	return Command(goto="researcher", update={"researcher_messages": tool_outputs})
+	report_update("researcher_tools", update)
+	return Command(goto="researcher", update=update)
 
 
 async def compress_research(state: ResearcherState, config: RunnableConfig):
@@ -375,16 +810,15 @@ async def compress_research(state: ResearcherState, config: RunnableConfig):
 	Returns:
 		Dictionary containing compressed research summary and raw notes
 	"""
-	# Step 1: Configure the compression model
+	# Step 1: Configure the compression model, routed by the size of the research transcript if enabled
 	configurable = Configuration.from_runnable_config(config)
-	synthesizer_model = configurable_model.with_config({"model":          configurable.compression_model,
-	                                                    "max_tokens":     configurable.compression_model_max_tokens,
-	                                                    "api_key":        get_api_key_for_model(configurable.compression_model, config),
-	                                                    "model_provider": "google_genai",
-	                                                    "tags":           ["langsmith:nostream"]})
+	researcher_messages = state.get("researcher_messages", [])
+	compression_model = route_model("compression", configurable, len(get_buffer_string(researcher_messages)))
+	synthesizer_model = HedgedModel(*build_stage_chat_models(compression_model, configurable.compression_fallback_models,
+	                                                         configurable.compression_model_max_tokens, configurable,
+	                                                         config), f"compression:{compression_model}", configurable)
 	
 	# Step 2: Prepare messages for compression
-	researcher_messages = state.get("researcher_messages", [])
 	
 	# Add instruction to switch from research mode to compression mode
 	researcher_messages.append(HumanMessage(content=compress_research_simple_human_message))
@@ -402,9 +836,10 @@ async def compress_research(state: ResearcherState, config: RunnableConfig):
 			# Execute compression
 			response = await synthesizer_model.ainvoke(messages)
 			
-			# Extract raw notes from all tool and AI messages
+			# Extract raw notes from all tool and AI messages, moving them to the blob store if configured
 			raw_notes_content = "\n".join([str(message.content) for message in
 			                               filter_messages(researcher_messages, include_types=["tool", "ai"])])
+			raw_notes_content = await asyncio.to_thread(store_text, raw_notes_content, configurable)
 			
 			# Return successful compression result
 			return {"compressed_research": str(response.content), "raw_notes": [raw_notes_content]}
@@ -413,7 +848,7 @@ async def compress_research(state: ResearcherState, config: RunnableConfig):
 			synthesis_attempts += 1
 			
 			# Handle token limit exceeded by removing older messages
-			if is_token_limit_exceeded(e, configurable.research_model):
+			if is_token_limit_exceeded(e, compression_model):
 				researcher_messages = remove_up_to_last_ai_message(researcher_messages)
 				continue
 			
@@ -423,6 +858,7 @@ async def compress_research(state: ResearcherState, config: RunnableConfig):
 	# Step 4: Return error result if all attempts failed
 	raw_notes_content = "\n".join([str(message.content) for message in
 	                               filter_messages(researcher_messages, include_types=["tool", "ai"])])
+	raw_notes_content = await asyncio.to_thread(store_text, raw_notes_content, configurable)
 	
 	return {"compressed_research": "Error synthesizing research report: Maximum retries exceeded",
 	        "raw_notes":           [raw_notes_content]}
@@ -430,22 +866,65 @@ async def compress_research(state: ResearcherState, config: RunnableConfig):
 
 # Researcher Subgraph Construction
 # Creates individual researcher workflow for conducting focused research on specific topics
-researcher_builder = StateGraph(ResearcherState, output_schema=ResearcherOutputState, context_schema=Configuration)
+@functools.cache
+def get_researcher_subgraph():
+	"""Build and compile the researcher subgraph on first use."""
+	researcher_builder = StateGraph(ResearcherState, output_schema=ResearcherOutputState, context_schema=Configuration)
+	
+	# Add researcher nodes for research execution and compression
+	researcher_builder.add_node("researcher", researcher)  # Main researcher logic
+	researcher_builder.add_node("researcher_tools", researcher_tools)  # Tool execution handler
+	researcher_builder.add_node("compress_research", compress_research)  # Research compression
+	
+	# Define researcher workflow edges
+	researcher_builder.add_edge(START, "researcher")  # Entry point to researcher
+	researcher_builder.add_edge("compress_research", END)  # Exit point after compression
+	
+	# Compile researcher subgraph for parallel execution by supervisor
+	return researcher_builder.compile()
+
+
+async def research_supervisor(state: AgentState, config: RunnableConfig):
+	"""Run the supervisor subgraph, releasing the run's report cache claim if the research phase fails.
 
-# Add researcher nodes for research execution and compression
-researcher_builder.add_node("researcher", researcher)  # Main researcher logic
-researcher_builder.add_node("researcher_tools", researcher_tools)  # Tool execution handler
-researcher_builder.add_node("compress_research", compress_research)  # Research compression
+	A blob store that cannot be opened fails the run before any research starts.
 
-# Define researcher workflow edges
-researcher_builder.add_edge(START, "researcher")  # Entry point to researcher
-researcher_builder.add_edge("compress_research", END)  # Exit point after compression
+	Args:
+		state: Agent state with the research brief and initialized supervisor context
+		config: Runtime configuration passed through to the supervisor
 
-# Compile researcher subgraph for parallel execution by supervisor
-researcher_subgraph = researcher_builder.compile()
+	Returns:
+		The supervisor subgraph's output state
+	"""
+	try:
+		# Open the blob store up front, so a misconfigured one fails the run instead of every research unit
+		await asyncio.to_thread(get_blob_store, Configuration.from_runnable_config(config))
+		# Hand plain lists back to the main graph, whose state and checkpoints never hold a ChunkedList
+		return materialize_lists(await get_supervisor_subgraph().ainvoke(state, config))
+	except BaseException:
+		# Release identical runs waiting on this one, as it will not reach the final report
+		publish_report(state.get("report_cache_key"), state.get("report_cache_token"), None)
+		raise
 
 
 async def final_report_generation(state: AgentState, config: RunnableConfig):
+	"""Generate the final report, caching it for identical research briefs if the report cache is enabled.
+
+	Args:
+		state: Agent state containing research findings and context
+		config: Runtime configuration with model settings and API keys
+
+	Returns:
+		Dictionary containing the final report and cleared state
+	"""
+	try:
+		return await write_final_report(state, config)
+	finally:
+		# Release identical runs waiting on this one if the report was not cached
+		publish_report(state.get("report_cache_key"), state.get("report_cache_token"), None)
+
+
+async def write_final_report(state: AgentState, config: RunnableConfig):
 	"""Generate the final comprehensive research report with retry logic for token limits.
 
 	This function takes all collected research findings and synthesizes them into a
@@ -463,12 +942,11 @@ async def final_report_generation(state: AgentState, config: RunnableConfig):
 	cleared_state = {"notes": {"type": "override", "value": []}}
 	findings = "\n".join(notes)
 	
-	# Step 2: Configure the final report generation model
+	# Step 2: Configure the final report generation model, routed by the size of the findings if enabled
 	configurable = Configuration.from_runnable_config(config)
-	writer_model_config = {"model":          configurable.final_report_model,
-	                       "max_tokens":     configurable.final_report_model_max_tokens,
-	                       "api_key":        get_api_key_for_model(configurable.final_report_model, config),
-	                       "model_provider": "google_genai", "tags": ["langsmith:nostream"]}
+	writer_model = route_model("report", configurable, len(findings))
+	writer_model_chain, _ = build_stage_chat_models(writer_model, configurable.final_report_fallback_models,
+	                                                configurable.final_report_model_max_tokens, configurable, config)
 	
 	# Step 3: Attempt report generation with token limit retry logic
 	max_retries = 3
@@ -481,24 +959,24 @@ async def final_report_generation(state: AgentState, config: RunnableConfig):
 			final_report_prompt = final_report_generation_prompt.format(research_brief=state.get("research_brief", ""), messages=get_buffer_string(state.get("messages", [])), findings=findings, date=get_today_str())
 			
 			# Generate the final report
-			final_report = await configurable_model.with_config(writer_model_config).ainvoke([
-				HumanMessage(content=final_report_prompt)])
+			final_report = await writer_model_chain.ainvoke([HumanMessage(content=final_report_prompt)])
 			
-			# Return successful report generation
+			# Cache the report for identical research briefs, then return successful report generation
+			await cache_final_report(state.get("report_cache_key"), state.get("report_cache_token"), state.get("research_brief", ""), final_report.content, notes, configurable)
 			return {"final_report": final_report.content, "messages": [final_report], **cleared_state}
 		
 		except Exception as e:
 			# Handle token limit exceeded errors with progressive truncation
-			if is_token_limit_exceeded(e, configurable.final_report_model):
+			if is_token_limit_exceeded(e, writer_model):
 				current_retry += 1
 				
 				if current_retry == 1:
-					model_token_limit = get_model_token_limit(configurable.final_report_model)
+					model_token_limit = get_model_token_limit(writer_model)
 					if not model_token_limit:
 						return {
 							"final_report": f"Error generating final report: Token limit exceeded, however, we could "
 							                f"not determine the model's maximum context length. Please update the "
-							                f"model map in deep_researcher/utils.py with this information. {e}",
+							                f"model registry in ODR_Agent/model_registry.py with this information. {e}",
 							"messages":     [AIMessage(content="Report generation failed due to token limits")],
 							**cleared_state}
 					# Use a larger multiplier for findings length to allow more content
@@ -522,18 +1000,32 @@ async def final_report_generation(state: AgentState, config: RunnableConfig):
 
 # Main Deep Researcher Graph Construction
 # Creates the complete deep research workflow from user input to final report
-deep_researcher_builder = StateGraph(state_schema=AgentState, input_schema=AgentInputState, context_schema=Configuration)
+@functools.cache
+def get_deep_researcher():
+	"""Build and compile the complete Deep Research graph on first use."""
+	deep_researcher_builder = StateGraph(state_schema=AgentState, input_schema=AgentInputState, context_schema=Configuration)
+	
+	# Add main workflow nodes for the complete research process
+	deep_researcher_builder.add_node("clarify_with_user", clarify_with_user)  # User clarification phase
+	deep_researcher_builder.add_node("write_research_brief", write_research_brief)  # Research planning phase
+	deep_researcher_builder.add_node("research_supervisor", research_supervisor)  # Research execution phase
+	deep_researcher_builder.add_node("final_report_generation", final_report_generation)  # Report generation phase
+	
+	# Define main workflow edges for sequential execution
+	deep_researcher_builder.add_edge(START, "clarify_with_user")  # Entry point
+	deep_researcher_builder.add_edge("research_supervisor", "final_report_generation")  # Research to report
+	deep_researcher_builder.add_edge("final_report_generation", END)  # Final exit point
+	
+	# Compile the complete deep researcher workflow
+	return deep_researcher_builder.compile()
+
 
-# Add main workflow nodes for the complete research process
-deep_researcher_builder.add_node("clarify_with_user", clarify_with_user)  # User clarification phase
-deep_researcher_builder.add_node("write_research_brief", write_research_brief)  # Research planning phase
-deep_researcher_builder.add_node("research_supervisor", supervisor_subgraph)  # Research execution phase
-deep_researcher_builder.add_node("final_report_generation", final_report_generation)  # Report generation phase
+# Compiled graphs exposed as module attributes, built on first access
+LAZY_GRAPHS = {"supervisor_subgraph": get_supervisor_subgraph, "researcher_subgraph": get_researcher_subgraph,
+               "deep_researcher":     get_deep_researcher}
 
-# Define main workflow edges for sequential execution
-deep_researcher_builder.add_edge(START, "clarify_with_user")  # Entry point
-deep_researcher_builder.add_edge("research_supervisor", "final_report_generation")  # Research to report
-deep_researcher_builder.add_edge("final_report_generation", END)  # Final exit point
 
-# Compile the complete deep researcher workflow
-deep_researcher = deep_researcher_builder.compile()
\ No newline at end of file
+def __getattr__(name: str):
+	if name in LAZY_GRAPHS:
+		return LAZY_GRAPHS[name]()
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,130 @@
+"""Provider failover and hedged requests for the Deep Research agent's model calls."""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from langchain_core.runnables import Runnable
+
+from ODR_Agent.configuration import Configuration
+
+# Number of recorded latencies needed before the hedge delay follows the observed percentile
+MIN_LATENCY_SAMPLES = 20
+
+
+##########################
+# Latency Tracking
+##########################
+
+class LatencyTracker:
+	"""Rolling window of recent call latencies for one stage and model."""
+	
+	def __init__(self, max_samples: int = 200):
+		self.samples = deque(maxlen=max_samples)
+	
+	def record(self, seconds: float):
+		"""Record the latency of a completed call."""
+		self.samples.append(seconds)
+	
+	def percentile(self, percentile: float) -> Optional[float]:
+		"""Get the latency at a percentile of the recorded window, or None if too few calls were recorded."""
+		if len(self.samples) < MIN_LATENCY_SAMPLES:
+			return None
+		ordered = sorted(self.samples)
+		index = min(math.ceil(percentile / 100 * len(ordered)) - 1, len(ordered) - 1)
+		return ordered[max(index, 0)]
+
+
+# Latency trackers shared across runs, keyed by stage and model
+latency_trackers: dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(key: str) -> LatencyTracker:
+	"""Get the shared latency tracker for a stage and model, created on first use."""
+	if key not in latency_trackers:
+		latency_trackers[key] = LatencyTracker()
+	return latency_trackers[key]
+
+
+##########################
+# Failover Utils
+##########################
+
+def build_stage_models(build_model: Callable[[str], Runnable], model_name: str,
+                       fallback_models: list[str]) -> tuple[Runnable, Runnable]:
+	"""Build a stage's model chain with ordered fallbacks, plus a backup chain for hedged requests.
+
+	Args:
+		build_model: Function building the fully configured runnable (tools, structured output, retries) for a model
+		model_name: The stage's primary model
+		fallback_models: Models to try in order when the primary model fails
+
+	Returns:
+		Tuple of (chain starting with the primary model, chain starting with the first fallback). Without
+		fallbacks both chains are the primary model alone, so a hedge repeats the request to the same model.
+	"""
+	fallback_models = [model for model in fallback_models if model != model_name]
+	primary = build_model(model_name)
+	if not fallback_models:
+		return primary, primary
+	
+	fallbacks = [build_model(model) for model in fallback_models]
+	return primary.with_fallbacks(fallbacks), fallbacks[0].with_fallbacks(fallbacks[1:] + [primary])
+
+
+##########################
+# Hedged Requests
+##########################
+
+class HedgedModel:
+	"""Model wrapper that sends a backup request when the primary one runs past the usual latency.
+
+	The backup is fired once the primary call has taken longer than the configured percentile of recent
+	latencies for the stage, and whichever call succeeds first is returned. The slower call is cancelled.
+	"""
+	
+	def __init__(self, model: Runnable, backup_model: Runnable, latency_key: str, configurable: Configuration):
+		self.model = model
+		self.backup_model = backup_model
+		self.tracker = get_latency_tracker(latency_key)
+		self.configurable = configurable
+	
+	def get_hedge_delay(self) -> float:
+		"""Get the seconds to wait for the primary call before sending the backup request."""
+		observed = self.tracker.percentile(self.configurable.hedge_latency_percentile)
+		return observed if observed is not None else self.configurable.hedge_delay_seconds
+	
+	async def ainvoke(self, input: Any, config: Optional[dict] = None, **kwargs) -> Any:
+		"""Invoke the model, hedging with the backup model when enabled."""
+		start = time.monotonic()
+		if not self.configurable.hedged_requests:
+			result = await self.model.ainvoke(input, config, **kwargs)
+			self.tracker.record(time.monotonic() - start)
+			return result
+		
+		# Start time of each call, so a winning backup records its own latency rather than the hedge delay too
+		tasks = [asyncio.ensure_future(self.model.ainvoke(input, config, **kwargs))]
+		started_at = {tasks[0]: start}
+		try:
+			# Give the primary call its usual time before racing a backup against it
+			done, _ = await asyncio.wait(tasks, timeout=self.get_hedge_delay())
+			if not done:
+				tasks.append(asyncio.ensure_future(self.backup_model.ainvoke(input, config, **kwargs)))
+				started_at[tasks[-1]] = time.monotonic()
+			
+			# Return the first successful result, raising only if every call failed
+			pending, error = set(tasks), None
+			while pending:
+				done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					if task.exception() is None:
+						self.tracker.record(time.monotonic() - started_at[task])
+						return task.result()
+					error = task.exception()
+			raise error
+		finally:
+			for task in tasks:
+				if not task.done():
+					task.cancel()
@@ -0,0 +1,137 @@
+"""Result cache for idempotent MCP tools, shared across researchers and runs."""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain_core.tools import StructuredTool
+
+from ODR_Agent.configuration import MCPConfig, MCPToolCachePolicy
+
+# Maximum number of tool results kept in the cache, least recently used evicted first
+MCP_RESULT_CACHE_SIZE = 1024
+
+# Tool name whose cache policy applies to tools without a policy of their own
+DEFAULT_POLICY_NAME = "*"
+
+
+##########################
+# Cache Keys
+##########################
+
+def get_cache_policy(mcp_config: MCPConfig, tool_name: str) -> Optional[MCPToolCachePolicy]:
+	"""Get the cache policy of a tool, falling back to the default policy, or None if the tool is not cacheable."""
+	policies = mcp_config.cache_policies or {}
+	policy = policies.get(tool_name, policies.get(DEFAULT_POLICY_NAME))
+	return policy if policy and policy.cacheable and policy.ttl_seconds > 0 else None
+
+
+def get_tool_call_key(scope: str, tool_name: str, args: dict) -> str:
+	"""Build the cache key of a tool call from its scope, tool name and canonicalized arguments.
+
+	Arguments are serialized with sorted keys and without whitespace, so calls that differ only in
+	argument order or formatting share a key.
+	"""
+	canonical_args = json.dumps(args, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+	return hashlib.sha256(f"{scope}\n{tool_name}\n{canonical_args}".encode("utf-8")).hexdigest()
+
+
+##########################
+# MCP Result Cache
+##########################
+
+class MCPResultCache:
+	"""In-memory cache of MCP tool results with in-flight coalescing and per-tool hit/miss counters."""
+	
+	def __init__(self, max_entries: int = MCP_RESULT_CACHE_SIZE):
+		self.max_entries = max_entries
+		self.entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+		self.in_flight: dict[str, asyncio.Future] = {}
+		self.metrics: dict[str, dict[str, int]] = {}
+	
+	def count(self, tool_name: str, outcome: str):
+		"""Count a hit, miss or coalesced call of a tool."""
+		counters = self.metrics.setdefault(tool_name, {"hits": 0, "misses": 0, "coalesced": 0})
+		counters[outcome] += 1
+	
+	async def call(self, key: str, tool_name: str, ttl_seconds: float, live_call: Callable[[], Awaitable[Any]]) -> Any:
+		"""Return the cached result of a tool call, or make the call once for all concurrent identical callers.
+
+		Args:
+			key: Cache key of the call
+			tool_name: Name of the tool, used for the metrics
+			ttl_seconds: How long the result stays fresh
+			live_call: Function making the actual tool call
+
+		Returns:
+			The tool result
+		"""
+		entry = self.entries.get(key)
+		if entry and entry[1] > time.monotonic():
+			self.entries.move_to_end(key)
+			self.count(tool_name, "hits")
+			return entry[0]
+		
+		in_flight = self.in_flight.get(key)
+		if in_flight:
+			self.count(tool_name, "coalesced")
+			await asyncio.wait([in_flight])
+			if not in_flight.cancelled():
+				return in_flight.result()
+			# The call being shared was cancelled with its caller, so make it again
+		
+		self.count(tool_name, "misses")
+		future = asyncio.get_running_loop().create_future()
+		# Followers see the error themselves; retrieve it here so an unshared failure is not reported as unhandled
+		future.add_done_callback(lambda done: done.cancelled() or done.exception())
+		self.in_flight[key] = future
+		try:
+			result = await live_call()
+		except Exception as e:
+			future.set_exception(e)
+			raise
+		except BaseException:
+			future.cancel()
+			raise
+		finally:
+			self.in_flight.pop(key, None)
+		
+		self.entries[key] = (result, time.monotonic() + ttl_seconds)
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.max_entries:
+			self.entries.popitem(last=False)
+		future.set_result(result)
+		return result
+
+
+# Result cache shared by every run in the process
+mcp_result_cache = MCPResultCache()
+
+
+def get_mcp_cache_metrics() -> dict[str, dict[str, int]]:
+	"""Get the hit, miss and coalesced call counts of each cached MCP tool."""
+	return {tool_name: dict(counters) for tool_name, counters in mcp_result_cache.metrics.items()}
+
+
+def wrap_mcp_cache_tool(tool: StructuredTool, policy: MCPToolCachePolicy, scope: str) -> StructuredTool:
+	"""Serve a tool's calls from the result cache under its cache policy.
+
+	Args:
+		tool: The MCP structured tool to wrap
+		policy: The tool's cache policy
+		scope: Scope separating results of different servers and users
+
+	Returns:
+		The tool with cached calls
+	"""
+	original_coroutine = tool.coroutine
+	
+	async def cached_coroutine(**kwargs):
+		key = get_tool_call_key(scope, tool.name, kwargs)
+		return await mcp_result_cache.call(key, tool.name, policy.ttl_seconds, lambda: original_coroutine(**kwargs))
+	
+	tool.coroutine = cached_coroutine
+	return tool
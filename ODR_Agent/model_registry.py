@@ -0,0 +1,307 @@
+"""Model capability registry and per-stage model routing for the Deep Research agent."""
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ModelSpec(BaseModel):
+	"""Capabilities, pricing and default rate limits of a chat model."""
+	
+	provider: str
+	"""The init_chat_model provider used to load the model"""
+	context_window: int
+	"""Maximum input context in tokens"""
+	max_output_tokens: Optional[int] = None
+	"""Maximum output tokens per call, if known"""
+	input_cost_per_million: Optional[float] = None
+	"""USD per million input tokens, if known"""
+	output_cost_per_million: Optional[float] = None
+	"""USD per million output tokens, if known"""
+	requests_per_minute: Optional[int] = None
+	"""Default-tier request rate limit, if known"""
+	tokens_per_minute: Optional[int] = None
+	"""Default-tier input token rate limit, if known"""
+	time_to_first_token: Optional[float] = None
+	"""Typical seconds before the first output token, if known"""
+	output_tokens_per_second: Optional[float] = None
+	"""Typical output speed, if known"""
+	match_prefix: bool = True
+	"""Whether models whose names start with this name (e.g. dated snapshots) also use this entry"""
+
+
+##########################
+# Model Registry
+##########################
+
+# Registered models keyed by model name without the provider prefix. Names are matched exactly first,
+# then by the longest registered name the model name starts with (e.g. dated snapshots of a model).
+# Entries with match_prefix=False, such as a bare family name that newer models extend, only match exactly.
+MODEL_REGISTRY: dict[str, ModelSpec] = {
+	"claude-opus-4":                               ModelSpec(provider="anthropic", context_window=200000,
+	                                                         max_output_tokens=32000, input_cost_per_million=15.0,
+	                                                         output_cost_per_million=75.0, requests_per_minute=50,
+	                                                         tokens_per_minute=30000, time_to_first_token=2.0,
+	                                                         output_tokens_per_second=40),
+	"claude-sonnet-4":                             ModelSpec(provider="anthropic", context_window=200000,
+	                                                         max_output_tokens=64000, input_cost_per_million=3.0,
+	                                                         output_cost_per_million=15.0, requests_per_minute=50,
+	                                                         tokens_per_minute=30000, time_to_first_token=1.3,
+	                                                         output_tokens_per_second=55),
+	"claude-3-7-sonnet":                           ModelSpec(provider="anthropic", context_window=200000,
+	                                                         max_output_tokens=64000, input_cost_per_million=3.0,
+	                                                         output_cost_per_million=15.0, requests_per_minute=50,
+	                                                         tokens_per_minute=20000, time_to_first_token=1.2,
+	                                                         output_tokens_per_second=55),
+	"claude-3-5-sonnet":                           ModelSpec(provider="anthropic", context_window=200000,
+	                                                         max_output_tokens=8192, input_cost_per_million=3.0,
+	                                                         output_cost_per_million=15.0, requests_per_minute=50,
+	                                                         tokens_per_minute=40000, time_to_first_token=1.0,
+	                                                         output_tokens_per_second=55),
+	"claude-3-5-haiku":                            ModelSpec(provider="anthropic", context_window=200000,
+	                                                         max_output_tokens=8192, input_cost_per_million=0.8,
+	                                                         output_cost_per_million=4.0, requests_per_minute=50,
+	                                                         tokens_per_minute=50000, time_to_first_token=0.7,
+	                                                         output_tokens_per_second=65),
+	"gemini-2.5-pro":                              ModelSpec(provider="google_genai", context_window=1048576,
+	                                                         max_output_tokens=65536, input_cost_per_million=1.25,
+	                                                         output_cost_per_million=10.0, requests_per_minute=150,
+	                                                         tokens_per_minute=2000000, time_to_first_token=2.0,
+	                                                         output_tokens_per_second=90),
+	"gemini-2.5-flash-lite":                       ModelSpec(provider="google_genai", context_window=1048576,
+	                                                         max_output_tokens=65536, input_cost_per_million=0.1,
+	                                                         output_cost_per_million=0.4, requests_per_minute=4000,
+	                                                         tokens_per_minute=4000000, time_to_first_token=0.4,
+	                                                         output_tokens_per_second=250),
+	"gemini-2.5-flash":                            ModelSpec(provider="google_genai", context_window=1048576,
+	                                                         max_output_tokens=65536, input_cost_per_million=0.3,
+	                                                         output_cost_per_million=2.5, requests_per_minute=1000,
+	                                                         tokens_per_minute=1000000, time_to_first_token=0.6,
+	                                                         output_tokens_per_second=200),
+	"gemini-2.0-flash-lite":                       ModelSpec(provider="google_genai", context_window=1048576,
+	                                                         max_output_tokens=8192, input_cost_per_million=0.075,
+	                                                         output_cost_per_million=0.3, requests_per_minute=4000,
+	                                                         tokens_per_minute=4000000, time_to_first_token=0.3,
+	                                                         output_tokens_per_second=220),
+	"gemini-2.0-flash":                            ModelSpec(provider="google_genai", context_window=1048576,
+	                                                         max_output_tokens=8192, input_cost_per_million=0.1,
+	                                                         output_cost_per_million=0.4, requests_per_minute=2000,
+	                                                         tokens_per_minute=4000000, time_to_first_token=0.4,
+	                                                         output_tokens_per_second=200),
+	"gemini-1.5-pro":                              ModelSpec(provider="google_genai", context_window=2097152,
+	                                                         max_output_tokens=8192, input_cost_per_million=1.25,
+	                                                         output_cost_per_million=5.0, time_to_first_token=1.0,
+	                                                         output_tokens_per_second=60),
+	"gemini-1.5-flash":                            ModelSpec(provider="google_genai", context_window=1048576,
+	                                                         max_output_tokens=8192, input_cost_per_million=0.075,
+	                                                         output_cost_per_million=0.3, time_to_first_token=0.4,
+	                                                         output_tokens_per_second=180),
+	"gemini-pro":                                  ModelSpec(provider="google_genai", context_window=32768,
+	                                                         max_output_tokens=2048),
+	"command-r-plus":                              ModelSpec(provider="cohere", context_window=128000,
+	                                                         max_output_tokens=4000),
+	"command-r":                                   ModelSpec(provider="cohere", context_window=128000,
+	                                                         max_output_tokens=4000),
+	"command-a":                                   ModelSpec(provider="cohere", context_window=256000,
+	                                                         max_output_tokens=8000),
+	"command-light":                               ModelSpec(provider="cohere", context_window=4096),
+	"command":                                     ModelSpec(provider="cohere", context_window=4096,
+	                                                         match_prefix=False),
+	"mistral-large":                               ModelSpec(provider="mistralai", context_window=32768),
+	"mistral-medium":                              ModelSpec(provider="mistralai", context_window=32768),
+	"mistral-small":                               ModelSpec(provider="mistralai", context_window=32768),
+	"mistral-7b-instruct":                         ModelSpec(provider="mistralai", context_window=32768),
+	"codellama":                                   ModelSpec(provider="ollama", context_window=16384),
+	"llama2":                                      ModelSpec(provider="ollama", context_window=4096),
+	"mistral":                                     ModelSpec(provider="ollama", context_window=32768),
+	"us.amazon.nova-premier-v1:0":                 ModelSpec(provider="bedrock", context_window=1000000),
+	"us.amazon.nova-pro-v1:0":                     ModelSpec(provider="bedrock", context_window=300000),
+	"us.amazon.nova-lite-v1:0":                    ModelSpec(provider="bedrock", context_window=300000),
+	"us.amazon.nova-micro-v1:0":                   ModelSpec(provider="bedrock", context_window=128000),
+	"us.anthropic.claude-3-7-sonnet-20250219-v1:0": ModelSpec(provider="bedrock", context_window=200000),
+	"us.anthropic.claude-sonnet-4-20250514-v1:0":  ModelSpec(provider="bedrock", context_window=200000),
+	"us.anthropic.claude-opus-4-20250514-v1:0":    ModelSpec(provider="bedrock", context_window=200000),
+	"anthropic.claude-opus-4-1-20250805-v1:0":     ModelSpec(provider="bedrock", context_window=200000), }
+
+# Provider prefixes accepted in model strings, mapped to their init_chat_model provider
+PROVIDER_ALIASES = {"anthropic": "anthropic", "google": "google_genai", "google_genai": "google_genai",
+                    "gemini": "google_genai", "google_vertexai": "google_vertexai", "openai": "openai",
+                    "cohere": "cohere", "mistral": "mistralai", "mistralai": "mistralai", "ollama": "ollama",
+                    "bedrock": "bedrock", "bedrock_converse": "bedrock_converse"}
+
+# Provider used when neither the model string nor the registry identifies one
+DEFAULT_MODEL_PROVIDER = "google_genai"
+
+
+def split_model_string(model_string: str) -> tuple[Optional[str], str]:
+	"""Split a model string like "anthropic:claude-sonnet-4" into its provider and model name.
+
+	Args:
+		model_string: Model identifier, with or without a provider prefix
+
+	Returns:
+		Tuple of (init_chat_model provider or None if there is no known prefix, model name)
+	"""
+	prefix, separator, name = model_string.partition(":")
+	if separator and prefix.lower() in PROVIDER_ALIASES:
+		return PROVIDER_ALIASES[prefix.lower()], name
+	return None, model_string
+
+
+def get_model_spec(model_string: str) -> Optional[ModelSpec]:
+	"""Look up a model's registry entry by exact name, then by the longest matching name prefix.
+
+	Args:
+		model_string: Model identifier, with or without a provider prefix
+
+	Returns:
+		The model's spec, or None if it is not registered
+	"""
+	_, name = split_model_string(model_string)
+	name = name.lower()
+	if name in MODEL_REGISTRY:
+		return MODEL_REGISTRY[name]
+	
+	matches = [registered for registered, spec in MODEL_REGISTRY.items() if
+	           spec.match_prefix and name.startswith(registered)]
+	return MODEL_REGISTRY[max(matches, key=len)] if matches else None
+
+
+def register_model(name: str, spec: ModelSpec):
+	"""Add or replace a registry entry, e.g. to record a new model or an account's own rate limits."""
+	MODEL_REGISTRY[name.lower()] = spec
+
+
+def get_model_provider(model_string: str) -> str:
+	"""Get the init_chat_model provider for a model from its prefix, its registry entry or its name.
+
+	Args:
+		model_string: Model identifier, with or without a provider prefix
+
+	Returns:
+		The provider name to pass to init_chat_model
+	"""
+	provider, name = split_model_string(model_string)
+	if provider:
+		return provider
+	
+	spec = get_model_spec(name)
+	if spec:
+		return spec.provider
+	
+	name = name.lower()
+	if name.startswith("claude"):
+		return "anthropic"
+	elif name.startswith(("gpt", "o1", "o3", "o4")):
+		return "openai"
+	elif name.startswith("command"):
+		return "cohere"
+	elif name.startswith(("mistral", "codestral")):
+		return "mistralai"
+	return DEFAULT_MODEL_PROVIDER
+
+
+def get_model_name(model_string: str) -> str:
+	"""Get the model name without its provider prefix, as init_chat_model expects with an explicit provider."""
+	return split_model_string(model_string)[1]
+
+
+##########################
+# Model Estimation Utils
+##########################
+
+def estimate_tokens(text_length: int) -> int:
+	"""Estimate the token count of text from its character length, assuming ~4 characters per token."""
+	return text_length // 4
+
+
+def get_output_token_limit(spec: Optional[ModelSpec], max_tokens: int) -> int:
+	"""Cap a requested output token limit at the model's own output limit, if known."""
+	if spec is None or spec.max_output_tokens is None:
+		return max_tokens
+	return min(max_tokens, spec.max_output_tokens)
+
+
+def estimate_cost(spec: ModelSpec, input_tokens: int, output_tokens: int) -> Optional[float]:
+	"""Estimate the USD cost of a call, or None if the model's pricing is unknown."""
+	if spec.input_cost_per_million is None or spec.output_cost_per_million is None:
+		return None
+	return (input_tokens * spec.input_cost_per_million + output_tokens * spec.output_cost_per_million) / 1000000
+
+
+def estimate_latency(spec: ModelSpec, output_tokens: int) -> Optional[float]:
+	"""Estimate the seconds a call takes to finish generating, or None if the model's speed is unknown."""
+	if spec.time_to_first_token is None or not spec.output_tokens_per_second:
+		return None
+	return spec.time_to_first_token + output_tokens / spec.output_tokens_per_second
+
+
+##########################
+# Model Routing
+##########################
+
+# Configuration fields holding the default model and output token limit of each routable stage
+STAGE_MODEL_FIELDS = {"summarization": ("summarization_model", "summarization_model_max_tokens"),
+                      "compression":   ("compression_model", "compression_model_max_tokens"),
+                      "supervisor":    ("research_model", "research_model_max_tokens"),
+                      "report":        ("final_report_model", "final_report_model_max_tokens")}
+
+
+def is_sufficient(spec: ModelSpec, input_tokens: int, output_tokens: int, latency_target: float) -> bool:
+	"""Check whether a model can take the input, produce the output and meet the latency target.
+
+	Args:
+		spec: The model's registry entry
+		input_tokens: Estimated input tokens of the call
+		output_tokens: Output tokens the stage may generate, capped at the model's output limit
+		latency_target: Seconds the call should finish within, or 0 for no target
+
+	Returns:
+		True if the model is sufficient for the call
+	"""
+	output_tokens = get_output_token_limit(spec, output_tokens)
+	if input_tokens + output_tokens > spec.context_window:
+		return False
+	if spec.tokens_per_minute is not None and input_tokens > spec.tokens_per_minute:
+		return False
+	if latency_target:
+		latency = estimate_latency(spec, output_tokens)
+		if latency is None or latency > latency_target:
+			return False
+	return True
+
+
+def route_model(stage: str, configurable, input_length: int) -> str:
+	"""Pick the cheapest sufficient model for a stage from its configured model and the routing candidates.
+
+	Candidates without known pricing are only chosen when nothing cheaper is known to be sufficient.
+	When no candidate is sufficient the stage's configured model is kept, so routing never picks a model
+	that is known to be unable to handle the input.
+
+	Args:
+		stage: One of "summarization", "compression", "supervisor" or "report"
+		configurable: Configuration with stage models and routing settings
+		input_length: Character length of the stage's input
+
+	Returns:
+		The model string to use for the stage
+	"""
+	model_field, max_tokens_field = STAGE_MODEL_FIELDS[stage]
+	default_model = getattr(configurable, model_field)
+	if not configurable.model_routing:
+		return default_model
+	
+	input_tokens = estimate_tokens(input_length)
+	output_tokens = getattr(configurable, max_tokens_field)
+	best_model, best_cost = None, None
+	for candidate in [default_model] + [model for model in configurable.model_routing_candidates if
+	                                    model != default_model]:
+		spec = get_model_spec(candidate)
+		if spec is None or not is_sufficient(spec, input_tokens, output_tokens,
+		                                     configurable.model_latency_target_seconds):
+			continue
+		cost = estimate_cost(spec, input_tokens, output_tokens)
+		if best_model is None or (cost is not None and (best_cost is None or cost < best_cost)):
+			best_model, best_cost = candidate, cost
+	
+	return best_model or default_model
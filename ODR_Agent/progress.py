@@ -0,0 +1,212 @@
+"""Progress reporting for runs of the Deep Research agent graph."""
+
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+# Human-readable stage of each graph node
+NODE_STAGES = {"clarify_with_user":       "Clarifying the request",
+               "write_research_brief":    "Writing the research brief",
+               "supervisor":              "Planning research",
+               "supervisor_tools":        "Running research units",
+               "researcher":              "Researching",
+               "researcher_tools":        "Searching",
+               "compress_research":       "Compressing findings",
+               "final_report_generation": "Writing the final report"}
+
+# Nodes that report their own updates through the custom stream, since the updates streamed from a nested
+# researcher subgraph only carry its output channels
+SELF_REPORTED_NODES = ("researcher", "researcher_tools")
+
+
+def truncate(text: str, max_length: int = 300) -> str:
+	"""Shorten text for display in a progress event."""
+	text = " ".join(str(text).split())
+	return text if len(text) <= max_length else text[:max_length - 3] + "..."
+
+
+def get_update_messages(update: dict) -> list:
+	"""Collect the messages a node update appends to any of the graph's message channels."""
+	messages = []
+	for key in ("messages", "supervisor_messages", "researcher_messages"):
+		value = update.get(key)
+		if isinstance(value, list):
+			messages.extend(value)
+	return messages
+
+
+def describe_update(node: str, update: Any) -> Optional[str]:
+	"""Summarize what a node update did, e.g. the topics delegated or the queries searched.
+
+	Args:
+		node: Name of the graph node that produced the update
+		update: The node's state update
+
+	Returns:
+		A short description, or None if the update has nothing worth reporting
+	"""
+	if not isinstance(update, dict):
+		return None
+	messages = get_update_messages(update)
+	tool_calls = [tool_call for message in messages if isinstance(message, AIMessage) for tool_call in
+	              message.tool_calls]
+	
+	if node == "write_research_brief" and update.get("research_brief"):
+		return truncate(update["research_brief"])
+	if node == "clarify_with_user" and messages:
+		return truncate(messages[-1].content)
+	if node == "supervisor":
+		topics = [tool_call["args"].get("research_topic", "") for tool_call in tool_calls if
+		          tool_call["name"] == "ConductResearch"]
+		if topics:
+			return "Delegating: " + "; ".join(truncate(topic, 120) for topic in topics)
+		if any(tool_call["name"] == "ResearchComplete" for tool_call in tool_calls):
+			return "Research complete"
+	if node == "supervisor_tools":
+		results = [message for message in messages if isinstance(message, ToolMessage) and message.name ==
+		           "ConductResearch" and not message.additional_kwargs.get("research_pending")]
+		if results:
+			return f"{len(results)} research unit(s) reported back"
+	if node == "researcher":
+		queries = [query for tool_call in tool_calls for query in tool_call["args"].get("queries", [])]
+		if queries:
+			return "Searching: " + "; ".join(truncate(query, 120) for query in queries)
+	if node == "researcher_tools" and update.get("novelty_stop"):
+		return (f"Stopped early after searches found nothing new, saving up to "
+		        f"{update['novelty_stop']['saved_iterations']} iteration(s) and about "
+		        f"{update['novelty_stop']['saved_searches']} search(es)")
+	if node == "researcher_tools" and messages:
+		return f"{len(messages)} tool result(s)"
+	if node == "compress_research" and update.get("compressed_research"):
+		return f"Compressed findings to {len(update['compressed_research'])} characters"
+	if node == "final_report_generation" and update.get("final_report"):
+		return f"Report ready ({len(update['final_report'])} characters)"
+	return None
+
+
+def count_update(node: str, update: Any) -> dict[str, int]:
+	"""Count the work a node update represents, such as research units dispatched or sources searched.
+
+	Args:
+		node: Name of the graph node that produced the update
+		update: The node's state update
+
+	Returns:
+		Dictionary of counter increments, empty if the update did no countable work
+	"""
+	if not isinstance(update, dict):
+		return {}
+	messages = get_update_messages(update)
+	tool_calls = [tool_call for message in messages if isinstance(message, AIMessage) for tool_call in
+	              message.tool_calls]
+	if node == "supervisor":
+		return {"research_units": sum(1 for tool_call in tool_calls if tool_call["name"] == "ConductResearch")}
+	if node == "researcher":
+		return {"researcher_iterations": 1,
+		        "searches":              sum(len(tool_call["args"].get("queries", [])) for tool_call in tool_calls)}
+	if node == "researcher_tools":
+		# Search results that were summarized carry a SUMMARY label, the others only their search snippet
+		novelty_stop = update.get("novelty_stop", {})
+		return {"sources_summarized": sum(str(message.content).count("\nSUMMARY:\n") for message in messages if
+		                                  isinstance(message, ToolMessage)),
+		        "iterations_saved":   novelty_stop.get("saved_iterations", 0),
+		        "searches_saved":     novelty_stop.get("saved_searches", 0)}
+	if node == "compress_research" and update.get("compressed_research"):
+		return {"research_units_compressed": 1}
+	return {}
+
+
+def progress_event(namespace: tuple, node: str, update: Any) -> Optional[dict]:
+	"""Build a progress event for a node update streamed from the graph.
+
+	Args:
+		namespace: Subgraph namespace the update came from, empty for the top-level graph
+		node: Name of the graph node that produced the update
+		update: The node's state update
+
+	Returns:
+		Event with the node, its stage, the subgraph depth, a description and counter increments, or None
+		for internal nodes
+	"""
+	if node not in NODE_STAGES:
+		return None
+	return {"node":   node, "stage": NODE_STAGES[node], "depth": len(namespace),
+	        "detail": describe_update(node, update), "counts": count_update(node, update)}
+
+
+def report_update(node: str, update: dict):
+	"""Send a node's state update to the progress stream from inside the node."""
+	get_stream_writer()({"progress_node": node, "update": update})
+
+
+async def stream_progress(graph, graph_input: dict, config: RunnableConfig) -> AsyncIterator[tuple[str, Any]]:
+	"""Run the graph, yielding progress events as nodes finish and the final state at the end.
+
+	Args:
+		graph: The compiled Deep Research graph
+		graph_input: Input state for the run
+		config: Runtime configuration for the run
+
+	Yields:
+		("progress", event) for each reported node update, then ("result", final state)
+	"""
+	final_state = {}
+	async for namespace, mode, chunk in graph.astream(graph_input, config, stream_mode=["updates", "values", "custom"],
+	                                                  subgraphs=True):
+		if mode == "values":
+			if not namespace:
+				final_state = chunk
+			continue
+		if mode == "custom":
+			if isinstance(chunk, dict) and "progress_node" in chunk:
+				event = progress_event(namespace, chunk["progress_node"], chunk["update"])
+				if event:
+					yield "progress", event
+			continue
+		for node, update in chunk.items():
+			if node in SELF_REPORTED_NODES:
+				continue
+			event = progress_event(namespace, node, update)
+			if event:
+				yield "progress", event
+	yield "result", final_state
+
+
+class ProgressSummary:
+	"""Running summary of a run's progress events, cheap to update and render however many events arrive."""
+	
+	def __init__(self, max_recent: int = 8):
+		self.stage = "Starting"
+		self.research_brief = None
+		self.counts: dict[str, int] = {}
+		self.recent: deque[str] = deque(maxlen=max_recent)
+	
+	def add(self, event: dict):
+		"""Fold a progress event into the summary."""
+		self.stage = event["stage"]
+		for name, increment in event.get("counts", {}).items():
+			self.counts[name] = self.counts.get(name, 0) + increment
+		if event["node"] == "write_research_brief" and event.get("detail"):
+			self.research_brief = event["detail"]
+		elif event.get("detail"):
+			self.recent.append(f"{event['stage']}: {event['detail']}")
+	
+	def to_markdown(self) -> str:
+		"""Render the summary as Markdown for display."""
+		sections = [f"**{self.stage}...**"]
+		if self.research_brief:
+			sections.append(f"**Research brief:** {self.research_brief}")
+		sections.append(f"Research units: {self.counts.get('research_units', 0)} dispatched, "
+		                f"{self.counts.get('research_units_compressed', 0)} compressed | "
+		                f"Researcher iterations: {self.counts.get('researcher_iterations', 0)} | "
+		                f"Searches: {self.counts.get('searches', 0)} | "
+		                f"Sources summarized: {self.counts.get('sources_summarized', 0)}")
+		if self.counts.get("iterations_saved"):
+			sections[-1] += (f" | Saved by stopping early: {self.counts['iterations_saved']} iterations, "
+			                 f"{self.counts.get('searches_saved', 0)} searches")
+		if self.recent:
+			sections.append("\n".join(f"- {line}" for line in self.recent))
+		return "\n\n".join(sections)
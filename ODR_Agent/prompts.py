@@ -431,3 +431,72 @@ while preserving the most critical information from the original webpage.
 
 Today's date is {date}.
 """
+
+summarize_webpages_batch_prompt = """You are tasked with summarizing the raw content of several webpages retrieved
+from a web search. Your goal is to create a separate summary for each webpage that preserves the most important
+information from that page. These summaries will be used by a downstream research agent, so it's crucial to maintain
+the key details without losing essential information.
+
+Here are the webpages, each wrapped in a tag carrying its id:
+
+{webpages}
+
+Please follow these guidelines for every webpage:
+
+1. Identify and preserve the main topic or purpose of the webpage.
+2. Retain key facts, statistics, and data points that are central to the content's message.
+3. Keep important quotes from credible sources or experts.
+4. Maintain the chronological order of events if the content is time-sensitive or historical.
+5. Preserve any lists or step-by-step instructions if present.
+6. Include relevant dates, names, and locations that are crucial to understanding the content.
+7. Summarize lengthy explanations while keeping the core message intact.
+
+Summarize each webpage on its own - never merge information from different webpages into one summary. Each summary
+should be significantly shorter than the original content but comprehensive enough to stand alone as a source of
+information. Aim for about 25-30 percent of the original length, unless the content is already concise.
+
+Return exactly one entry per webpage in the following format:
+
+```
+{{
+   "summaries": [
+      {{
+         "source_id": <the id of the webpage>,
+         "summary": "Your summary here, structured with appropriate paragraphs or bullet points as needed",
+         "key_excerpts": "First important quote or excerpt, Second important quote or excerpt, ...Add more excerpts
+         as needed, up to a maximum of 5"
+      }}
+   ]
+}}
+```
+
+Today's date is {date}.
+"""
+
+supervisor_digest_prompt = """You are maintaining a running digest of research that a research supervisor has already
+delegated and received back. Older research results are being removed from the supervisor's context, so the digest
+is all the supervisor will remember of them. For context, today's date is {date}.
+
+This is the overall research brief the supervisor is working on:
+<Research Brief>
+{research_brief}
+</Research Brief>
+
+This is the digest so far (it may be empty):
+<Current Digest>
+{current_digest}
+</Current Digest>
+
+These are the research steps being removed from the supervisor's context:
+<Removed Research>
+{removed_research}
+</Removed Research>
+
+Rewrite the digest so that it covers both the current digest and the removed research. Guidelines:
+1. List every topic that has already been researched, so the supervisor does not delegate it again.
+2. Keep the key findings, figures, dates and names for each topic, along with the source URLs that support them.
+3. Note open questions or gaps that the research identified as still missing.
+4. Be concise - the digest should be much shorter than the research it covers, but nothing important may be lost.
+
+Respond with the updated digest only.
+"""
@@ -0,0 +1,200 @@
+"""Incremental refresh of past reports that re-researches only the sub-topics whose evidence changed."""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from langchain_core.messages import convert_to_messages
+from langchain_core.runnables import RunnableConfig
+
+from ODR_Agent.configuration import Configuration, SearchAPI
+from ODR_Agent.deep_researcher import collect_research_task, final_report_generation, start_research_unit
+from ODR_Agent.utils import get_config_value, get_prefetch_query, tavily_search_async
+
+
+##########################
+# Evidence Fingerprints
+##########################
+
+def get_content_hash(content: str) -> str:
+	"""Hash a search result snippet, ignoring whitespace differences."""
+	return hashlib.sha256(" ".join(content.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_published_date(value: Optional[str]) -> Optional[float]:
+	"""Parse a search result's published date into a timestamp, or None if it is missing or unreadable."""
+	if not value:
+		return None
+	for date_format in ("%a, %d %b %Y %H:%M:%S %Z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%d"):
+		try:
+			return datetime.strptime(value, date_format).timestamp()
+		except ValueError:
+			continue
+	return None
+
+
+async def fingerprint_topic(research_topic: str, config: RunnableConfig) -> Optional[dict[str, dict]]:
+	"""Take a cheap snapshot of the evidence for a topic with a single search and no summarization.
+
+	Args:
+		research_topic: The topic of a research unit
+		config: Runtime configuration for the search API and its key
+
+	Returns:
+		Dictionary mapping each result URL to its content hash and published date, or None if the
+		configured search API cannot be probed
+	"""
+	configurable = Configuration.from_runnable_config(config)
+	if SearchAPI(get_config_value(configurable.search_api)) != SearchAPI.TAVILY:
+		return None
+	search_results = await tavily_search_async([get_prefetch_query(research_topic)],
+	                                           max_results=configurable.refresh_probe_results,
+	                                           include_raw_content=False, config=config)
+	return {result["url"]: {"content_hash":   get_content_hash(result.get("content", "")),
+	                        "published_date": result.get("published_date")} for response in search_results for
+	        result in response["results"]}
+
+
+def get_evidence_change(previous: Optional[dict], current: Optional[dict], researched_at: float) -> float:
+	"""Measure how much the evidence for a topic changed between two fingerprints.
+
+	Args:
+		previous: Fingerprint recorded when the topic was last researched
+		current: Fingerprint taken now
+		researched_at: When the topic was last researched
+
+	Returns:
+		Share of sources that are new, gone or changed, from 0 (identical) to 1 (entirely different).
+		Sources published after the topic was researched count as a complete change.
+	"""
+	if not previous or not current:
+		return 1.0
+	for source in current.values():
+		published_at = parse_published_date(source.get("published_date"))
+		if published_at and published_at > researched_at:
+			return 1.0
+	
+	all_urls = set(previous) | set(current)
+	unchanged = [url for url in set(previous) & set(current) if previous[url]["content_hash"] ==
+	             current[url]["content_hash"]]
+	return 1 - len(unchanged) / len(all_urls)
+
+
+##########################
+# Recording Research
+##########################
+
+def get_conversation(messages: list[dict]) -> list[dict]:
+	"""Keep a recorded conversation up to the user's last message, dropping the replies and report after it."""
+	last_user_index = max((index for index, message in enumerate(messages) if message["role"] == "human"), default=-1)
+	return messages[:last_user_index + 1]
+
+
+def record_research(result: dict) -> dict:
+	"""Capture what a refresh needs from a finished run: the brief, conversation and sub-topics.
+
+	Sub-topics are recorded without evidence fingerprints; fingerprint_research adds them. The final report is
+	left out of the conversation, so a refreshed report is not anchored to the earlier one.
+
+	Args:
+		result: Final state of a deep_researcher run
+
+	Returns:
+		JSON-serializable record of the run's research
+	"""
+	research_units = [{**unit, "fingerprint": None} for unit in result.get("research_units", [])]
+	messages = [{"role": message.type, "content": message.content} for message in
+	            convert_to_messages(result.get("messages", []))]
+	return {"research_brief": result.get("research_brief", ""), "messages": get_conversation(messages),
+	        "research_units": research_units}
+
+
+async def fingerprint_research(research: dict, config: RunnableConfig) -> dict:
+	"""Fingerprint the evidence of every sub-topic in a research record, with one search per sub-topic.
+
+	Args:
+		research: Record of a run created by record_research
+		config: Runtime configuration of the run
+
+	Returns:
+		The research record with the fingerprint of each sub-topic, or None where probing failed
+	"""
+	research_units = [dict(unit) for unit in research["research_units"]]
+	fingerprints = await asyncio.gather(*[fingerprint_topic(unit["research_topic"], config) for unit in research_units],
+	                                    return_exceptions=True)
+	for unit, fingerprint in zip(research_units, fingerprints):
+		unit["fingerprint"] = None if isinstance(fingerprint, Exception) else fingerprint
+	return {**research, "research_units": research_units}
+
+
+##########################
+# Refreshing Reports
+##########################
+
+async def refresh_report(research: dict, config: RunnableConfig) -> dict:
+	"""Refresh a past report, re-researching only the sub-topics whose evidence changed.
+
+	Each sub-topic is probed with one search. Sub-topics whose evidence changed by more than the
+	configured threshold go back to a researcher; the rest keep their earlier findings. Sub-topics
+	without a recorded fingerprint are researched again. The final report is then written again from
+	the combined findings.
+
+	Args:
+		research: Record of the earlier run created by record_research (or a previous refresh)
+		config: Runtime configuration for the refresh
+
+	Returns:
+		Dictionary with the new final report, the updated research record and the refreshed and reused topics
+	"""
+	# Step 1: Probe every sub-topic for changed evidence
+	configurable = Configuration.from_runnable_config(config)
+	research_units = research["research_units"]
+	fingerprints = await asyncio.gather(*[fingerprint_topic(unit["research_topic"], config) for unit in research_units],
+	                                    return_exceptions=True)
+	fingerprints = [None if isinstance(fingerprint, Exception) else fingerprint for fingerprint in fingerprints]
+	stale = [get_evidence_change(unit.get("fingerprint"), fingerprint, unit["researched_at"]) >
+	         configurable.refresh_change_threshold for unit, fingerprint in zip(research_units, fingerprints)]
+	
+	# Step 2: Re-research the stale sub-topics, bypassing the research cache that would return the old findings
+	research_config = {**config, "configurable": {**config.get("configurable", {}), "research_cache": False}}
+	semaphore = asyncio.Semaphore(configurable.max_concurrent_research_units)
+	
+	async def research_again(unit: dict) -> dict:
+		async with semaphore:
+			task = start_research_unit({"args": {"research_topic": unit["research_topic"]}}, research_config)
+			await asyncio.wait([task])
+			return collect_research_task(task)
+	
+	stale_units = [unit for unit, is_stale in zip(research_units, stale) if is_stale]
+	observations = await asyncio.gather(*[research_again(unit) for unit in stale_units])
+	
+	# Step 3: Keep the earlier findings where research failed or the evidence did not change
+	refreshed_units, refreshed_topics = [], []
+	observations_by_topic = {unit["research_topic"]: observation for unit, observation in
+	                         zip(stale_units, observations)}
+	for unit, fingerprint, is_stale in zip(research_units, fingerprints, stale):
+		observation = observations_by_topic.get(unit["research_topic"]) if is_stale else None
+		if observation and not observation.get("compressed_research", "Error").startswith("Error"):
+			refreshed_units.append({"research_topic": unit["research_topic"], "fingerprint": fingerprint,
+			                        "compressed_research": observation["compressed_research"],
+			                        "researched_at": time.time()})
+			refreshed_topics.append(unit["research_topic"])
+		else:
+			if observation:
+				logging.warning(f"Keeping earlier findings for a sub-topic that failed to refresh: "
+				                f"{observation.get('compressed_research')}")
+			refreshed_units.append(unit)
+	
+	# Step 4: Write the report again from the combined findings, without the earlier report in records that kept it
+	report_state = {"research_brief": research["research_brief"],
+	                "messages":       convert_to_messages(get_conversation(research["messages"])),
+	                "notes":          [unit["compressed_research"] for unit in refreshed_units]}
+	report = await final_report_generation(report_state, config)
+	return {"final_report":     report["final_report"],
+	        "research":         {**research, "research_units": refreshed_units},
+	        "refreshed_topics": refreshed_topics,
+	        "reused_topics":    [unit["research_topic"] for unit in research_units if
+	                             unit["research_topic"] not in refreshed_topics]}
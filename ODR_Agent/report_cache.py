@@ -0,0 +1,178 @@
+"""Report-level cache letting repeated research briefs reuse a recent final report."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from ODR_Agent.configuration import Configuration
+from ODR_Agent.text_scoring import WORD_PATTERN
+
+# Settings that change what a run would produce, so they are part of the cache key
+REPORT_CACHE_SETTINGS = ("search_api", "research_model", "summarization_model", "compression_model",
+                         "final_report_model", "max_researcher_iterations", "max_react_tool_calls",
+                         "max_concurrent_research_units", "mcp_config", "mcp_prompt")
+
+
+##########################
+# Cache Key Utils
+##########################
+
+def normalize_brief(research_brief: str) -> str:
+	"""Normalize a research brief so trivially reworded briefs compare equal.
+
+	Only case, punctuation and whitespace are dropped; every word is kept, since dropping words such as
+	"not" can turn a brief into a different question.
+	"""
+	return " ".join(WORD_PATTERN.findall(research_brief.lower()))
+
+
+def get_report_cache_key(research_brief: str, configurable: Configuration) -> str:
+	"""Build the cache key for a research brief under the run's model and search settings."""
+	settings = configurable.model_dump(mode="json", include=set(REPORT_CACHE_SETTINGS))
+	payload = json.dumps({"brief": normalize_brief(research_brief), "settings": settings}, sort_keys=True)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+##########################
+# Report Cache
+##########################
+
+class ReportCache:
+	"""SQLite store of final reports and notes keyed by normalized research brief and settings."""
+	
+	def __init__(self, path: str):
+		self.path = path
+		if os.path.dirname(path):
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(path, check_same_thread=False)
+		self.connection.execute("CREATE TABLE IF NOT EXISTS reports (key TEXT PRIMARY KEY, research_brief TEXT NOT "
+		                        "NULL, final_report TEXT NOT NULL, notes TEXT NOT NULL, created_at REAL NOT NULL)")
+		self.connection.commit()
+	
+	def get(self, key: str, max_age_seconds: float) -> Optional[dict]:
+		"""Get a cached report no older than the freshness window, or None."""
+		with self.lock:
+			row = self.connection.execute("SELECT research_brief, final_report, notes, created_at FROM reports "
+			                              "WHERE key = ? AND created_at >= ?",
+			                              (key, time.time() - max_age_seconds)).fetchone()
+		if row is None:
+			return None
+		return {"research_brief": row[0], "final_report": row[1], "notes": json.loads(row[2]), "created_at": row[3]}
+	
+	def put(self, key: str, research_brief: str, final_report: str, notes: list[str]):
+		"""Store a finished report, replacing any older report for the same key."""
+		with self.lock:
+			self.connection.execute("INSERT OR REPLACE INTO reports (key, research_brief, final_report, notes, "
+			                        "created_at) VALUES (?, ?, ?, ?, ?)",
+			                        (key, research_brief, final_report, json.dumps(list(notes)), time.time()))
+			self.connection.commit()
+
+
+# Open report caches shared across runs, keyed by database path
+report_caches: dict[str, ReportCache] = {}
+report_caches_lock = threading.Lock()
+
+
+def get_report_cache(configurable: Configuration) -> Optional[ReportCache]:
+	"""Get the shared report cache described by the configuration, or None if report caching is disabled."""
+	if not configurable.report_cache:
+		return None
+	with report_caches_lock:
+		if configurable.report_cache_path not in report_caches:
+			report_caches[configurable.report_cache_path] = ReportCache(configurable.report_cache_path)
+		return report_caches[configurable.report_cache_path]
+
+
+##########################
+# In-Flight Run Sharing
+##########################
+
+# Runs currently researching a cache key: (claim token, future resolved with the report or None, claim time)
+in_flight_reports: dict[str, tuple[str, asyncio.Future, float]] = {}
+
+
+def claim_report(key: str, stale_after_seconds: float) -> tuple[Optional[str], Optional[asyncio.Future]]:
+	"""Claim a cache key for this run, or get the future of the run already researching it.
+
+	Claims older than the staleness limit are taken over, so a run that died without publishing
+	does not hold the key forever.
+
+	Args:
+		key: The report cache key
+		stale_after_seconds: Age after which an unfinished claim is considered abandoned
+
+	Returns:
+		Tuple of (claim token if this run now owns the key, future of the owning run otherwise)
+	"""
+	loop = asyncio.get_running_loop()
+	claim = in_flight_reports.get(key)
+	if claim is not None:
+		_, future, claimed_at = claim
+		if not future.done() and future.get_loop() is loop and time.time() - claimed_at < stale_after_seconds:
+			return None, future
+	
+	token = uuid.uuid4().hex
+	in_flight_reports[key] = (token, loop.create_future(), time.time())
+	return token, None
+
+
+def publish_report(key: Optional[str], token: Optional[str], report: Optional[dict]):
+	"""Release a claimed cache key, handing the report (or None if the run failed) to waiting runs.
+
+	Does nothing unless the token still owns the key, so publishing twice or after a takeover is harmless.
+	"""
+	claim = in_flight_reports.get(key)
+	if claim is None or claim[0] != token:
+		return
+	del in_flight_reports[key]
+	if not claim[1].done():
+		claim[1].set_result(report)
+
+
+async def find_cached_report(key: str, configurable: Configuration) -> tuple[Optional[dict], Optional[str]]:
+	"""Find a fresh cached report, waiting for an identical run in progress, or claim the key for this run.
+
+	Args:
+		key: The report cache key
+		configurable: Configuration with the report cache settings
+
+	Returns:
+		Tuple of (cached report if one was found, claim token if this run must research and publish the report)
+	"""
+	report_cache = get_report_cache(configurable)
+	while True:
+		cached_report = await asyncio.to_thread(report_cache.get, key, configurable.report_cache_ttl_seconds)
+		if cached_report:
+			return cached_report, None
+		if not configurable.report_cache_wait_seconds:
+			return None, None
+		
+		token, in_flight = claim_report(key, configurable.report_cache_wait_seconds)
+		if token:
+			return None, token
+		try:
+			report = await asyncio.wait_for(asyncio.shield(in_flight), configurable.report_cache_wait_seconds)
+		except asyncio.TimeoutError:
+			# Research independently rather than waiting any longer on the other run
+			return None, None
+		if report:
+			return report, None
+		# The other run failed, so look again and claim the key for this run
+
+
+async def cache_final_report(key: Optional[str], token: Optional[str], research_brief: str, final_report: str,
+                             notes: list[str], configurable: Configuration):
+	"""Store a finished report and hand it to identical runs waiting on this one."""
+	report_cache = get_report_cache(configurable)
+	if not key or report_cache is None:
+		return
+	await asyncio.to_thread(report_cache.put, key, research_brief, final_report, notes)
+	publish_report(key, token, {"research_brief": research_brief, "final_report": final_report, "notes": list(notes),
+	                            "created_at":     time.time()})
@@ -0,0 +1,191 @@
+"""Semantic cache letting similar research topics reuse recent compressed research across runs."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from ODR_Agent.blob_store import resolve_text, store_text
+from ODR_Agent.configuration import Configuration
+from ODR_Agent.text_scoring import embed_text
+
+# Settings that change what a research unit would produce, so cached research is only shared between runs that agree
+RESEARCH_CACHE_SETTINGS = ("search_api", "research_model", "summarization_model", "compression_model",
+                           "max_react_tool_calls", "mcp_config", "mcp_prompt", "research_cache_embedding_model")
+
+# Embedding models loaded for the research cache, keyed by model name
+embedding_models: dict = {}
+
+
+##########################
+# Embedding Utils
+##########################
+
+def get_research_cache_scope(configurable: Configuration) -> str:
+	"""Build the scope under which a run's cached research may be reused."""
+	settings = configurable.model_dump(mode="json", include=set(RESEARCH_CACHE_SETTINGS))
+	return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def embed_topic(research_topic: str, configurable: Configuration) -> np.ndarray:
+	"""Embed a research topic with the configured embedding model, or locally if none is set.
+
+	Args:
+		research_topic: The topic of a ConductResearch call
+		configurable: Configuration with the research cache settings
+
+	Returns:
+		Unit-length embedding of the topic
+	"""
+	if not configurable.research_cache_embedding_model:
+		return embed_text(research_topic)
+	
+	if configurable.research_cache_embedding_model not in embedding_models:
+		from langchain.embeddings import init_embeddings
+		embedding_models[configurable.research_cache_embedding_model] = init_embeddings(
+			configurable.research_cache_embedding_model)
+	vector = np.asarray(
+		await embedding_models[configurable.research_cache_embedding_model].aembed_query(research_topic), dtype=float)
+	norm = np.linalg.norm(vector)
+	return vector / norm if norm else vector
+
+
+##########################
+# Research Cache
+##########################
+
+class ResearchCache:
+	"""SQLite store of compressed research with an in-memory vector index over the research topics.
+
+	Embeddings are kept in one matrix per scope so a lookup is a single matrix-vector product.
+	"""
+	
+	def __init__(self, path: str):
+		self.path = path
+		if os.path.dirname(path):
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(path, check_same_thread=False)
+		self.connection.execute("CREATE TABLE IF NOT EXISTS research (id INTEGER PRIMARY KEY, scope TEXT NOT NULL, "
+		                        "research_topic TEXT NOT NULL, embedding BLOB NOT NULL, compressed_research TEXT NOT "
+		                        "NULL, raw_notes TEXT NOT NULL, created_at REAL NOT NULL)")
+		self.connection.commit()
+		
+		# Vector index per scope: (row ids, creation times, embedding matrix)
+		self.index: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+		rows = self.connection.execute("SELECT scope, id, created_at, embedding FROM research ORDER BY id").fetchall()
+		for scope, row_id, created_at, embedding in rows:
+			self.add_to_index(scope, row_id, created_at, np.frombuffer(embedding, dtype=np.float32))
+	
+	def add_to_index(self, scope: str, row_id: int, created_at: float, embedding: np.ndarray):
+		"""Add one topic embedding to the scope's vector index."""
+		ids, created, matrix = self.index.get(scope, (np.zeros(0, dtype=np.int64), np.zeros(0),
+		                                              np.zeros((0, len(embedding)), dtype=np.float32)))
+		if matrix.shape[1] != len(embedding):
+			# The embedding model changed size; only the newest vectors stay searchable
+			ids, created, matrix = ids[:0], created[:0], np.zeros((0, len(embedding)), dtype=np.float32)
+		self.index[scope] = (np.append(ids, row_id), np.append(created, created_at),
+		                     np.vstack([matrix, embedding.astype(np.float32)]))
+	
+	def find(self, scope: str, embedding: np.ndarray, min_similarity: float, max_age_seconds: float) -> Optional[dict]:
+		"""Find the most similar fresh research within the scope.
+
+		Args:
+			scope: Research cache scope of the run
+			embedding: Embedding of the new research topic
+			min_similarity: Lowest cosine similarity accepted as a match
+			max_age_seconds: Oldest cached research still considered fresh
+
+		Returns:
+			The cached research with its topic and similarity, or None if nothing matches
+		"""
+		with self.lock:
+			if scope not in self.index:
+				return None
+			ids, created, matrix = self.index[scope]
+			if matrix.shape[1] != len(embedding):
+				return None
+			similarities = matrix @ embedding.astype(np.float32)
+			similarities[created < time.time() - max_age_seconds] = -1
+			best = int(np.argmax(similarities))
+			if similarities[best] < min_similarity:
+				return None
+			row = self.connection.execute("SELECT research_topic, compressed_research, raw_notes, created_at FROM "
+			                              "research WHERE id = ?", (int(ids[best]),)).fetchone()
+		if row is None:
+			return None
+		return {"research_topic": row[0], "compressed_research": row[1], "raw_notes": json.loads(row[2]),
+		        "created_at":     row[3], "similarity": float(similarities[best])}
+	
+	def put(self, scope: str, research_topic: str, embedding: np.ndarray, compressed_research: str,
+	        raw_notes: list[str]):
+		"""Store the compressed research of a finished research unit."""
+		created_at = time.time()
+		with self.lock:
+			cursor = self.connection.execute("INSERT INTO research (scope, research_topic, embedding, "
+			                                 "compressed_research, raw_notes, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+			                                 (scope, research_topic, embedding.astype(np.float32).tobytes(),
+			                                  compressed_research, json.dumps(list(raw_notes)), created_at))
+			self.connection.commit()
+			self.add_to_index(scope, cursor.lastrowid, created_at, embedding)
+
+
+# Open research caches shared across runs, keyed by database path
+research_caches: dict[str, ResearchCache] = {}
+research_caches_lock = threading.Lock()
+
+
+def get_research_cache(configurable: Configuration) -> Optional[ResearchCache]:
+	"""Get the shared research cache described by the configuration, or None if research caching is disabled."""
+	if not configurable.research_cache:
+		return None
+	with research_caches_lock:
+		if configurable.research_cache_path not in research_caches:
+			research_caches[configurable.research_cache_path] = ResearchCache(configurable.research_cache_path)
+		return research_caches[configurable.research_cache_path]
+
+
+async def find_cached_research(research_topic: str, configurable: Configuration) -> tuple[Optional[dict], np.ndarray]:
+	"""Look up fresh research on a similar topic.
+
+	Args:
+		research_topic: The topic of a ConductResearch call
+		configurable: Configuration with the research cache settings
+
+	Returns:
+		Tuple of (researcher output state built from the cached research or None, embedding of the topic)
+	"""
+	research_cache = get_research_cache(configurable)
+	embedding = await embed_topic(research_topic, configurable)
+	cached_research = await asyncio.to_thread(research_cache.find, get_research_cache_scope(configurable), embedding,
+	                                          configurable.research_cache_similarity,
+	                                          configurable.research_cache_ttl_seconds)
+	if cached_research is None:
+		return None, embedding
+	
+	# Raw notes are cached as full text, so move them into this run's blob store if it has one
+	raw_notes = [await asyncio.to_thread(store_text, note, configurable) for note in cached_research["raw_notes"]]
+	return {"compressed_research": cached_research["compressed_research"], "raw_notes": raw_notes}, embedding
+
+
+async def cache_research(research_topic: str, embedding: np.ndarray, observation: dict, configurable: Configuration):
+	"""Store the output of a research unit unless it failed.
+
+	Args:
+		research_topic: The topic of the ConductResearch call
+		embedding: Embedding of the topic returned by find_cached_research
+		observation: The researcher's output state
+		configurable: Configuration with the research cache and blob store settings
+	"""
+	compressed_research = observation.get("compressed_research", "")
+	if not compressed_research or compressed_research.startswith("Error"):
+		return
+	raw_notes = [await asyncio.to_thread(resolve_text, note, configurable) for note in observation.get("raw_notes", [])]
+	await asyncio.to_thread(get_research_cache(configurable).put, get_research_cache_scope(configurable),
+	                        research_topic, embedding, compressed_research, raw_notes)
@@ -1,9 +1,11 @@
 """Graph state definitions and data structures for the Deep Research agent."""
 
 import operator
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Annotated, Optional
 
 from langchain_core.messages import MessageLikeRepresentation
+from langgraph.channels import BinaryOperatorAggregate
 from langgraph.graph import MessagesState
 from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
@@ -26,7 +28,19 @@ class Summary(BaseModel):
 	"""Research summary with key findings."""
 	
 	summary: str
-	key_excerpts: str
+	key_excerpts: str = ""
+
+
+class BatchSummary(Summary):
+	"""Summary of one webpage from a batched summarization call."""
+	
+	source_id: int = Field(description="The id of the webpage being summarized, exactly as given in the input.", )
+
+
+class BatchSummaries(BaseModel):
+	"""Summaries for every webpage in a batched summarization call."""
+	
+	summaries: list[BatchSummary] = Field(description="One summary per webpage, in the order the webpages were given.", )
 
 
 class ClarifyWithUser(BaseModel):
@@ -49,6 +63,75 @@ class ResearchQuestion(BaseModel):
 # State Definitions
 ###################
 
+class ChunkedList(Sequence):
+	"""Immutable, append-optimized list used to accumulate state values.
+
+	Each instance holds the chunk of items appended last and a reference to the instance it extended, so
+	appending shares every earlier chunk instead of copying the whole list. Instances never change after
+	creation, which keeps LangGraph channel copies and checkpoints that still reference older values valid.
+	The flattened items are materialized lazily on first read and cached per instance.
+	"""
+	
+	__slots__ = ("_parent", "_chunk", "_length", "_items")
+	
+	def __init__(self, items: Iterable = ()):
+		self._parent = None
+		self._chunk = tuple(items)
+		self._length = len(self._chunk)
+		self._items = None
+	
+	def append_all(self, items: Iterable) -> "ChunkedList":
+		"""Return a new list with the items appended, sharing this list's chunks."""
+		chunk = tuple(items)
+		if not chunk:
+			return self
+		extended = ChunkedList.__new__(ChunkedList)
+		extended._parent = self if self._length else None
+		extended._chunk = chunk
+		extended._length = self._length + len(chunk)
+		extended._items = None
+		return extended
+	
+	def _materialize(self) -> list:
+		"""Flatten the chunks into a list, reusing the nearest ancestor that is already materialized."""
+		if self._items is None:
+			chunks, node = [], self
+			while node is not None and node._items is None:
+				chunks.append(node._chunk)
+				node = node._parent
+			items = list(node._items) if node is not None else []
+			for chunk in reversed(chunks):
+				items.extend(chunk)
+			self._items = items
+		return self._items
+	
+	def __len__(self) -> int:
+		return self._length
+	
+	def __getitem__(self, index):
+		# Reading the most recent items (e.g. the last message) does not need to materialize the list
+		if isinstance(index, int) and -len(self._chunk) <= index < 0:
+			return self._chunk[index]
+		return self._materialize()[index]
+	
+	def __iter__(self) -> Iterator:
+		return iter(self._materialize())
+	
+	def __add__(self, other: Iterable) -> "ChunkedList":
+		return self.append_all(other)
+	
+	def __radd__(self, other: Iterable) -> list:
+		return list(other) + self._materialize()
+	
+	def __eq__(self, other) -> bool:
+		if isinstance(other, (ChunkedList, list, tuple)):
+			return len(self) == len(other) and list(self) == list(other)
+		return NotImplemented
+	
+	def __repr__(self) -> str:
+		return f"ChunkedList({self._materialize()!r})"
+
+
 def override_reducer(current_value, new_value):
 	"""Reducer function that allows overriding values in state."""
 	if isinstance(new_value, dict) and new_value.get("type") == "override":
@@ -57,6 +140,37 @@ def override_reducer(current_value, new_value):
 		return operator.add(current_value, new_value)
 
 
+def chunked_override_reducer(current_value, new_value):
+	"""Reducer function that allows overriding values in state, accumulating appends in a ChunkedList.
+
+	Each update costs the size of the update rather than a copy of everything accumulated so far.
+	A value set once stays a plain list.
+	"""
+	if isinstance(new_value, dict) and new_value.get("type") == "override":
+		return new_value.get("value", new_value)
+	elif isinstance(current_value, ChunkedList):
+		return current_value.append_all(new_value)
+	elif not current_value:
+		return list(new_value)
+	else:
+		return ChunkedList(current_value).append_all(new_value)
+
+
+class ChunkedListChannel(BinaryOperatorAggregate):
+	"""State channel accumulating a list with chunked_override_reducer, checkpointed as a plain list."""
+	
+	def __init__(self, typ: type, operator=chunked_override_reducer):
+		super().__init__(typ, operator)
+	
+	def checkpoint(self):
+		return list(self.value) if isinstance(self.value, ChunkedList) else self.value
+
+
+def materialize_lists(values: dict) -> dict:
+	"""Replace every ChunkedList value with a plain list, e.g. in the output a subgraph hands to its parent."""
+	return {key: list(value) if isinstance(value, ChunkedList) else value for key, value in values.items()}
+
+
 class AgentInputState(MessagesState):
 	"""InputState is only 'messages'."""
 
@@ -66,19 +180,28 @@ class AgentState(MessagesState):
 	
 	supervisor_messages: Annotated[list[MessageLikeRepresentation], override_reducer]
 	research_brief: Optional[str]
+	research_deadline: Optional[float]
 	raw_notes: Annotated[list[str], override_reducer] = []
 	notes: Annotated[list[str], override_reducer] = []
+	research_units: Annotated[list[dict], override_reducer] = []
 	final_report: str
+	report_cache_key: Optional[str]
+	report_cache_token: Optional[str]
 
 
 class SupervisorState(TypedDict):
 	"""State for the supervisor that manages research tasks."""
 	
-	supervisor_messages: Annotated[list[MessageLikeRepresentation], override_reducer]
+	supervisor_messages: Annotated[list[MessageLikeRepresentation], ChunkedListChannel]
 	research_brief: str
-	notes: Annotated[list[str], override_reducer] = []
+	research_deadline: Optional[float]
+	notes: Annotated[list[str], ChunkedListChannel] = []
 	research_iterations: int = 0
-	raw_notes: Annotated[list[str], override_reducer] = []
+	raw_notes: Annotated[list[str], ChunkedListChannel] = []
+	pending_research: Annotated[list[dict], ChunkedListChannel] = []
+	research_units: Annotated[list[dict], ChunkedListChannel] = []
+	supervisor_digest: str = ""
+	supervisor_digest_until: int = 0
 
 
 class ResearcherState(TypedDict):
@@ -87,6 +210,8 @@ class ResearcherState(TypedDict):
 	researcher_messages: Annotated[list[MessageLikeRepresentation], operator.add]
 	tool_call_iterations: int = 0
 	research_topic: str
+	deadline: Optional[float]
+	low_novelty_rounds: int = 0
 	compressed_research: str
 	raw_notes: Annotated[list[str], override_reducer] = []
 
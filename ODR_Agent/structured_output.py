@@ -0,0 +1,172 @@
+"""Local repair of malformed structured model outputs, so most parsing failures cost no extra model call."""
+
+import json
+import re
+from typing import Any, Optional
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, ValidationError
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+# Maximum number of cut points tried when closing truncated JSON
+MAX_TRUNCATION_CUTS = 20
+
+
+##########################
+# JSON Repair
+##########################
+
+def scan_json(text: str) -> tuple[Optional[int], Optional[str], list[tuple[int, str]]]:
+	"""Scan JSON text for the end of its top-level value, tracking what a truncated value would need to close.
+
+	Args:
+		text: Text starting with a JSON object or array
+
+	Returns:
+		Tuple of (end of the top-level value or None if it is truncated, characters closing the truncated value
+		at its end, positions after which the value can be cut with the characters closing it there)
+	"""
+	closers, in_string, escaped = [], False, False
+	cut_points = []
+	for index, char in enumerate(text):
+		if in_string:
+			if escaped:
+				escaped = False
+			elif char == "\\":
+				escaped = True
+			elif char == '"':
+				in_string = False
+			continue
+		if char == '"':
+			in_string = True
+		elif char in "{[":
+			closers.append("}" if char == "{" else "]")
+		elif char in "}]" and closers:
+			closers.pop()
+			if not closers:
+				return index + 1, None, cut_points
+			cut_points.append((index + 1, "".join(reversed(closers))))
+		elif char == "," and closers:
+			cut_points.append((index, "".join(reversed(closers))))
+	ending = ('\\' if escaped else '') + ('"' if in_string else '') + "".join(reversed(closers))
+	return None, ending, cut_points
+
+
+def repair_json(text: str) -> Optional[Any]:
+	"""Parse JSON from a model response, repairing the common ways it is malformed.
+
+	Handles code fences, text before or after the JSON value, trailing commas and values truncated by
+	the output token limit. A truncated value is closed where it was cut off, or cut back to the last
+	complete member.
+
+	Args:
+		text: The model's response text
+
+	Returns:
+		The parsed JSON value, or None if it could not be repaired
+	"""
+	fence = CODE_FENCE_PATTERN.search(text)
+	if fence:
+		text = fence.group(1)
+	starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+	if not starts:
+		return None
+	text = text[min(starts):]
+	
+	end, ending, cut_points = scan_json(text)
+	candidates = [text[:end]] if end is not None else [text + ending] + [text[:cut] + closers for cut, closers in
+	                                                                     reversed(cut_points[-MAX_TRUNCATION_CUTS:])]
+	for candidate in candidates:
+		for attempt in (candidate, TRAILING_COMMA_PATTERN.sub(r"\1", candidate)):
+			try:
+				return json.loads(attempt)
+			except json.JSONDecodeError:
+				continue
+	return None
+
+
+##########################
+# Structured Output Parsing
+##########################
+
+# Outcomes of structured output calls keyed by schema name: parsed directly, repaired locally, or retried
+structured_output_metrics: dict[str, dict[str, int]] = {}
+
+
+def count_outcome(schema: type[BaseModel], outcome: str):
+	"""Count the outcome of a structured output call."""
+	counters = structured_output_metrics.setdefault(schema.__name__, {"parsed": 0, "repaired": 0, "retried": 0})
+	counters[outcome] += 1
+
+
+def get_structured_output_metrics() -> dict[str, dict[str, int]]:
+	"""Get the parsed, repaired and retried counts of each structured output schema."""
+	return {schema_name: dict(counters) for schema_name, counters in structured_output_metrics.items()}
+
+
+def get_raw_payloads(raw: AIMessage) -> list[Any]:
+	"""Collect what a raw model response may contain as structured output: tool call arguments and text."""
+	payloads = [tool_call["args"] for tool_call in getattr(raw, "tool_calls", None) or []]
+	payloads += [repair_json(tool_call.get("args") or "") for tool_call in
+	             getattr(raw, "invalid_tool_calls", None) or []]
+	content = raw.content if isinstance(raw.content, str) else "".join(
+		block if isinstance(block, str) else block.get("text", "") for block in raw.content)
+	payloads.append(repair_json(content))
+	return [payload for payload in payloads if payload is not None]
+
+
+def repair_structured_output(raw: AIMessage, schema: type[BaseModel]) -> Optional[BaseModel]:
+	"""Recover a structured output from a raw model response that failed to parse.
+
+	Missing fields that have a default in the schema are filled in by validation.
+
+	Args:
+		raw: The raw model response
+		schema: The expected output schema
+
+	Returns:
+		The repaired output, or None if the response cannot be repaired
+	"""
+	for payload in get_raw_payloads(raw):
+		# Some models wrap the arguments in the schema's name or in a single "properties" key
+		if isinstance(payload, dict) and len(payload) == 1 and not set(payload) & set(schema.model_fields):
+			payload = next(iter(payload.values()))
+		try:
+			return schema.model_validate(payload)
+		except ValidationError:
+			continue
+	return None
+
+
+def with_repaired_structured_output(model: Runnable, schema: type[BaseModel], max_retries: int) -> Runnable:
+	"""Bind a structured output schema to a model, repairing malformed responses before retrying the call.
+
+	Args:
+		model: The chat model
+		schema: The output schema
+		max_retries: Maximum number of attempts when a response cannot be parsed or repaired
+
+	Returns:
+		Runnable returning instances of the schema
+	"""
+	
+	def parse_output(output: Any) -> BaseModel:
+		if isinstance(output, schema):
+			return output
+		if output.get("parsed") is not None:
+			count_outcome(schema, "parsed")
+			return output["parsed"]
+		repaired = repair_structured_output(output["raw"], schema)
+		if repaired is not None:
+			count_outcome(schema, "repaired")
+			return repaired
+		count_outcome(schema, "retried")
+		raise OutputParserException(f"Could not parse or repair {schema.__name__} output: "
+		                            f"{output.get('parsing_error')}", llm_output=str(output["raw"].content))
+	
+	return (model.with_structured_output(schema, include_raw=True) | RunnableLambda(parse_output)).with_retry(
+		stop_after_attempt=max_retries)
@@ -0,0 +1,223 @@
+"""Local text scoring helpers used to avoid LLM calls for the Deep Research agent."""
+
+import re
+import zlib
+
+import numpy as np
+
+##########################
+# Tokenization Utils
+##########################
+STOP_WORDS = frozenset(
+	"a about above after again against all also am an and any are as at be because been before being below between "
+	"both but by can could did do does doing down during each few for from further had has have having he her here "
+	"hers him his how i if in into is it its itself just me more most my no nor not now of off on once only or other "
+	"our ours out over own same she should so some such than that the their theirs them then there these they this "
+	"those through to too under until up very was we were what when where which while who whom why will with would "
+	"you your yours".split())
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text: str) -> list[str]:
+	"""Split text into lowercase word tokens without stop words."""
+	return [token for token in WORD_PATTERN.findall(text.lower()) if token not in STOP_WORDS and len(token) > 1]
+
+
+def split_sentences(text: str) -> list[str]:
+	"""Split text into sentences, treating blank lines and sentence punctuation as boundaries."""
+	sentences = []
+	for block in re.split(r"\n\s*\n", text):
+		block = " ".join(block.split())
+		if block:
+			sentences.extend(sentence for sentence in SENTENCE_BOUNDARY.split(block) if sentence)
+	return sentences
+
+
+##########################
+# Extractive Summarization Utils
+##########################
+
+def is_extractable(text: str, min_sentences: int = 4, max_average_sentence_chars: int = 400) -> bool:
+	"""Check whether text is prose that sentence extraction can summarize well.
+
+	Tables, lists, code and other dense content have few sentence boundaries and are better left to an LLM.
+
+	Args:
+		text: The text to inspect
+		min_sentences: Minimum number of sentences needed for extraction to be meaningful
+		max_average_sentence_chars: Longest average sentence length still treated as prose
+
+	Returns:
+		True if the text can be summarized by sentence extraction
+	"""
+	sentences = split_sentences(text)
+	if len(sentences) < min_sentences:
+		return False
+	return sum(len(sentence) for sentence in sentences) / len(sentences) <= max_average_sentence_chars
+
+
+def score_sentences(sentences: list[str]) -> np.ndarray:
+	"""Score sentences by TF-IDF similarity to the document centroid, with a small lead-position bonus.
+
+	Args:
+		sentences: The sentences of a single document
+
+	Returns:
+		Array with one relevance score per sentence
+	"""
+	tokenized = [tokenize(sentence) for sentence in sentences]
+	vocabulary = {term: index for index, term in enumerate(sorted({term for tokens in tokenized for term in tokens}))}
+	if not vocabulary:
+		return np.zeros(len(sentences))
+	
+	# Build the sentence-term frequency matrix
+	term_frequencies = np.zeros((len(sentences), len(vocabulary)))
+	for row, tokens in enumerate(tokenized):
+		for term in tokens:
+			term_frequencies[row, vocabulary[term]] += 1
+	
+	# Weight terms by inverse sentence frequency and normalize each sentence vector
+	document_frequency = np.count_nonzero(term_frequencies, axis=0)
+	inverse_document_frequency = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+	tfidf = term_frequencies * inverse_document_frequency
+	norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+	tfidf = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+	
+	# Sentences closest to the document centroid carry its main content
+	centroid = tfidf.mean(axis=0)
+	centroid_norm = np.linalg.norm(centroid)
+	similarity = tfidf @ (centroid / centroid_norm) if centroid_norm else np.zeros(len(sentences))
+	lead_bonus = 0.1 / np.sqrt(np.arange(1, len(sentences) + 1))
+	return similarity + lead_bonus
+
+
+def extractive_summarize(text: str, target_ratio: float = 0.3, max_excerpts: int = 3) -> str:
+	"""Summarize text locally by extracting its most representative sentences.
+
+	Args:
+		text: The text to summarize
+		target_ratio: Share of the original length to keep in the summary
+		max_excerpts: Number of top-scoring sentences to quote as key excerpts
+
+	Returns:
+		Summary formatted with the same summary and key excerpt sections as LLM summaries
+	"""
+	sentences = split_sentences(text)
+	scores = score_sentences(sentences)
+	ranking = [int(index) for index in np.argsort(-scores, kind="stable")]
+	
+	# Take the best sentences until the target length is reached, then restore document order
+	budget = max(int(len(text) * target_ratio), 1)
+	selected, used = [], 0
+	for index in ranking:
+		if used and used + len(sentences[index]) > budget:
+			continue
+		selected.append(index)
+		used += len(sentences[index])
+	
+	summary = " ".join(sentences[index] for index in sorted(selected))
+	key_excerpts = ", ".join(sentences[index] for index in ranking[:max_excerpts])
+	return f"<summary>\n{summary}\n</summary>\n\n<key_excerpts>\n{key_excerpts}\n</key_excerpts>"
+
+
+##########################
+# Relevance Utils
+##########################
+
+def bm25_scores(query: str, documents: list[str], k1: float = 1.5, b: float = 0.75, stem_length: int = 6) -> np.ndarray:
+	"""Score documents against a query with Okapi BM25 over crudely stemmed content words.
+
+	Args:
+		query: The search query
+		documents: The documents to score
+		k1: Term frequency saturation
+		b: Strength of the document length normalization
+		stem_length: Number of leading characters of each word kept as its term
+
+	Returns:
+		Array with one relevance score per document
+	"""
+	scores = np.zeros(len(documents))
+	if not documents:
+		return scores
+	terms = [[token[:stem_length] for token in tokenize(document)] for document in documents]
+	lengths = np.array([len(document_terms) for document_terms in terms], dtype=float)
+	average_length = lengths.mean() or 1
+	for term in {token[:stem_length] for token in tokenize(query)}:
+		frequencies = np.array([document_terms.count(term) for document_terms in terms], dtype=float)
+		document_frequency = np.count_nonzero(frequencies)
+		inverse_document_frequency = np.log(1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+		scores += inverse_document_frequency * frequencies * (k1 + 1) / (
+			frequencies + k1 * (1 - b + b * lengths / average_length))
+	return scores
+
+
+def select_diverse(relevance: np.ndarray, embeddings: np.ndarray, top_k: int, diversity: float) -> list[int]:
+	"""Pick the most relevant items while penalizing similarity to those already picked (maximal marginal relevance).
+
+	Args:
+		relevance: Relevance score of each item, scaled to [0, 1]
+		embeddings: Unit-length embedding of each item, one per row
+		top_k: Number of items to pick
+		diversity: Weight of the similarity penalty, from 0 (relevance only) to 1 (diversity only)
+
+	Returns:
+		Indices of the picked items in the order they were picked
+	"""
+	selected = []
+	max_similarity = np.zeros(len(relevance))
+	candidates = np.ones(len(relevance), dtype=bool)
+	while candidates.any() and len(selected) < top_k:
+		marginal_relevance = np.where(candidates, (1 - diversity) * relevance - diversity * max_similarity, -np.inf)
+		best = int(np.argmax(marginal_relevance))
+		selected.append(best)
+		candidates[best] = False
+		max_similarity = np.maximum(max_similarity, embeddings @ embeddings[best])
+	return selected
+
+
+##########################
+# Embedding Utils
+##########################
+
+def embed_text(text: str, dimensions: int = 1024, stem_length: int = 6) -> np.ndarray:
+	"""Embed text locally as a normalized vector of hashed, crudely stemmed content words.
+
+	Words are cut to their first few characters so that inflections such as "competitive" and
+	"competitors" share a feature, letting rephrasings of the same topic score a high cosine similarity.
+
+	Args:
+		text: The text to embed
+		dimensions: Size of the hashed feature space
+		stem_length: Number of leading characters of each word kept as its feature
+
+	Returns:
+		Unit-length vector, or all zeros if the text has no content words
+	"""
+	vector = np.zeros(dimensions)
+	for token in tokenize(text):
+		vector[zlib.crc32(token[:stem_length].encode("utf-8")) % dimensions] += 1
+	norm = np.linalg.norm(vector)
+	return vector / norm if norm else vector
+
+
+##########################
+# Novelty Utils
+##########################
+
+def get_shingles(text: str, size: int = 4) -> set[int]:
+	"""Hash the overlapping runs of content words in a text, so that near-duplicate passages share most shingles.
+
+	Args:
+		text: The text to shingle
+		size: Number of consecutive content words in each shingle
+
+	Returns:
+		Set of shingle hashes, empty if the text has no content words
+	"""
+	tokens = tokenize(text)
+	if len(tokens) <= size:
+		return {zlib.crc32(" ".join(tokens).encode("utf-8"))} if tokens else set()
+	return {zlib.crc32(" ".join(tokens[i:i + size]).encode("utf-8")) for i in range(len(tokens) - size + 1)}
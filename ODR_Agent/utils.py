@@ -3,24 +3,32 @@
 import asyncio
 import logging
 import os
+import re
+import time
+import uuid
 import warnings
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Any, Dict, List, Literal, Optional
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional
+
+import numpy as np
 
-import aiohttp
-from langchain.chat_models import init_chat_model
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import (AIMessage, HumanMessage, MessageLikeRepresentation, filter_messages, )
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.tools import (BaseTool, InjectedToolArg, StructuredTool, ToolException, tool, )
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.config import get_store
-from mcp import McpError
-from tavily import AsyncTavilyClient
 
-from ODR_Agent.configuration import Configuration, SearchAPI
-from ODR_Agent.prompts import summarize_webpage_prompt
-from ODR_Agent.state import ResearchComplete, Summary
+from ODR_Agent.clients import get_circuit_breaker, get_http_session, get_mcp_tools, get_tavily_client
+from ODR_Agent.configuration import Configuration, MCPServerConfig, SearchAPI
+from ODR_Agent.failover import HedgedModel, build_stage_models
+from ODR_Agent.mcp_cache import get_cache_policy, wrap_mcp_cache_tool
+from ODR_Agent.model_registry import (get_model_name, get_model_provider, get_model_spec, get_output_token_limit,
+                                      route_model, )
+from ODR_Agent.prompts import summarize_webpage_prompt, summarize_webpages_batch_prompt
+from ODR_Agent.state import BatchSummaries, ResearchComplete, Summary
+from ODR_Agent.structured_output import with_repaired_structured_output
+from ODR_Agent.text_scoring import (bm25_scores, embed_text, extractive_summarize, get_shingles, is_extractable,
+                                    select_diverse)
 
 ##########################
 # Tavily Search Tool Utils
@@ -44,56 +52,170 @@ async def tavily_search(queries: List[str], max_results: Annotated[int, Injected
 	Returns:
 		Formatted string containing summarized search results
 	"""
-	# Step 1: Execute search queries asynchronously
-	search_results = await tavily_search_async(queries, max_results=max_results, topic=topic,
-	include_raw_content=True, config=config)
+	# Step 1: Execute search queries asynchronously, answering those covered by results prefetched from the
+	# research topic when this researcher was dispatched
+	search_results, prefetched_results = await search_with_prefetch(queries, max_results, topic, config)
+	
+	# Step 2: Deduplicate results from both searches by URL to avoid processing the same content multiple times
+	unique_results = {url: result for url, (result, _) in prefetched_results.items()}
+	for url, result in deduplicate_search_results(search_results).items():
+		unique_results.setdefault(url, result)
+	
+	# Step 3: Summarize the most relevant and diverse results that were not already summarized by the prefetch;
+	# the others keep their search snippet
+	summaries = {url: summary for url, (_, summary) in prefetched_results.items()}
+	configurable = Configuration.from_runnable_config(config)
+	selected_urls = rerank_search_results({url: result for url, result in unique_results.items() if url not in
+	                                       prefetched_results}, configurable.summarization_top_k,
+	                                      configurable.summarization_diversity)
+	summaries.update(await summarize_search_results({url: unique_results[url] for url in selected_urls}, config))
+	
+	# Step 4: Combine results with their summaries, labelling results that kept their search snippet
+	summarized_results = {url: {'title':   result['title'],
+	                            'label':   "SNIPPET" if summaries.get(url) is None else "SUMMARY",
+	                            'content': result['content'] if summaries.get(url) is None else summaries[url]} for
+	                      url, result in unique_results.items()}
 	
-	# Step 2: Deduplicate results by URL to avoid processing the same content multiple times
+	# Step 5: Format the final output
+	if not summarized_results:
+		return "No valid search results found. Please try different search queries or use a different search API."
+	
+	formatted_output = "Search results: \n\n"
+	for i, (url, result) in enumerate(summarized_results.items()):
+		formatted_output += f"\n\n--- SOURCE {i + 1}: {result['title']} ---\n"
+		formatted_output += f"URL: {url}\n\n"
+		formatted_output += f"{result['label']}:\n{result['content']}\n\n"
+		formatted_output += "\n\n" + "-" * 80 + "\n"
+	
+	return formatted_output
+
+
+def deduplicate_search_results(search_results: list[dict]) -> dict[str, dict]:
+	"""Deduplicate Tavily results by URL, keeping the first occurrence and the query that found it.
+
+	Args:
+		search_results: Responses returned by the Tavily API, one per query
+
+	Returns:
+		Dictionary mapping each unique URL to its search result
+	"""
 	unique_results = {}
 	for response in search_results:
 		for result in response['results']:
 			url = result['url']
 			if url not in unique_results:
 				unique_results[url] = {**result, "query": response['query']}
+	return unique_results
+
+
+def rerank_search_results(unique_results: dict[str, dict], top_k: int, diversity: float) -> list[str]:
+	"""Pick the search results worth summarizing by local relevance to their query and diversity.
+
+	Each result is scored with BM25 over its title and snippet against the query that found it, scaled
+	so the best result of every query scores 1. Results are then picked by maximal marginal relevance so
+	that near-duplicate results do not crowd out other sources.
+
+	Args:
+		unique_results: Dictionary mapping URLs to Tavily search results
+		top_k: Number of results to pick, or 0 to pick all of them
+		diversity: Weight of the penalty for similarity to results already picked
+
+	Returns:
+		URLs of the picked results, most relevant first
+	"""
+	urls = list(unique_results)
+	if not top_k or len(urls) <= top_k:
+		return urls
+	
+	# Step 1: Score each result against the query that found it
+	texts = [f"{unique_results[url]['title']} {unique_results[url].get('content', '')}" for url in urls]
+	relevance = np.zeros(len(urls))
+	for query in {unique_results[url].get("query", "") for url in urls}:
+		indices = [index for index, url in enumerate(urls) if unique_results[url].get("query", "") == query]
+		scores = bm25_scores(query, [texts[index] for index in indices])
+		relevance[indices] = scores / scores.max() if scores.max() > 0 else 0
 	
-	# Step 3: Set up the summarization model with configuration
+	# Step 2: Pick relevant results that are not too similar to each other
+	embeddings = np.array([embed_text(text) for text in texts])
+	return [urls[index] for index in select_diverse(relevance, embeddings, top_k, diversity)]
+
+
+async def summarize_search_results(unique_results: dict[str, dict], config: RunnableConfig) -> dict[str, Optional[str]]:
+	"""Summarize the raw content of deduplicated search results in parallel.
+
+	With summarization routing enabled, short pages are passed through unchanged and medium-sized
+	prose pages are summarized locally by sentence extraction, so only long or dense pages reach the LLM.
+
+	Args:
+		unique_results: Dictionary mapping URLs to Tavily search results
+		config: Runtime configuration for API keys and model settings
+
+	Returns:
+		Dictionary mapping each URL to its summary, or None when the result had no raw content
+	"""
+	# Step 1: Collect the raw content to summarize (skip empty content)
 	configurable = Configuration.from_runnable_config(config)
 	
 	# Character limit to stay within model token limits (configurable)
 	max_char_to_include = configurable.max_content_length
+	pages = {url: result['raw_content'][:max_char_to_include] for url, result in unique_results.items() if
+	         result.get("raw_content")}
 	
-	# Initialize summarization model with retry logic
-	model_api_key = get_api_key_for_model(configurable.summarization_model, config)
-	summarization_model = init_chat_model(model=configurable.summarization_model, max_tokens=configurable.summarization_model_max_tokens, api_key=model_api_key, model_provider="google_genai", tags=[
-		"langsmith:nostream"]).with_structured_output(Summary).with_retry(stop_after_attempt=configurable.max_structured_output_retries)
-	
-	# Step 4: Create summarization tasks (skip empty content)
-	async def noop():
-		"""No-op function for results without raw content."""
-		return None
-	
-	summarization_tasks = [noop() if not result.get("raw_content") else summarize_webpage(summarization_model,
-		result['raw_content'][:max_char_to_include]) for result in unique_results.values()]
+	# Step 2: Summarize short and medium pages without the LLM when routing is enabled
+	summaries = {}
+	if configurable.summarization_routing:
+		summaries, pages = route_pages_without_llm(pages, configurable)
 	
-	# Step 5: Execute all summarization tasks in parallel
-	summaries = await asyncio.gather(*summarization_tasks)
+	if not pages:
+		return {url: summaries.get(url) for url in unique_results}
 	
-	# Step 6: Combine results with their summaries
-	summarized_results = {url: {'title': result['title'], 'content': result['content'] if summary is None else summary}
-	                      for url, result, summary in zip(unique_results.keys(), unique_results.values(), summaries)}
+	# Step 3: Initialize summarization model with output repair, retry logic and fallbacks, routed by the longest
+	# page when routing is enabled
+	model_name = route_model("summarization", configurable, max(len(content) for content in pages.values()))
+	summarization_model = HedgedModel(*build_stage_chat_models(model_name, configurable.summarization_fallback_models,
+	                                                           configurable.summarization_model_max_tokens,
+	                                                           configurable, config, schema=Summary),
+	                                  f"summarization:{model_name}", configurable)
 	
-	# Step 7: Format the final output
-	if not summarized_results:
-		return "No valid search results found. Please try different search queries or use a different search API."
-	
-	formatted_output = "Search results: \n\n"
-	for i, (url, result) in enumerate(summarized_results.items()):
-		formatted_output += f"\n\n--- SOURCE {i + 1}: {result['title']} ---\n"
-		formatted_output += f"URL: {url}\n\n"
-		formatted_output += f"SUMMARY:\n{result['content']}\n\n"
-		formatted_output += "\n\n" + "-" * 80 + "\n"
+	# Step 4: Execute summarization, packing pages into shared calls when batching is enabled
+	if configurable.batch_summarization:
+		batch_summarization_model = HedgedModel(
+			*build_stage_chat_models(model_name, configurable.summarization_fallback_models,
+			                         configurable.summarization_model_max_tokens, configurable, config,
+			                         schema=BatchSummaries), f"batch_summarization:{model_name}", configurable)
+		summaries.update(await summarize_webpages_batched(summarization_model, batch_summarization_model, pages,
+		                                                  configurable, model_name))
+	else:
+		llm_summaries = await asyncio.gather(*[summarize_webpage(summarization_model, content) for content in
+		                                       pages.values()])
+		summaries.update(zip(pages.keys(), llm_summaries))
 	
-	return formatted_output
+	return {url: summaries.get(url) for url in unique_results}
+
+
+def route_pages_without_llm(pages: dict[str, str], configurable: Configuration) -> tuple[dict[str, str], dict[str, str]]:
+	"""Summarize the pages that do not need an LLM and return the rest for LLM summarization.
+
+	Pages shorter than ``summarization_min_chars`` are kept verbatim. Pages up to
+	``extractive_summary_max_chars`` that read as prose get a local extractive summary.
+	Longer pages, and dense pages such as tables or lists, are left for the LLM.
+
+	Args:
+		pages: Dictionary mapping URLs to raw page content
+		configurable: Configuration with the routing thresholds
+
+	Returns:
+		Tuple of (summaries produced locally, pages still requiring LLM summarization)
+	"""
+	local_summaries, llm_pages = {}, {}
+	for url, content in pages.items():
+		if len(content) < configurable.summarization_min_chars:
+			local_summaries[url] = content
+		elif len(content) <= configurable.extractive_summary_max_chars and is_extractable(content):
+			local_summaries[url] = extractive_summarize(content)
+		else:
+			llm_pages[url] = content
+	return local_summaries, llm_pages
 
 
 async def tavily_search_async(search_queries, max_results: int = 5,
@@ -111,8 +233,8 @@ async def tavily_search_async(search_queries, max_results: int = 5,
 	Returns:
 		List of search result dictionaries from Tavily API
 	"""
-	# Initialize the Tavily client with API key from config
-	tavily_client = AsyncTavilyClient(api_key=get_tavily_api_key(config))
+	# Get the shared Tavily client for the API key from config
+	tavily_client = get_tavily_client(get_tavily_api_key(config))
 	
 	# Create search tasks for parallel execution
 	search_tasks = [
@@ -144,10 +266,7 @@ async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
 			)
 		
 		# Format the summary with structured sections
-		formatted_summary = (f"<summary>\n{summary.summary}\n</summary>\n\n"
-		                     f"<key_excerpts>\n{summary.key_excerpts}\n</key_excerpts>")
-		
-		return formatted_summary
+		return format_summary(summary)
 	
 	except asyncio.TimeoutError:
 		# Timeout during summarization - return original content
@@ -159,6 +278,298 @@ async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
 		return webpage_content
 
 
+def format_summary(summary: Summary) -> str:
+	"""Format a structured summary into the sections passed on to researchers."""
+	return (f"<summary>\n{summary.summary}\n</summary>\n\n"
+	        f"<key_excerpts>\n{summary.key_excerpts}\n</key_excerpts>")
+
+
+def get_summarization_batch_budget(configurable: Configuration, model_name: Optional[str] = None) -> int:
+	"""Get the combined character budget for pages packed into one batched summarization call.
+
+	The configured budget is capped so that the expected summaries (about a third of the input) fit
+	the model's output token limit and the prompt fits its context window, assuming ~4 characters per token.
+
+	Args:
+		configurable: Configuration with summarization model settings
+		model_name: The summarization model in use, defaults to the configured summarization model
+
+	Returns:
+		Maximum combined page length in characters for a single batch
+	"""
+	model_name = model_name or configurable.summarization_model
+	max_tokens = get_output_token_limit(get_model_spec(model_name), configurable.summarization_model_max_tokens)
+	budget = min(configurable.summarization_batch_max_chars, max_tokens * 4 * 3)
+	context_window = get_model_token_limit(model_name)
+	if context_window:
+		budget = min(budget, int(context_window * 4 * 0.75))
+	return max(budget, configurable.summarization_batch_page_max_chars)
+
+
+async def summarize_webpages_batched(model: BaseChatModel, batch_model: BaseChatModel, pages: dict[str, str],
+                                     configurable: Configuration, model_name: Optional[str] = None) -> dict[str, str]:
+	"""Summarize webpages by packing short and medium pages into shared structured-output calls.
+
+	Pages longer than the per-page limit are summarized with their own call. The remaining pages are
+	packed in order into batches that stay within the batch budget.
+
+	Args:
+		model: The chat model configured for single-page summarization
+		batch_model: The chat model configured for batched summarization
+		pages: Dictionary mapping URLs to the raw content to summarize
+		configurable: Configuration with batching limits
+		model_name: The summarization model in use, defaults to the configured summarization model
+
+	Returns:
+		Dictionary mapping each URL to its formatted summary (or original content if summarization failed)
+	"""
+	# Step 1: Separate large pages and pack the rest into batches within the budget
+	budget = get_summarization_batch_budget(configurable, model_name)
+	single_pages, batches = [], []
+	current_batch, current_chars = {}, 0
+	for url, content in pages.items():
+		if len(content) > configurable.summarization_batch_page_max_chars:
+			single_pages.append(url)
+			continue
+		if current_batch and current_chars + len(content) > budget:
+			batches.append(current_batch)
+			current_batch, current_chars = {}, 0
+		current_batch[url] = content
+		current_chars += len(content)
+	if current_batch:
+		batches.append(current_batch)
+	
+	# Step 2: Run single-page and batched calls in parallel
+	single_summaries, batch_summaries = await asyncio.gather(
+		asyncio.gather(*[summarize_webpage(model, pages[url]) for url in single_pages]),
+		asyncio.gather(*[summarize_webpage_batch(model, batch_model, batch) for batch in batches]))
+	
+	summaries = dict(zip(single_pages, single_summaries))
+	for batch_summary in batch_summaries:
+		summaries.update(batch_summary)
+	return summaries
+
+
+async def summarize_webpage_batch(model: BaseChatModel, batch_model: BaseChatModel, pages: dict[str, str]) -> dict[
+	str, str]:
+	"""Summarize several webpages in one structured-output call, falling back to per-page calls.
+
+	Args:
+		model: The chat model configured for single-page summarization
+		batch_model: The chat model configured for batched summarization
+		pages: Dictionary mapping URLs to the raw content to summarize
+
+	Returns:
+		Dictionary mapping each URL to its formatted summary (or original content if summarization failed)
+	"""
+	urls = list(pages)
+	if len(urls) == 1:
+		return {urls[0]: await summarize_webpage(model, pages[urls[0]])}
+	
+	summaries_by_id = {}
+	try:
+		# Create prompt with every page tagged by its id
+		webpages = "\n\n".join(f"<webpage id=\"{source_id}\">\n{pages[url]}\n</webpage>" for source_id, url in
+		                       enumerate(urls, start=1))
+		prompt_content = summarize_webpages_batch_prompt.format(webpages=webpages, date=get_today_str())
+		
+		# Execute batched summarization with timeout to prevent hanging
+		response = await asyncio.wait_for(batch_model.ainvoke([HumanMessage(content=prompt_content)]), timeout=60.0)
+		summaries_by_id = {summary.source_id: format_summary(summary) for summary in response.summaries}
+	
+	except asyncio.TimeoutError:
+		logging.warning(f"Batched summarization of {len(urls)} pages timed out after 60 seconds, falling back to "
+		                f"per-page summarization")
+	except Exception as e:
+		logging.warning(f"Batched summarization failed with error: {str(e)}, falling back to per-page summarization")
+	
+	# Summarize any page the batch did not cover with its own call
+	summaries = {url: summaries_by_id[source_id] for source_id, url in enumerate(urls, start=1) if
+	             source_id in summaries_by_id}
+	missing_urls = [url for url in urls if url not in summaries]
+	fallback_summaries = await asyncio.gather(*[summarize_webpage(model, pages[url]) for url in missing_urls])
+	summaries.update(zip(missing_urls, fallback_summaries))
+	return summaries
+
+
+##########################
+# Search Prefetch Utils
+##########################
+
+# Speculative searches started when a research unit is dispatched, keyed by the prefetch id in the researcher's config
+search_prefetches: dict[str, tuple[str, asyncio.Task]] = {}
+
+# Minimum similarity between a search query and the prefetch query for the prefetched results to answer it
+PREFETCH_COVERAGE_SIMILARITY = 0.5
+
+# Search parameters of the prefetch; searches asking for other ones are not answered from it
+PREFETCH_MAX_RESULTS = 5
+PREFETCH_TOPIC = "general"
+
+
+def get_prefetch_query(research_topic: str, max_length: int = 400) -> str:
+	"""Derive a search query from a research topic by taking its first sentence.
+
+	Args:
+		research_topic: The (often paragraph-long) topic handed to a researcher
+		max_length: Maximum query length accepted by the search API
+
+	Returns:
+		Query string suitable for a speculative search
+	"""
+	topic = " ".join(research_topic.split())
+	first_sentence = re.split(r"(?<=[.!?])\s", topic, maxsplit=1)[0]
+	return first_sentence[:max_length]
+
+
+def start_search_prefetch(research_topic: str, config: RunnableConfig) -> str:
+	"""Start searching and summarizing results for a research topic in the background.
+
+	Args:
+		research_topic: The topic the researcher is about to work on
+		config: Runtime configuration for API keys and model settings
+
+	Returns:
+		Prefetch id to pass to the researcher as ``search_prefetch_id`` in its configurable
+	"""
+	prefetch_id = str(uuid.uuid4())
+	prefetch_query = get_prefetch_query(research_topic)
+	search_prefetches[prefetch_id] = (prefetch_query, asyncio.ensure_future(prefetch_search_results(prefetch_query,
+	                                                                                                config)))
+	return prefetch_id
+
+
+async def prefetch_search_results(prefetch_query: str, config: RunnableConfig) -> dict[str, tuple[dict, Optional[str]]]:
+	"""Search for a research topic and summarize the results ahead of the researcher's first tool call.
+
+	Args:
+		prefetch_query: Query derived from the topic the researcher is about to work on
+		config: Runtime configuration for API keys and model settings
+
+	Returns:
+		Dictionary mapping each URL to its search result and summary
+	"""
+	search_results = await tavily_search_async([prefetch_query], max_results=PREFETCH_MAX_RESULTS, topic=PREFETCH_TOPIC,
+	                                           include_raw_content=True, config=config)
+	unique_results = deduplicate_search_results(search_results)
+	summaries = await summarize_search_results(unique_results, config)
+	return {url: (result, summaries.get(url)) for url, result in unique_results.items()}
+
+
+def is_query_covered(query: str, prefetch_query: str) -> bool:
+	"""Check whether a search query asks for roughly the same thing as the prefetch query."""
+	return float(embed_text(query) @ embed_text(prefetch_query)) >= PREFETCH_COVERAGE_SIMILARITY
+
+
+async def await_search_prefetch(prefetch_task: asyncio.Task) -> Optional[dict[str, tuple[dict, Optional[str]]]]:
+	"""Wait for a prefetch, returning None if it failed."""
+	try:
+		return await prefetch_task
+	except Exception as e:
+		# A failed prefetch only costs the speculative work, the researcher's own search still runs
+		logging.warning(f"Search prefetch failed with error: {str(e)}")
+		return None
+
+
+async def search_with_prefetch(queries: list[str], max_results: int, topic: Literal["general", "news", "finance"],
+                               config: RunnableConfig) -> tuple[list[dict], dict[str, tuple[dict, Optional[str]]]]:
+	"""Search a researcher's queries, answering the queries its search prefetch covers from the prefetched results.
+
+	Each prefetch is consumed by the first search of its researcher with the prefetch's topic and number of
+	results, which gets the prefetched results. Queries similar to the prefetch query are not searched again;
+	the other queries are searched while the prefetch finishes. If the prefetch failed, the queries it covered
+	are searched after all.
+
+	Args:
+		queries: Search queries from the researcher's tool call
+		max_results: Maximum number of results to return per query
+		topic: Topic filter for search results
+		config: Runtime configuration of the researcher, carrying its prefetch id
+
+	Returns:
+		Tuple of (Tavily responses of the queries searched, dictionary mapping prefetched URLs to their search
+		result and summary)
+	"""
+	# Leave the prefetch for a later search if this one asks for other results, e.g. news instead of general
+	prefetch_id = (config or {}).get("configurable", {}).get("search_prefetch_id")
+	matches_prefetch = topic == PREFETCH_TOPIC and max_results == PREFETCH_MAX_RESULTS
+	prefetch = search_prefetches.pop(prefetch_id, None) if prefetch_id and matches_prefetch else None
+	if prefetch is None:
+		return await tavily_search_async(queries, max_results=max_results, topic=topic, include_raw_content=True,
+		                                 config=config), {}
+	
+	prefetch_query, prefetch_task = prefetch
+	covered_queries = [query for query in queries if is_query_covered(query, prefetch_query)]
+	search_queries = [query for query in queries if query not in covered_queries]
+	search_results, prefetched_results = await asyncio.gather(
+		tavily_search_async(search_queries, max_results=max_results, topic=topic, include_raw_content=True,
+		                    config=config), await_search_prefetch(prefetch_task))
+	if prefetched_results is None:
+		search_results += await tavily_search_async(covered_queries, max_results=max_results, topic=topic,
+		                                            include_raw_content=True, config=config)
+		return search_results, {}
+	return search_results, prefetched_results
+
+
+def discard_search_prefetch(prefetch_id: Optional[str]):
+	"""Cancel a prefetch that its researcher never consumed."""
+	prefetch = search_prefetches.pop(prefetch_id, None) if prefetch_id else None
+	if prefetch is not None:
+		prefetch[1].cancel()
+
+
+##########################
+# Search Novelty Utils
+##########################
+
+SOURCE_URL_PATTERN = re.compile(r"^URL: (\S+)$", re.MULTILINE)
+
+
+def parse_search_sources(search_output: str) -> dict[str, str]:
+	"""Split formatted search results into the content of each source, keyed by URL."""
+	sources = {}
+	for block in search_output.split("--- SOURCE ")[1:]:
+		match = SOURCE_URL_PATTERN.search(block)
+		if match:
+			sources[match.group(1)] = block[match.end():]
+	return sources
+
+
+def measure_novelty(tool_outputs: list[str], seen_urls: set[str], seen_shingles: set[int]) -> Optional[float]:
+	"""Measure how much new evidence a round of search results brought, and record it as seen.
+
+	Content only counts as new when its URL has not been seen, since the same page is summarized
+	differently each time it is found. Pages syndicated under new URLs are caught by their shingles.
+
+	Args:
+		tool_outputs: Outputs of the round's tool calls
+		seen_urls: URLs seen so far by the researcher, updated in place
+		seen_shingles: Content shingles seen so far by the researcher, updated in place
+
+	Returns:
+		Share of the round's content shingles that are new, or None if no output listed any sources
+	"""
+	sources = {url: content for output in tool_outputs for url, content in parse_search_sources(output).items()}
+	if not sources:
+		return None
+	
+	total_shingles, new_shingles = 0, 0
+	for url, content in sources.items():
+		shingles = get_shingles(content)
+		total_shingles += len(shingles)
+		if url not in seen_urls:
+			new_shingles += len(shingles - seen_shingles)
+		seen_urls.add(url)
+		seen_shingles.update(shingles)
+	return new_shingles / total_shingles if total_shingles else 0.0
+
+
+def count_search_calls(messages: list[MessageLikeRepresentation]) -> int:
+	"""Count the searches requested in a researcher's messages, counting each query of a batched search."""
+	return sum(len(tool_call["args"].get("queries", [None])) for message in messages if isinstance(message, AIMessage)
+	           for tool_call in message.tool_calls if tool_call["name"] not in ("think_tool", "ResearchComplete"))
+
+
 ##########################
 # Reflection Tool Utils
 ##########################
@@ -195,6 +606,17 @@ def think_tool(reflection: str) -> str:
 # MCP Utils
 ##########################
 
+# Seconds before expiry at which MCP tokens are refreshed ahead of time
+MCP_TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+# MCP tokens cached in front of the store, keyed by (user id, MCP server URL): (tokens, expiry timestamp)
+mcp_token_cache: dict[tuple[str, str], tuple[dict[str, Any], float]] = {}
+# Locks letting only one token refresh run at a time per cache key
+mcp_token_locks: dict[tuple[str, str], asyncio.Lock] = {}
+# Background refreshes of tokens close to expiry, keyed like the cache
+mcp_token_refreshes: dict[tuple[str, str], asyncio.Task] = {}
+
+
 async def get_mcp_access_token(supabase_token: str, base_mcp_url: str, ) -> Optional[Dict[str, Any]]:
 	"""Exchange Supabase token for MCP access token using OAuth token exchange.
 
@@ -212,20 +634,19 @@ async def get_mcp_access_token(supabase_token: str, base_mcp_url: str, ) -> Opti
 		             "resource":           base_mcp_url.rstrip("/") + "/mcp",
 		             "subject_token_type": "urn:ietf:params:oauth:token-type:access_token", }
 		
-		# Execute token exchange request
-		async with aiohttp.ClientSession() as session:
-			token_url = base_mcp_url.rstrip("/") + "/oauth/token"
-			headers = {"Content-Type": "application/x-www-form-urlencoded"}
-			
-			async with session.post(token_url, headers=headers, data=form_data) as response:
-				if response.status == 200:
-					# Successfully obtained token
-					token_data = await response.json()
-					return token_data
-				else:
-					# Log error details for debugging
-					response_text = await response.text()
-					logging.error(f"Token exchange failed: {response_text}")
+		# Execute token exchange request over the shared HTTP session
+		token_url = base_mcp_url.rstrip("/") + "/oauth/token"
+		headers = {"Content-Type": "application/x-www-form-urlencoded"}
+		
+		async with get_http_session().post(token_url, headers=headers, data=form_data) as response:
+			if response.status == 200:
+				# Successfully obtained token
+				token_data = await response.json()
+				return token_data
+			else:
+				# Log error details for debugging
+				response_text = await response.text()
+				logging.error(f"Token exchange failed: {response_text}")
 	
 	except Exception as e:
 		logging.error(f"Error during token exchange: {e}")
@@ -233,14 +654,22 @@ async def get_mcp_access_token(supabase_token: str, base_mcp_url: str, ) -> Opti
 	return None
 
 
-async def get_tokens(config: RunnableConfig):
-	"""Retrieve stored authentication tokens with expiration validation.
+def get_token_store_key(config: RunnableConfig, mcp_url: Optional[str] = None) -> str:
+	"""Get the store key of an MCP server's tokens; the server at mcp_config.url keeps the original key."""
+	mcp_config = config.get("configurable", {}).get("mcp_config") or {}
+	return "data" if not mcp_url or mcp_url == mcp_config.get("url") else f"data:{mcp_url}"
+
+
+async def get_stored_tokens(config: RunnableConfig,
+                            mcp_url: Optional[str] = None) -> Optional[tuple[dict[str, Any], float]]:
+	"""Retrieve stored authentication tokens with their expiry, removing them once expired.
 
 	Args:
 		config: Runtime configuration containing thread and user identifiers
+		mcp_url: URL of the MCP server the tokens are for, defaults to mcp_config.url
 
 	Returns:
-		Token dictionary if valid and not expired, None otherwise
+		Tuple of (token dictionary, expiry timestamp) if valid and not expired, None otherwise
 	"""
 	store = get_store()
 	
@@ -254,7 +683,7 @@ async def get_tokens(config: RunnableConfig):
 		return None
 	
 	# Retrieve stored tokens
-	tokens = await store.aget((user_id, "tokens"), "data")
+	tokens = await store.aget((user_id, "tokens"), get_token_store_key(config, mcp_url))
 	if not tokens:
 		return None
 	
@@ -266,18 +695,33 @@ async def get_tokens(config: RunnableConfig):
 	
 	if current_time > expiration_time:
 		# Token expired, clean up and return None
-		await store.adelete((user_id, "tokens"), "data")
+		await store.adelete((user_id, "tokens"), get_token_store_key(config, mcp_url))
 		return None
 	
-	return tokens.value
+	return tokens.value, expiration_time.timestamp()
+
+
+async def get_tokens(config: RunnableConfig, mcp_url: Optional[str] = None):
+	"""Retrieve stored authentication tokens with expiration validation.
 
+	Args:
+		config: Runtime configuration containing thread and user identifiers
+		mcp_url: URL of the MCP server the tokens are for, defaults to mcp_config.url
 
-async def set_tokens(config: RunnableConfig, tokens: dict[str, Any]):
+	Returns:
+		Token dictionary if valid and not expired, None otherwise
+	"""
+	stored_tokens = await get_stored_tokens(config, mcp_url)
+	return stored_tokens[0] if stored_tokens else None
+
+
+async def set_tokens(config: RunnableConfig, tokens: dict[str, Any], mcp_url: Optional[str] = None):
 	"""Store authentication tokens in the configuration store.
 
 	Args:
 		config: Runtime configuration containing thread and user identifiers
 		tokens: Token dictionary to store
+		mcp_url: URL of the MCP server the tokens are for, defaults to mcp_config.url
 	"""
 	store = get_store()
 	
@@ -291,52 +735,130 @@ async def set_tokens(config: RunnableConfig, tokens: dict[str, Any]):
 		return
 	
 	# Store the tokens
-	await store.aput((user_id, "tokens"), "data", tokens)
+	await store.aput((user_id, "tokens"), get_token_store_key(config, mcp_url), tokens)
 
 
-async def fetch_tokens(config: RunnableConfig) -> dict[str, Any]:
-	"""Fetch and refresh MCP tokens, obtaining new ones if needed.
+def get_mcp_url(config: RunnableConfig, mcp_url: Optional[str] = None) -> Optional[str]:
+	"""Get the URL of the MCP server tokens are requested for, defaulting to mcp_config.url."""
+	return mcp_url or (config.get("configurable", {}).get("mcp_config") or {}).get("url")
+
+
+def get_token_cache_key(config: RunnableConfig, mcp_url: Optional[str] = None) -> Optional[tuple[str, str]]:
+	"""Build the token cache key of a run from its user and MCP server URL, or None if either is missing."""
+	user_id = config.get("metadata", {}).get("owner")
+	mcp_url = get_mcp_url(config, mcp_url)
+	if not user_id or not config.get("configurable", {}).get("thread_id") or not mcp_url:
+		return None
+	return user_id, mcp_url
+
+
+async def load_tokens(config: RunnableConfig, mcp_url: Optional[str] = None) -> Optional[tuple[dict[str, Any], float]]:
+	"""Load tokens from the store, exchanging new ones when the stored ones are missing or about to expire.
 
 	Args:
 		config: Runtime configuration with authentication details
+		mcp_url: URL of the MCP server the tokens are for, defaults to mcp_config.url
 
 	Returns:
-		Valid token dictionary, or None if unable to obtain tokens
+		Tuple of (token dictionary, expiry timestamp), or None if unable to obtain tokens
 	"""
-	# Try to get existing valid tokens first
-	current_tokens = await get_tokens(config)
-	if current_tokens:
-		return current_tokens
+	# Try to get existing tokens that are not about to expire first
+	stored_tokens = await get_stored_tokens(config, mcp_url)
+	if stored_tokens and stored_tokens[1] - time.time() > MCP_TOKEN_REFRESH_MARGIN_SECONDS:
+		return stored_tokens
 	
 	# Extract Supabase token for new token exchange
 	supabase_token = config.get("configurable", {}).get("x-supabase-access-token")
 	if not supabase_token:
-		return None
+		return stored_tokens
 	
-	# Extract MCP configuration
-	mcp_config = config.get("configurable", {}).get("mcp_config")
-	if not mcp_config or not mcp_config.get("url"):
-		return None
+	# Extract MCP server URL
+	mcp_url = get_mcp_url(config, mcp_url)
+	if not mcp_url:
+		return stored_tokens
 	
-	# Exchange Supabase token for MCP tokens
-	mcp_tokens = await get_mcp_access_token(supabase_token, mcp_config.get("url"))
+	# Exchange Supabase token for MCP tokens, keeping the stored ones while they are still valid if that fails
+	mcp_tokens = await get_mcp_access_token(supabase_token, mcp_url)
 	if not mcp_tokens:
-		return None
+		return stored_tokens
 	
 	# Store the new tokens and return them
-	await set_tokens(config, mcp_tokens)
-	return mcp_tokens
+	await set_tokens(config, mcp_tokens, mcp_url)
+	return mcp_tokens, time.time() + mcp_tokens.get("expires_in", 0)
+
 
+async def refresh_cached_tokens(key: tuple[str, str], config: RunnableConfig) -> Optional[dict[str, Any]]:
+	"""Refresh the cached tokens of a user and MCP server, letting only one refresh run at a time per key.
 
-def wrap_mcp_authenticate_tool(tool: StructuredTool) -> StructuredTool:
+	Args:
+		key: Token cache key of the run
+		config: Runtime configuration with authentication details
+
+	Returns:
+		Valid token dictionary, or None if unable to obtain tokens
+	"""
+	async with mcp_token_locks.setdefault(key, asyncio.Lock()):
+		# Another caller may have refreshed the tokens while this one waited for the lock
+		cached_tokens = mcp_token_cache.get(key)
+		if cached_tokens and cached_tokens[1] - time.time() > MCP_TOKEN_REFRESH_MARGIN_SECONDS:
+			return cached_tokens[0]
+		
+		loaded_tokens = await load_tokens(config, key[1])
+		if loaded_tokens:
+			# Tokens without a known lifetime are used once and not cached
+			if loaded_tokens[1] > time.time():
+				mcp_token_cache[key] = loaded_tokens
+			return loaded_tokens[0]
+		if cached_tokens and cached_tokens[1] > time.time():
+			return cached_tokens[0]
+		mcp_token_cache.pop(key, None)
+		return None
+
+
+async def fetch_tokens(config: RunnableConfig, mcp_url: Optional[str] = None) -> dict[str, Any]:
+	"""Fetch and refresh MCP tokens, obtaining new ones if needed.
+
+	Tokens are cached in the process per user and MCP server in front of the store. Cached tokens close
+	to expiry are refreshed in the background while they are still handed out.
+
+	Args:
+		config: Runtime configuration with authentication details
+		mcp_url: URL of the MCP server the tokens are for, defaults to mcp_config.url
+
+	Returns:
+		Valid token dictionary, or None if unable to obtain tokens
+	"""
+	key = get_token_cache_key(config, mcp_url)
+	if key is None:
+		# Tokens that cannot be stored for a user are not cached either
+		loaded_tokens = await load_tokens(config, mcp_url)
+		return loaded_tokens[0] if loaded_tokens else None
+	
+	cached_tokens = mcp_token_cache.get(key)
+	if cached_tokens and cached_tokens[1] - time.time() > MCP_TOKEN_REFRESH_MARGIN_SECONDS:
+		return cached_tokens[0]
+	if cached_tokens and cached_tokens[1] > time.time():
+		# Still valid but about to expire - refresh without making this caller wait
+		if key not in mcp_token_refreshes:
+			mcp_token_refreshes[key] = asyncio.ensure_future(refresh_cached_tokens(key, config))
+			mcp_token_refreshes[key].add_done_callback(lambda _: mcp_token_refreshes.pop(key, None))
+		return cached_tokens[0]
+	return await refresh_cached_tokens(key, config)
+
+
+def wrap_mcp_authenticate_tool(tool: StructuredTool,
+                               on_auth_error: Optional[Callable[[], Awaitable[None]]] = None) -> StructuredTool:
 	"""Wrap MCP tool with comprehensive authentication and error handling.
 
 	Args:
 		tool: The MCP structured tool to wrap
+		on_auth_error: Called when the MCP server rejects the tool call's credentials
 
 	Returns:
 		Enhanced tool with authentication error handling
 	"""
+	from mcp import McpError
+	
 	original_coroutine = tool.coroutine
 	
 	async def authentication_wrapper(**kwargs):
@@ -359,6 +881,10 @@ def wrap_mcp_authenticate_tool(tool: StructuredTool) -> StructuredTool:
 			return await original_coroutine(**kwargs)
 		
 		except BaseException as original_error:
+			# Stop handing out credentials the server rejected, e.g. after they were revoked or rotated
+			if on_auth_error and is_mcp_auth_error(original_error):
+				await on_auth_error()
+			
 			# Search for MCP-specific errors in the exception chain
 			mcp_error = _find_mcp_error_in_exception_chain(original_error)
 			if not mcp_error:
@@ -393,65 +919,130 @@ def wrap_mcp_authenticate_tool(tool: StructuredTool) -> StructuredTool:
 	return tool
 
 
-async def load_mcp_tools(config: RunnableConfig, existing_tool_names: set[str], ) -> list[BaseTool]:
-	"""Load and configure MCP (Model Context Protocol) tools with authentication.
+async def discard_tokens(config: RunnableConfig, rejected_tokens: dict[str, Any], mcp_url: Optional[str] = None):
+	"""Forget MCP tokens the server rejected, so the next fetch exchanges new ones instead of reusing them.
+
+	Tokens that were replaced in the meantime are kept.
+
+	Args:
+		config: Runtime configuration containing thread and user identifiers
+		rejected_tokens: The tokens the MCP server rejected
+		mcp_url: URL of the MCP server the tokens are for, defaults to mcp_config.url
+	"""
+	access_token = rejected_tokens.get("access_token")
+	key = get_token_cache_key(config, mcp_url)
+	if key and key in mcp_token_cache and mcp_token_cache[key][0].get("access_token") == access_token:
+		mcp_token_cache.pop(key, None)
+	
+	stored_tokens = await get_stored_tokens(config, mcp_url)
+	if stored_tokens and stored_tokens[0].get("access_token") == access_token:
+		await get_store().adelete((config["metadata"]["owner"], "tokens"), get_token_store_key(config, mcp_url))
+
+
+def is_mcp_auth_error(exc: BaseException) -> bool:
+	"""Check whether an exception, its exception group or its cause shows the MCP server rejected the credentials."""
+	error_details = getattr(exc, "error", None)
+	if getattr(error_details, "code", None) == -32003 or getattr(getattr(exc, "response", None), "status_code",
+	                                                             None) in (401, 403):
+		return True
+	sub_exceptions = list(getattr(exc, "exceptions", None) or []) + ([exc.__cause__] if exc.__cause__ else [])
+	return any(is_mcp_auth_error(sub_exception) for sub_exception in sub_exceptions)
+
+
+async def load_mcp_server_tools(server: MCPServerConfig, config: RunnableConfig) -> list[BaseTool]:
+	"""Load and configure the tools of one MCP server with authentication, result caching and a timeout.
+
+	A server that fails or times out too often in a row is skipped by its circuit breaker for a while,
+	so it does not stall every researcher iteration.
 
 	Args:
+		server: Connection settings of the MCP server
 		config: Runtime configuration containing MCP server details
-		existing_tool_names: Set of tool names already in use to avoid conflicts
 
 	Returns:
-		List of configured MCP tools ready for use
+		List of the server's configured tools, empty if the server is unavailable
 	"""
 	configurable = Configuration.from_runnable_config(config)
-	
-	# Step 1: Handle authentication if required
-	if configurable.mcp_config and configurable.mcp_config.auth_required:
-		mcp_tokens = await fetch_tokens(config)
-	else:
-		mcp_tokens = None
-	
-	# Step 2: Validate configuration requirements
-	config_valid = (configurable.mcp_config and configurable.mcp_config.url and configurable.mcp_config.tools and (
-			mcp_tokens or not configurable.mcp_config.auth_required))
-	
-	if not config_valid:
+	mcp_config = configurable.mcp_config
+	circuit_breaker = get_circuit_breaker(server.url)
+	if not server.tools or not circuit_breaker.allow():
 		return []
 	
-	# Step 3: Set up MCP server connection
-	server_url = configurable.mcp_config.url.rstrip("/") + "/mcp"
-	
-	# Configure authentication headers if tokens are available
-	auth_headers = None
-	if mcp_tokens:
-		auth_headers = {"Authorization": f"Bearer {mcp_tokens['access_token']}"}
-	
-	mcp_server_config = {"server_1": {"url": server_url, "headers": auth_headers, "transport": "streamable_http"}}
-	# TODO: When Multi-MCP Server support is merged in OAP, update this code
+	async def connect() -> Optional[tuple[Optional[dict[str, Any]], list[BaseTool]]]:
+		# Step 1: Handle authentication if required
+		mcp_tokens = await fetch_tokens(config, server.url) if server.auth_required else None
+		if server.auth_required and not mcp_tokens:
+			return None
+		
+		# Step 2: Set up MCP server connection, with authentication headers if tokens are available
+		auth_headers = {"Authorization": f"Bearer {mcp_tokens['access_token']}"} if mcp_tokens else None
+		mcp_server_config = {"server_1": {"url":       server.url.rstrip("/") + "/mcp", "headers": auth_headers,
+		                                  "transport": "streamable_http"}}
+		
+		# Step 3: Load tools from MCP server, reusing the shared client and tool list when still fresh
+		return mcp_tokens, await get_mcp_tools(mcp_server_config)
 	
-	# Step 4: Load tools from MCP server
+	timeout_seconds = server.timeout_seconds or mcp_config.timeout_seconds
 	try:
-		client = MultiServerMCPClient(mcp_server_config)
-		available_mcp_tools = await client.get_tools()
-	except Exception:
-		# If MCP server connection fails, return empty list
+		connection = await asyncio.wait_for(connect(), timeout=timeout_seconds)
+	except Exception as e:
+		# If MCP server connection fails or is too slow, skip this server
+		circuit_breaker.record_failure(mcp_config.circuit_breaker_failures, mcp_config.circuit_breaker_reset_seconds)
+		logging.warning(f"Skipping MCP server {server.url}: "
+		                f"{'timed out' if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__}")
+		return []
+	if connection is None:
 		return []
+	circuit_breaker.record_success()
+	mcp_tokens, available_mcp_tools = connection
 	
-	# Step 5: Filter and configure tools
+	async def on_auth_error():
+		await discard_tokens(config, mcp_tokens, server.url)
+	
+	# Step 4: Keep the configured tools, caching results of idempotent tools per server and user
+	cache_scope = f"{server.url.rstrip('/')}/mcp\n{config.get('metadata', {}).get('owner', '')}"
 	configured_tools = []
 	for mcp_tool in available_mcp_tools:
-		# Skip tools with conflicting names
-		if mcp_tool.name in existing_tool_names:
-			warnings.warn(f"MCP tool '{mcp_tool.name}' conflicts with existing tool name - skipping")
+		if mcp_tool.name not in set(server.tools):
 			continue
 		
-		# Only include tools specified in configuration
-		if mcp_tool.name not in set(configurable.mcp_config.tools):
-			continue
-		
-		# Wrap tool with authentication handling and add to list
-		enhanced_tool = wrap_mcp_authenticate_tool(mcp_tool)
+		# Wrap a copy of the shared tool with authentication handling and add to list
+		enhanced_tool = wrap_mcp_authenticate_tool(mcp_tool.model_copy(),
+		                                           on_auth_error if mcp_tokens else None)
+		if cache_policy := get_cache_policy(mcp_config, mcp_tool.name):
+			enhanced_tool = wrap_mcp_cache_tool(enhanced_tool, cache_policy, cache_scope)
 		configured_tools.append(enhanced_tool)
+	return configured_tools
+
+
+async def load_mcp_tools(config: RunnableConfig, existing_tool_names: set[str], ) -> list[BaseTool]:
+	"""Load and configure MCP (Model Context Protocol) tools with authentication.
+
+	The servers' tokens and tool catalogs are loaded concurrently, each under its own timeout.
+
+	Args:
+		config: Runtime configuration containing MCP server details
+		existing_tool_names: Set of tool names already in use to avoid conflicts
+
+	Returns:
+		List of configured MCP tools ready for use
+	"""
+	configurable = Configuration.from_runnable_config(config)
+	if not configurable.mcp_config:
+		return []
+	
+	# Load every server at once so a slow server only costs its own timeout
+	servers = configurable.mcp_config.get_servers()
+	server_tools = await asyncio.gather(*[load_mcp_server_tools(server, config) for server in servers])
+	
+	# Skip tools with conflicting names, giving earlier servers precedence
+	configured_tools, tool_names = [], set(existing_tool_names)
+	for mcp_tool in [mcp_tool for tools in server_tools for mcp_tool in tools]:
+		if mcp_tool.name in tool_names:
+			warnings.warn(f"MCP tool '{mcp_tool.name}' conflicts with existing tool name - skipping")
+			continue
+		tool_names.add(mcp_tool.name)
+		configured_tools.append(mcp_tool)
 	
 	return configured_tools
 
@@ -516,8 +1107,9 @@ async def get_all_tools(config: RunnableConfig):
 
 
 def get_notes_from_tool_calls(messages: list[MessageLikeRepresentation]):
-	"""Extract notes from tool call messages."""
-	return [tool_msg.content for tool_msg in filter_messages(messages, include_types="tool")]
+	"""Extract notes from tool call messages, skipping placeholders for research that is still running."""
+	return [tool_msg.content for tool_msg in filter_messages(messages, include_types="tool") if
+	        not tool_msg.additional_kwargs.get("research_pending")]
 
 
 ##########################
@@ -576,10 +1168,10 @@ def is_token_limit_exceeded(exception: Exception, model_name: str = None) -> boo
 	# Step 1: Determine provider from model name if available
 	provider = None
 	if model_name:
-		model_str = str(model_name).lower()
-		if model_str.startswith('anthropic:'):
+		model_provider = get_model_provider(str(model_name))
+		if model_provider == 'anthropic':
 			provider = 'anthropic'
-		elif model_str.startswith('gemini:') or model_str.startswith('google:'):
+		elif model_provider in ('google_genai', 'google_vertexai'):
 			provider = 'gemini'
 	
 	# Step 2: Check provider-specific token limit patterns
@@ -636,46 +1228,17 @@ def _check_gemini_token_limit(exception: Exception, error_str: str) -> bool:
 	return False
 
 
-# NOTE: This may be out of date or not applicable to your models. Please update this as needed.
-MODEL_TOKEN_LIMITS = {"anthropic:claude-opus-4":                              200000,
-                      "anthropic:claude-sonnet-4":                            200000,
-                      "anthropic:claude-3-7-sonnet":                          200000,
-                      "anthropic:claude-3-5-sonnet":                          200000,
-                      "anthropic:claude-3-5-haiku":                           200000, "gemini-1.5-pro": 2097152,
-                      "google:gemini-1.5-flash":                              1048576, "google:gemini-pro": 32768,
-                      "cohere:command-r-plus":                                128000, "cohere:command-r": 128000,
-                      "cohere:command-light":                                 4096, "cohere:command": 4096,
-                      "mistral:mistral-large":                                32768, "mistral:mistral-medium": 32768,
-                      "mistral:mistral-small":                                32768,
-                      "mistral:mistral-7b-instruct":                          32768, "ollama:codellama": 16384,
-                      "ollama:llama2:70b":                                    4096, "ollama:llama2:13b": 4096,
-                      "ollama:llama2":                                        4096, "ollama:mistral": 32768,
-                      "bedrock:us.amazon.nova-premier-v1:0":                  1000000,
-                      "bedrock:us.amazon.nova-pro-v1:0":                      300000,
-                      "bedrock:us.amazon.nova-lite-v1:0":                     300000,
-                      "bedrock:us.amazon.nova-micro-v1:0":                    128000,
-                      "bedrock:us.anthropic.claude-3-7-sonnet-20250219-v1:0": 200000,
-                      "bedrock:us.anthropic.claude-sonnet-4-20250514-v1:0":   200000,
-                      "bedrock:us.anthropic.claude-opus-4-20250514-v1:0":     200000,
-                      "anthropic.claude-opus-4-1-20250805-v1:0":              200000, }
-
-
 def get_model_token_limit(model_string):
-	"""Look up the token limit for a specific model.
+	"""Look up the context window of a specific model in the model registry.
 
 	Args:
 		model_string: The model identifier string to look up
 
 	Returns:
-		Token limit as integer if found, None if model not in lookup table
+		Token limit as integer if found, None if model not in the registry
 	"""
-	# Search through known model token limits
-	for model_key, token_limit in MODEL_TOKEN_LIMITS.items():
-		if model_key in model_string:
-			return token_limit
-	
-	# Model not found in lookup table
-	return None
+	spec = get_model_spec(model_string)
+	return spec.context_window if spec else None
 
 
 def remove_up_to_last_ai_message(messages: list[MessageLikeRepresentation]) -> list[MessageLikeRepresentation]:
@@ -713,6 +1276,29 @@ def get_today_str() -> str:
 	return f"{now:%a} {now:%b} {now.day}, {now:%Y}"
 
 
+def get_deadline(timeout_seconds: Optional[float], *deadlines: Optional[float]) -> Optional[float]:
+	"""Combine a relative timeout with existing wall-clock deadlines into the earliest deadline.
+
+	Args:
+		timeout_seconds: Seconds from now, or 0/None for no timeout
+		deadlines: Absolute deadlines (epoch seconds) that also apply, None entries are ignored
+
+	Returns:
+		The earliest applicable deadline as epoch seconds, or None if nothing applies
+	"""
+	candidates = [deadline for deadline in deadlines if deadline is not None]
+	if timeout_seconds:
+		candidates.append(time.time() + timeout_seconds)
+	return min(candidates) if candidates else None
+
+
+def seconds_until(deadline: Optional[float]) -> Optional[float]:
+	"""Get the seconds left before a wall-clock deadline, or None when there is no deadline."""
+	if deadline is None:
+		return None
+	return max(deadline - time.time(), 0.0)
+
+
 def get_config_value(value):
 	"""Extract value from configuration, handling enums and None values."""
 	if value is None:
@@ -746,6 +1332,66 @@ def get_api_key_for_model(model_name: str, config: RunnableConfig):
 		return None
 
 
+def get_model_config(model_name: str, max_tokens: int, config: RunnableConfig) -> dict:
+	"""Build the chat model settings for a model, resolving its provider and API key.
+
+	Args:
+		model_name: Model identifier, with or without a provider prefix
+		max_tokens: Requested output token limit, capped at the model's own limit if known
+		config: Runtime configuration for API keys
+
+	Returns:
+		Keyword settings for init_chat_model or the configurable model's with_config
+	"""
+	return {"model":          get_model_name(model_name),
+	        "max_tokens":     get_output_token_limit(get_model_spec(model_name), max_tokens),
+	        "api_key":        get_api_key_for_model(model_name, config),
+	        "model_provider": get_model_provider(model_name), "tags": ["langsmith:nostream"]}
+
+
+# Configurable model used throughout the agent, created on first use so importing the graph stays fast
+configurable_model = None
+
+
+def get_configurable_model():
+	"""Get the configurable model shared by every stage, initializing it on first use."""
+	global configurable_model
+	if configurable_model is None:
+		from langchain.chat_models import init_chat_model
+		configurable_model = init_chat_model(configurable_fields=("model", "max_tokens", "api_key", "model_provider"), )
+	return configurable_model
+
+
+def build_stage_chat_models(model_name: str, fallback_models: list[str], max_tokens: int, configurable: Configuration,
+                            config: RunnableConfig, schema: Optional[type] = None,
+                            tools: Optional[list] = None) -> tuple[Runnable, Runnable]:
+	"""Build a stage's chat model chain with fallbacks, binding a structured output schema or tools to every model.
+
+	Args:
+		model_name: The stage's primary model
+		fallback_models: Models to try in order when the primary model fails
+		max_tokens: Requested output token limit of the stage
+		configurable: Configuration with the retry settings
+		config: Runtime configuration for API keys
+		schema: Structured output schema, with malformed outputs repaired locally before retrying
+		tools: Tools to bind to the models, with retries
+
+	Returns:
+		Tuple of (chain starting with the primary model, chain starting with the first fallback) as returned
+		by build_stage_models
+	"""
+	
+	def build_model(name: str) -> Runnable:
+		model = get_configurable_model()
+		if schema is not None:
+			model = with_repaired_structured_output(model, schema, configurable.max_structured_output_retries)
+		elif tools is not None:
+			model = model.bind_tools(tools).with_retry(stop_after_attempt=configurable.max_structured_output_retries)
+		return model.with_config(get_model_config(name, max_tokens, config))
+	
+	return build_stage_models(build_model, model_name, fallback_models)
+
+
 def get_tavily_api_key(config: RunnableConfig):
 	"""Get Tavily API key from environment or config."""
 	should_get_from_config = os.getenv("GET_API_KEYS_FROM_CONFIG", "false")
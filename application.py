@@ -1,12 +1,13 @@
 import asyncio
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 import nest_asyncio
 import streamlit as st
 
-from ODR_Agent.deep_researcher import deep_researcher
-
 # Enable nested event loops for Streamlit reruns / async safety
 nest_asyncio.apply()
 
@@ -15,6 +16,9 @@ os.environ["GET_API_KEYS_FROM_CONFIG"] = "true"
 
 HISTORY_FILE = "history.json"
 
+# Minimum seconds between redraws of the live progress, so bursts of graph events cost a single rerender
+PROGRESS_REFRESH_SECONDS = 0.5
+
 
 # ---------------- Helper Functions ----------------
 def get_message_role(msg):
@@ -32,9 +36,25 @@ def get_message_content(msg):
 
 
 # ---------------- History Persistence ----------------
-def save_history(topic, report):
-	history = get_history()
-	history.append({"topic": topic, "report": report, "timestamp": datetime.now().isoformat()})
+@st.cache_resource
+def _get_history_lock() -> threading.Lock:
+	"""Lock shared across reruns, serializing history updates from the script and the background event loop."""
+	return threading.Lock()
+
+
+def save_history(topic, report, research=None):
+	entry = {"topic": topic, "report": report, "timestamp": datetime.now().isoformat()}
+	# Sub-topics and their evidence fingerprints, used to refresh the report later
+	if research:
+		entry["research"] = research
+	with _get_history_lock():
+		history = get_history()
+		history.append(entry)
+		write_history(history)
+	return entry["timestamp"]
+
+
+def write_history(history):
 	# Write with utf-8 encoding
 	with open(HISTORY_FILE, "w", encoding="utf-8") as f:
 		json.dump(history, f, ensure_ascii=False, indent=2)
@@ -58,19 +78,85 @@ def get_history():
 
 
 # ---------------- Async Invocation Utilities ----------------
+@st.cache_resource
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+	"""Start the event loop shared by all research runs in a background thread.
+
+	Keeping one loop alive across Streamlit reruns lets the agent's pooled HTTP connections be reused between runs.
+	"""
+	loop = asyncio.new_event_loop()
+	threading.Thread(target=loop.run_forever, name="research-event-loop", daemon=True).start()
+	return loop
+
+
 def _run_async(coro):
-	"""Run an async coroutine safely inside Streamlit.
+	"""Run an async coroutine safely inside Streamlit on the shared background event loop."""
+	return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+
+def _run_with_progress(messages: list[dict], config: dict, placeholder) -> dict:
+	"""Run deep_researcher on the shared event loop while showing its live progress in a placeholder.
 
-	Uses existing loop with nest_asyncio if already running, else creates a new loop.
+	Progress events are queued by the event loop and folded into a running summary by the script thread, which
+	redraws the placeholder at most every PROGRESS_REFRESH_SECONDS. Returns the final state of the run.
 	"""
-	try:
-		loop = asyncio.get_running_loop()
-	except RuntimeError:
-		# No running loop -> simple
-		return asyncio.run(coro)
-	else:
-		# Already inside a loop; nest_asyncio allows re-entry
-		return loop.run_until_complete(coro)
+	from ODR_Agent.deep_researcher import deep_researcher
+	from ODR_Agent.progress import ProgressSummary, stream_progress
+	
+	events = queue.Queue()
+	
+	async def run() -> dict:
+		final_state = {}
+		async for kind, payload in stream_progress(deep_researcher, {"messages": messages}, config):
+			if kind == "progress":
+				events.put(payload)
+			else:
+				final_state = payload
+		return final_state
+	
+	future = asyncio.run_coroutine_threadsafe(run(), _get_event_loop())
+	summary = ProgressSummary()
+	rendered_at = 0.0
+	changed = False
+	while True:
+		done = future.done()
+		try:
+			summary.add(events.get(timeout=PROGRESS_REFRESH_SECONDS))
+			changed = True
+			# Batch everything that arrived meanwhile into the same redraw
+			while True:
+				summary.add(events.get_nowait())
+		except queue.Empty:
+			pass
+		if changed and (done or time.monotonic() - rendered_at >= PROGRESS_REFRESH_SECONDS):
+			placeholder.markdown(summary.to_markdown())
+			rendered_at, changed = time.monotonic(), False
+		if done and events.empty():
+			return future.result()
+
+
+def _fingerprint_in_background(timestamp: str, research: dict, config: dict):
+	"""Fingerprint a saved report's sub-topics on the shared event loop and store them in its history entry.
+
+	The script thread does not wait for the extra searches, so a finished report is shown and saved right away.
+	"""
+	from ODR_Agent.refresh import fingerprint_research
+	
+	history_lock = _get_history_lock()
+	future = asyncio.run_coroutine_threadsafe(fingerprint_research(research, config), _get_event_loop())
+	
+	def store_fingerprints(done):
+		if done.cancelled() or done.exception():
+			# The report can still be refreshed, researching all of its sub-topics again
+			return
+		with history_lock:
+			history = get_history()
+			for entry in history:
+				if entry.get("timestamp") == timestamp and entry.get("research"):
+					entry["research"] = done.result()
+			write_history(history)
+	
+	future.add_done_callback(store_fingerprints)
 
 
 def build_config_from_settings() -> dict:
@@ -102,7 +188,8 @@ def build_config_from_settings() -> dict:
 	# Add other knobs
 	configurable.update({"allow_clarification": True, "max_researcher_iterations": 6, "max_react_tool_calls": 10,
 		"max_concurrent_research_units":        5, "search_api": "tavily", "apiKeys": api_keys,
-		"temperature":                          temperature, })
+		"temperature":                          temperature,
+		"refresh_fingerprints":                 settings.get("refresh_fingerprints", False), })
 	return {"configurable": configurable}
 
 
@@ -117,6 +204,9 @@ def run_deep_research_messages(messages: list[dict], allow_clarification: bool |
 	if allow_clarification is not None:
 		config.setdefault("configurable", {})["allow_clarification"] = allow_clarification
 	
+	# Imported on first run so the app renders before the agent and its SDKs are loaded
+	from ODR_Agent.deep_researcher import deep_researcher
+	
 	return _run_async(deep_researcher.ainvoke({"messages": messages}, config))
 
 
@@ -124,12 +214,20 @@ def run_deep_research_messages(messages: list[dict], allow_clarification: bool |
 def _process_research_call(messages: list[dict], topic: str | None = None, allow_clarification: bool = True) -> dict:
 	"""Call deep_researcher with messages, update session_state and save history when final report is available.
 
+	Live progress is shown in a placeholder while the run is going and cleared once it finishes.
 	Returns raw result dict. Does not manipulate `st.session_state['processing']` so caller can manage UI state.
 	"""
+	from ODR_Agent.configuration import Configuration
+	from ODR_Agent.refresh import record_research
+	
 	config = build_config_from_settings()
 	config.setdefault("configurable", {})["allow_clarification"] = allow_clarification
 	
-	result = _run_async(deep_researcher.ainvoke({"messages": messages}, config))
+	progress_placeholder = st.empty()
+	try:
+		result = _run_with_progress(messages, config, progress_placeholder)
+	finally:
+		progress_placeholder.empty()
 	
 	# Update conversation messages if the graph returned them
 	if result.get("messages"):
@@ -142,15 +240,36 @@ def _process_research_call(messages: list[dict], topic: str | None = None, allow
 		resolved_topic = topic or (
 			get_message_content(st.session_state['conversation_messages'][0]) if st.session_state[
 				'conversation_messages'] else "Untitled")
-		save_history(resolved_topic, st.session_state['report'])
+		research = record_research(result)
+		timestamp = save_history(resolved_topic, st.session_state['report'], research)
+		if Configuration.from_runnable_config(config).refresh_fingerprints:
+			_fingerprint_in_background(timestamp, research, config)
 	
 	return result
 
 
+def _refresh_history_entry(index: int) -> dict:
+	"""Refresh a past report, re-researching only sub-topics whose evidence changed, and save it to history.
+
+	Returns the refresh result with the refreshed and reused sub-topics.
+	"""
+	from ODR_Agent.refresh import refresh_report
+	
+	session = get_history()[index]
+	result = _run_async(refresh_report(session["research"], build_config_from_settings()))
+	with _get_history_lock():
+		history = get_history()
+		history.append({"topic":          session["topic"], "report": result["final_report"],
+		                "timestamp":      datetime.now().isoformat(), "research": result["research"],
+		                "refreshed_from": session["timestamp"]})
+		write_history(history)
+	return result
+
+
 # ---------------- Session Defaults ----------------
 if "settings" not in st.session_state:
 	st.session_state["settings"] = {"provider": "Google", "temperature": 0.2, "max_tokens": 2048, "apiKeys": {}, }
-	
+
 if "processing" not in st.session_state:
 	st.session_state["processing"] = False
 
@@ -276,9 +395,19 @@ elif tab == "Research History":
 	else:
 		for idx, session in enumerate(reversed(history)):
 			with st.expander(session["topic"]):
+				if session.get("refreshed_from"):
+					st.caption(f"Refreshed from the report of {session['refreshed_from']}")
 				st.markdown(session["report"])
 				st.download_button("Download Markdown",
 					session["report"], file_name="report.md", key=f"download_history_{idx}")
+				# Refresh re-researches only the sub-topics whose search results changed since this report
+				if session.get("research", {}).get("research_units"):
+					if st.button("Refresh", key=f"refresh_history_{idx}"):
+						with st.spinner("Checking sub-topics for new evidence..."):
+							refresh_result = _refresh_history_entry(len(history) - 1 - idx)
+						st.success(f"Refreshed report saved to history: re-researched "
+						           f"{len(refresh_result['refreshed_topics'])} of "
+						           f"{len(session['research']['research_units'])} sub-topics.")
 
 elif tab == "Settings & Preferences":
 	st.title("Settings & Preferences")
@@ -292,6 +421,7 @@ elif tab == "Settings & Preferences":
 	                                                                        "Anthropic"].index(current.get("provider", "Google")))
 	temperature = st.slider("Temperature", min_value=0.0, max_value=1.0, value=float(current.get("temperature", 0.2)), step=0.05)
 	max_tokens = st.number_input("Max tokens (applied to all model stages)", min_value=512, max_value=200000, value=int(current.get("max_tokens", 2048)), step=256)
+	refresh_fingerprints = st.checkbox("Fingerprint reports for incremental refresh (one extra search per sub-topic)", value=bool(current.get("refresh_fingerprints", False)))
 	
 	st.markdown("### API Keys (stored only in session state)")
 	api_keys = current.get("apiKeys", {})
@@ -308,7 +438,7 @@ elif tab == "Settings & Preferences":
 	
 	if st.button("Save Settings", key="save_settings_btn"):
 		st.session_state["settings"] = {"provider": provider, "temperature": temperature, "max_tokens": max_tokens,
-		                                "apiKeys":  {
+		                                "refresh_fingerprints": refresh_fingerprints, "apiKeys": {
 			                                "TAVILY_API_KEY":    tavily_key.strip() or api_keys.get("TAVILY_API_KEY", ""),
 			                                "ANTHROPIC_API_KEY": anthropic_key.strip() if provider == "Anthropic" else anthropic_key,
 			                                "GOOGLE_API_KEY":    google_key.strip() if provider == "Google" else google_key, }, }
@@ -0,0 +1,205 @@
+"""Run deep_researcher over a file of topics, writing each report as soon as it completes.
+
+Topics are read from a JSONL file (one object per line with a "topic" or "query" field and optional "id" and
+"configurable" fields) or a CSV file (with a "topic" or "query" column and an optional "id" column).
+Reports are written to the output directory as <id>.md, and every finished topic is recorded in
+manifest.jsonl there. Running the same command again skips the topics already completed, so an
+interrupted batch resumes where it stopped.
+
+Usage:
+	python batch_research.py topics.jsonl --output reports --concurrency 4
+	python batch_research.py topics.csv --output reports --processes 4 --configurable '{"max_researcher_iterations": 4}'
+	python batch_research.py topics.jsonl --output baseline --cassette runs.jsonl.gz
+	python batch_research.py topics.jsonl --output replayed --cassette runs.jsonl.gz --cassette-mode replay
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+MANIFEST_FILE = "manifest.jsonl"
+
+# Event loop kept by each worker process so pooled connections are reused across its topics
+worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+# ---------------- Input & Output ----------------
+def get_topic_id(topic: str) -> str:
+	"""Build a stable file-safe id for a topic from a slug of its text and a short hash."""
+	slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")[:50].strip("-")
+	return f"{slug}-{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:8]}"
+
+
+def read_topics(path: str) -> list[dict]:
+	"""Read topics from a JSONL or CSV file.
+
+	Returns:
+		List of dictionaries with "id", "topic" and "configurable" keys, in file order
+	"""
+	with open(path, "r", encoding="utf-8", newline="") as f:
+		if path.lower().endswith(".csv"):
+			rows = list(csv.DictReader(f))
+		else:
+			rows = [json.loads(line) for line in f if line.strip()]
+	
+	topics, seen_ids = [], set()
+	for line_number, row in enumerate(rows, start=1):
+		topic = (row.get("topic") or row.get("query") or "").strip()
+		if not topic:
+			logging.warning(f"Skipping entry {line_number} of {path}: no topic or query")
+			continue
+		topic_id = str(row.get("id") or get_topic_id(topic))
+		if topic_id in seen_ids:
+			logging.warning(f"Skipping entry {line_number} of {path}: duplicate id {topic_id}")
+			continue
+		seen_ids.add(topic_id)
+		configurable = row.get("configurable") or {}
+		if isinstance(configurable, str):
+			configurable = json.loads(configurable)
+		topics.append({"id": topic_id, "topic": topic, "configurable": configurable})
+	return topics
+
+
+def read_completed(output_dir: str) -> set[str]:
+	"""Get the ids of topics recorded as completed in the manifest whose report file still exists."""
+	manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+	if not os.path.exists(manifest_path):
+		return set()
+	completed = set()
+	with open(manifest_path, "r", encoding="utf-8") as f:
+		for line in f:
+			try:
+				entry = json.loads(line)
+			except json.JSONDecodeError:
+				# A line cut short by an interruption
+				continue
+			if entry.get("status") == "completed" and os.path.exists(os.path.join(output_dir, entry["report"])):
+				completed.add(entry["id"])
+	return completed
+
+
+def write_atomically(path: str, content: str):
+	"""Write a file through a temporary file so a crash never leaves a partial report."""
+	file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+	with os.fdopen(file_descriptor, "w", encoding="utf-8") as f:
+		f.write(content)
+	os.replace(temp_path, path)
+
+
+def append_manifest(output_dir: str, entry: dict):
+	"""Append a finished topic to the manifest and flush it to disk."""
+	with open(os.path.join(output_dir, MANIFEST_FILE), "a", encoding="utf-8") as f:
+		f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+		f.flush()
+		os.fsync(f.fileno())
+
+
+# ---------------- Research ----------------
+async def research_topic(topic: str, configurable: dict) -> dict:
+	"""Run deep_researcher on a topic and return its report and research brief."""
+	from ODR_Agent.deep_researcher import deep_researcher
+	
+	result = await deep_researcher.ainvoke({"messages": [{"role": "user", "content": topic}]},
+	                                       {"configurable": configurable})
+	return {"final_report": result.get("final_report"), "research_brief": result.get("research_brief")}
+
+
+def research_topic_in_process(topic: str, configurable: dict) -> dict:
+	"""Run a topic in a worker process on the process's long-lived event loop."""
+	global worker_loop
+	if worker_loop is None:
+		worker_loop = asyncio.new_event_loop()
+	return worker_loop.run_until_complete(research_topic(topic, configurable))
+
+
+async def run_topic(entry: dict, configurable: dict, output_dir: str, semaphore: asyncio.Semaphore,
+                    executor: Optional[ProcessPoolExecutor], progress: dict):
+	"""Research one topic within the concurrency limit, then write its report and manifest entry."""
+	async with semaphore:
+		start = time.perf_counter()
+		run_configurable = {**configurable, **entry["configurable"]}
+		status, error, report_name = "completed", None, f"{entry['id']}.md"
+		try:
+			if executor:
+				result = await asyncio.get_running_loop().run_in_executor(executor, research_topic_in_process,
+				                                                          entry["topic"], run_configurable)
+			else:
+				result = await research_topic(entry["topic"], run_configurable)
+			if not result["final_report"]:
+				raise RuntimeError("The run finished without a final report")
+			write_atomically(os.path.join(output_dir, report_name), result["final_report"])
+		except Exception as e:
+			status, error, report_name = "failed", str(e), None
+		
+		seconds = time.perf_counter() - start
+		append_manifest(output_dir, {"id": entry["id"], "topic": entry["topic"], "status": status,
+		                             "report": report_name, "error": error, "seconds": round(seconds, 2),
+		                             "finished_at": time.time()})
+		progress[status] += 1
+		print(f"[{progress['completed'] + progress['failed']}/{progress['total']}] {status} {entry['id']} "
+		      f"in {seconds:.1f}s" + (f": {error}" if error else ""), flush=True)
+
+
+async def run_batch(args):
+	os.makedirs(args.output, exist_ok=True)
+	topics = read_topics(args.input)
+	completed = read_completed(args.output)
+	pending = [entry for entry in topics if entry["id"] not in completed]
+	print(f"{len(topics)} topics, {len(topics) - len(pending)} already completed, {len(pending)} to run", flush=True)
+	if not pending:
+		return
+	
+	configurable = {"allow_clarification": False, **json.loads(args.configurable)}
+	concurrency = args.concurrency or args.processes or 1
+	semaphore = asyncio.Semaphore(concurrency)
+	progress = {"completed": 0, "failed": 0, "total": len(pending)}
+	executor = ProcessPoolExecutor(max_workers=args.processes) if args.processes else None
+	try:
+		await asyncio.gather(*[run_topic(entry, configurable, args.output, semaphore, executor, progress) for entry
+		                       in pending])
+	finally:
+		if executor:
+			executor.shutdown(cancel_futures=True)
+	print(f"Done: {progress['completed']} completed, {progress['failed']} failed", flush=True)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("input", help="JSONL or CSV file of topics")
+	parser.add_argument("--output", default="reports", help="Directory for reports and the resume manifest")
+	parser.add_argument("--concurrency", type=int, default=0,
+	                    help="Topics researched at once (defaults to --processes, or 1)")
+	parser.add_argument("--processes", type=int, default=0,
+	                    help="Run topics in this many worker processes instead of the main event loop")
+	parser.add_argument("--configurable", default="{}", help="JSON object of configuration settings for every topic")
+	parser.add_argument("--cassette", help="Record the batch's model, search and MCP calls to this cassette file, "
+	                                       "appending to it when a batch is resumed, or replay them from it with "
+	                                       "--cassette-mode replay")
+	parser.add_argument("--cassette-mode", choices=["record", "replay"], default="record")
+	parser.add_argument("--cassette-latency-scale", type=float, default=1.0,
+	                    help="Multiple of the recorded latency to wait for each replayed call (0 for none)")
+	args = parser.parse_args()
+	if args.cassette and args.processes:
+		parser.error("--cassette records the calls of the main process only and cannot be used with --processes")
+	try:
+		if args.cassette:
+			from ODR_Agent.cassette import use_cassette
+			with use_cassette(args.cassette, args.cassette_mode, args.cassette_latency_scale):
+				asyncio.run(run_batch(args))
+		else:
+			asyncio.run(run_batch(args))
+	except KeyboardInterrupt:
+		print("Interrupted: run the same command again to resume", flush=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,68 @@
+"""Benchmark cold-start latency of the Deep Research agent.
+
+Each measurement runs in a fresh interpreter so nothing is cached between samples. Reports the time to
+import ODR_Agent.deep_researcher, to build the graphs on first use and to initialize the configurable
+model, and lists the optional SDKs that were loaded by the import alone. With --max-import-seconds the
+script exits with an error when the median import time exceeds the budget, so it can guard against
+regressions in CI.
+
+Usage:
+	python benchmarks/bench_import.py --runs 5
+	python benchmarks/bench_import.py --runs 10 --max-import-seconds 1.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that should only be imported when the configuration uses them
+OPTIONAL_MODULES = ("aiohttp", "tavily", "mcp", "langchain_mcp_adapters", "langchain.chat_models",
+                    "langchain_google_genai", "langchain_anthropic", "langchain_openai")
+
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import ODR_Agent.deep_researcher as module
+imported = time.perf_counter()
+loaded = [name for name in OPTIONAL_MODULES if name in sys.modules]
+graph = module.deep_researcher
+built = time.perf_counter()
+module.get_configurable_model()
+initialized = time.perf_counter()
+print(json.dumps({"import": imported - start, "graph": built - imported, "model": initialized - built,
+                  "loaded": loaded}))
+"""
+
+
+def measure_once() -> dict:
+	"""Measure one cold start in a fresh interpreter."""
+	script = f"OPTIONAL_MODULES = {OPTIONAL_MODULES!r}\n{MEASURE_SCRIPT}"
+	output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+	return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--max-import-seconds", type=float, default=0,
+	                    help="Fail when the median import time exceeds this many seconds (0 to disable)")
+	args = parser.parse_args()
+	
+	samples = [measure_once() for _ in range(args.runs)]
+	for stage in ("import", "graph", "model"):
+		values = [sample[stage] for sample in samples]
+		print(f"{stage:>6} (s): median {statistics.median(values):.3f}  min {min(values):.3f}  max {max(values):.3f}")
+	print(f"optional SDKs loaded by the import: {samples[0]['loaded'] or 'none'}")
+	
+	median_import = statistics.median(sample["import"] for sample in samples)
+	if args.max_import_seconds and median_import > args.max_import_seconds:
+		sys.exit(f"Median import time {median_import:.3f}s exceeds the budget of {args.max_import_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+	main()
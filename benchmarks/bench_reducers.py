@@ -0,0 +1,54 @@
+"""Benchmark the cost of accumulating state lists through reducers over many updates.
+
+Compares the list-copying override_reducer (operator.add) with the ChunkedList-based chunked_override_reducer.
+Each update appends a few items and reads the most recent one, as the supervisor and researcher loops do.
+A full read of the accumulated list can also be simulated every few updates.
+
+Usage:
+	python benchmarks/bench_reducers.py --updates 1000 5000 20000 --items-per-update 2 --full-read-every 0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ODR_Agent.state import chunked_override_reducer, override_reducer
+
+
+def run_updates(reducer, updates: int, items_per_update: int, full_read_every: int) -> float:
+	"""Apply a number of append updates through a reducer and return the elapsed seconds."""
+	value = []
+	chunk = [f"note {i}" for i in range(items_per_update)]
+	start = time.perf_counter()
+	for update in range(1, updates + 1):
+		value = reducer(value, chunk)
+		_ = value[-1]
+		if full_read_every and update % full_read_every == 0:
+			_ = sum(1 for _ in value)
+	return time.perf_counter() - start
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--updates", type=int, nargs="+", default=[1000, 5000, 20000])
+	parser.add_argument("--items-per-update", type=int, default=2)
+	parser.add_argument("--full-read-every", type=int, default=0,
+	                    help="Iterate the whole list every N updates (0 disables full reads)")
+	parser.add_argument("--repeat", type=int, default=3, help="Report the best of this many runs")
+	args = parser.parse_args()
+	
+	print(f"{'updates':>8} {'list add (ms)':>14} {'chunked (ms)':>13} {'speedup':>8}")
+	for updates in args.updates:
+		list_seconds = min(run_updates(override_reducer, updates, args.items_per_update, args.full_read_every) for _
+		                   in range(args.repeat))
+		chunked_seconds = min(run_updates(chunked_override_reducer, updates, args.items_per_update, args.full_read_every)
+		                      for _ in range(args.repeat))
+		print(f"{updates:>8} {list_seconds * 1000:>14.2f} {chunked_seconds * 1000:>13.2f} "
+		      f"{list_seconds / chunked_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,99 @@
+"""Load-test the Deep Research job service with many concurrent clients.
+
+Each simulated client submits jobs one after another, follows the job's progress events until it finishes,
+then fetches the result. Reports submission latency, end-to-end job latency and rejected submissions.
+
+Usage:
+	python service.py --workers 8 --per-client-limit 2
+	python benchmarks/service_load.py --url http://127.0.0.1:8000 --clients 20 --jobs-per-client 3
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+
+
+def percentile(values: list[float], percent: float) -> float:
+	"""Get the value at a percentile of a list of measurements."""
+	if not values:
+		return float("nan")
+	ordered = sorted(values)
+	return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+async def wait_for_job(session: aiohttp.ClientSession, url: str, job_id: str) -> str:
+	"""Follow a job's server-sent events until it reaches a final status, returning that status."""
+	status = None
+	async with session.get(f"{url}/jobs/{job_id}/events") as response:
+		event = None
+		async for raw_line in response.content:
+			line = raw_line.decode().strip()
+			if line.startswith("event:"):
+				event = line.removeprefix("event:").strip()
+			elif line.startswith("data:") and event == "status":
+				status = json.loads(line.removeprefix("data:").strip())["status"]
+	return status
+
+
+async def run_client(session: aiohttp.ClientSession, url: str, client_index: int, jobs: int, query: str,
+                     configurable: dict, results: dict):
+	"""Submit jobs for one simulated client and record their latencies."""
+	headers = {"X-Client-Id": f"load-client-{client_index}"}
+	for job_index in range(jobs):
+		start = time.perf_counter()
+		async with session.post(f"{url}/jobs", json={"query": f"{query} ({client_index}-{job_index})",
+		                                            "configurable": configurable}, headers=headers) as response:
+			results["submit"].append(time.perf_counter() - start)
+			if response.status != 202:
+				results["rejected"][response.status] = results["rejected"].get(response.status, 0) + 1
+				await asyncio.sleep(1)
+				continue
+			job_id = (await response.json())["job_id"]
+		
+		status = await wait_for_job(session, url, job_id)
+		async with session.get(f"{url}/jobs/{job_id}/result") as response:
+			await response.read()
+		results["job"].append(time.perf_counter() - start)
+		results["statuses"][status] = results["statuses"].get(status, 0) + 1
+
+
+async def run_load(args):
+	results = {"submit": [], "job": [], "rejected": {}, "statuses": {}}
+	configurable = json.loads(args.configurable) if args.configurable else {}
+	start = time.perf_counter()
+	timeout = aiohttp.ClientTimeout(total=None)
+	async with aiohttp.ClientSession(timeout=timeout) as session:
+		await asyncio.gather(*[run_client(session, args.url, index, args.jobs_per_client, args.query, configurable,
+		                                  results) for index in range(args.clients)])
+		async with session.get(f"{args.url}/health") as response:
+			health = await response.json()
+	elapsed = time.perf_counter() - start
+	
+	print(f"clients: {args.clients}, jobs finished: {len(results['job'])} in {elapsed:.1f}s "
+	      f"({len(results['job']) / elapsed:.2f} jobs/s)")
+	print(f"final statuses: {results['statuses']}, rejected submissions by HTTP status: {results['rejected']}")
+	for name in ("submit", "job"):
+		values = results[name]
+		if values:
+			print(f"{name:>6} latency (s): mean {statistics.mean(values):.3f}  p50 {percentile(values, 50):.3f}  "
+			      f"p95 {percentile(values, 95):.3f}  p99 {percentile(values, 99):.3f}  max {max(values):.3f}")
+	print(f"service: {health}")
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--url", default="http://127.0.0.1:8000")
+	parser.add_argument("--clients", type=int, default=10)
+	parser.add_argument("--jobs-per-client", type=int, default=2)
+	parser.add_argument("--query", default="Summarize recent developments in solid-state batteries")
+	parser.add_argument("--configurable", default='{"allow_clarification": false}',
+	                    help="JSON object of configuration settings sent with every job")
+	asyncio.run(run_load(parser.parse_args()))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,367 @@
+"""Headless ASGI service running Deep Research jobs on a shared event loop.
+
+Endpoints:
+	POST   /jobs                 Submit a research job, returns its id
+	GET    /jobs/{job_id}        Job status
+	GET    /jobs/{job_id}/result Final report once the job has finished
+	GET    /jobs/{job_id}/events Server-sent progress events, replayed from the start of the job
+	DELETE /jobs/{job_id}        Cancel a queued or running job
+	GET    /health               Worker, queue, MCP result cache and structured output statistics
+
+Usage:
+	python service.py --host 127.0.0.1 --port 8000 --workers 8 --per-client-limit 2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from langchain_core.messages import BaseMessage
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from ODR_Agent.clients import close_clients
+from ODR_Agent.mcp_cache import get_mcp_cache_metrics
+from ODR_Agent.progress import stream_progress
+from ODR_Agent.structured_output import get_structured_output_metrics
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {COMPLETED, FAILED, CANCELLED}
+
+
+# ---------------- Jobs ----------------
+class ResearchJob:
+	"""A submitted research run with its status, progress events and result."""
+	
+	def __init__(self, client_id: str, graph_input: dict, configurable: dict):
+		self.id = uuid.uuid4().hex
+		self.client_id = client_id
+		self.graph_input = graph_input
+		self.configurable = configurable
+		self.status = QUEUED
+		self.created_at = time.time()
+		self.started_at: Optional[float] = None
+		self.finished_at: Optional[float] = None
+		self.result: Optional[dict] = None
+		self.error: Optional[str] = None
+		self.task: Optional[asyncio.Task] = None
+		self.events: list[dict] = []
+		self.updated = asyncio.Event()
+	
+	@property
+	def finished(self) -> bool:
+		return self.status in FINISHED_STATUSES
+	
+	def add_event(self, event: str, data: dict):
+		"""Record an event and wake up everyone following the job."""
+		self.events.append({"id": str(len(self.events)), "event": event, "data": data})
+		self.updated.set()
+		self.updated = asyncio.Event()
+	
+	def set_status(self, status: str, **data):
+		"""Move the job to a new status and record it as an event."""
+		self.status = status
+		if status == RUNNING:
+			self.started_at = time.time()
+		elif status in FINISHED_STATUSES:
+			self.finished_at = time.time()
+		self.add_event("status", {"status": status, **data})
+	
+	async def follow(self, start: int = 0):
+		"""Yield the job's events from an index onwards, waiting for new ones until the job finishes."""
+		index = start
+		while True:
+			updated = self.updated
+			if index < len(self.events):
+				yield self.events[index]
+				index += 1
+			elif self.finished:
+				return
+			else:
+				await updated.wait()
+	
+	def describe(self) -> dict:
+		"""Get the job's status without its result."""
+		return {"job_id":      self.id, "status": self.status, "client_id": self.client_id,
+		        "created_at":  self.created_at, "started_at": self.started_at, "finished_at": self.finished_at,
+		        "event_count": len(self.events), "error": self.error}
+
+
+def summarize_result(state: dict) -> dict:
+	"""Extract the JSON-serializable parts of the graph's final state."""
+	messages = state.get("messages", [])
+	last_message = messages[-1] if messages else None
+	if isinstance(last_message, BaseMessage):
+		last_message = last_message.content
+	return {"final_report":   state.get("final_report"), "research_brief": state.get("research_brief"),
+	        "message":        last_message}
+
+
+class JobManager:
+	"""Runs research jobs with a bounded pool of workers on the service's event loop.
+
+	Each client may have a limited number of queued or running jobs, and the queue itself is bounded,
+	so a burst from one client cannot starve the others or grow memory without limit.
+	"""
+	
+	def __init__(self, graph, workers: int = 4, per_client_limit: int = 2, max_queued: int = 100,
+	             job_ttl_seconds: float = 3600):
+		self.graph = graph
+		self.worker_count = workers
+		self.per_client_limit = per_client_limit
+		self.max_queued = max_queued
+		self.job_ttl_seconds = job_ttl_seconds
+		self.jobs: dict[str, ResearchJob] = {}
+		self.active_by_client: dict[str, int] = {}
+		self.queue: Optional[asyncio.Queue] = None
+		self.workers: list[asyncio.Task] = []
+	
+	async def start(self):
+		"""Start the worker tasks on the running event loop."""
+		self.queue = asyncio.Queue(maxsize=self.max_queued)
+		self.workers = [asyncio.create_task(self.work(), name=f"research-worker-{index}") for index in
+		                range(self.worker_count)]
+	
+	async def stop(self):
+		"""Cancel the workers and any job still running."""
+		for job in self.jobs.values():
+			if job.task and not job.task.done():
+				job.task.cancel()
+		for worker in self.workers:
+			worker.cancel()
+		await asyncio.gather(*self.workers, return_exceptions=True)
+	
+	def submit(self, client_id: str, graph_input: dict, configurable: dict) -> ResearchJob:
+		"""Queue a research job for a client.
+
+		Raises:
+			PermissionError: If the client already has the maximum number of active jobs
+			asyncio.QueueFull: If the service queue is full
+		"""
+		self.purge_expired()
+		if self.active_by_client.get(client_id, 0) >= self.per_client_limit:
+			raise PermissionError(f"Client {client_id} already has {self.per_client_limit} active jobs")
+		
+		job = ResearchJob(client_id, graph_input, configurable)
+		self.queue.put_nowait(job)
+		self.jobs[job.id] = job
+		self.active_by_client[client_id] = self.active_by_client.get(client_id, 0) + 1
+		job.set_status(QUEUED, position=self.queue.qsize())
+		return job
+	
+	def cancel(self, job: ResearchJob):
+		"""Cancel a queued or running job."""
+		if job.finished:
+			return
+		if job.task:
+			job.task.cancel()
+		else:
+			self.finish(job, CANCELLED)
+	
+	def finish(self, job: ResearchJob, status: str, **data):
+		"""Mark a job finished and release its client's slot."""
+		if job.finished:
+			return
+		job.set_status(status, **data)
+		self.active_by_client[job.client_id] -= 1
+		if not self.active_by_client[job.client_id]:
+			del self.active_by_client[job.client_id]
+	
+	def purge_expired(self):
+		"""Forget finished jobs older than the retention period."""
+		cutoff = time.time() - self.job_ttl_seconds
+		for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < cutoff]:
+			del self.jobs[job_id]
+	
+	async def work(self):
+		"""Take jobs from the queue and run them one at a time."""
+		while True:
+			job = await self.queue.get()
+			try:
+				if not job.finished:
+					job.task = asyncio.create_task(self.run(job))
+					await asyncio.wait([job.task])
+					if job.task.cancelled():
+						# Cancelled before run() started, so it never recorded the outcome itself
+						self.finish(job, CANCELLED)
+			finally:
+				self.queue.task_done()
+	
+	async def run(self, job: ResearchJob):
+		"""Run a job's graph invocation, recording progress events and the final result."""
+		job.set_status(RUNNING)
+		try:
+			config = {"configurable": {**job.configurable, "thread_id": job.id}}
+			async for kind, payload in stream_progress(self.graph, job.graph_input, config):
+				if kind == "progress":
+					job.add_event("progress", payload)
+				else:
+					job.result = summarize_result(payload)
+			self.finish(job, COMPLETED)
+		except asyncio.CancelledError:
+			self.finish(job, CANCELLED)
+		except Exception as e:
+			logging.exception(f"Research job {job.id} failed")
+			job.error = str(e)
+			self.finish(job, FAILED, error=job.error)
+	
+	def stats(self) -> dict:
+		"""Get worker and queue statistics."""
+		running = sum(1 for job in self.jobs.values() if job.status == RUNNING)
+		return {"workers": self.worker_count, "running": running, "queued": self.queue.qsize() if self.queue else 0,
+		        "active_clients": len(self.active_by_client), "jobs": len(self.jobs)}
+
+
+# ---------------- HTTP API ----------------
+def get_client_id(request: Request) -> str:
+	"""Identify the client by its X-Client-Id header, falling back to its address."""
+	return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+
+def parse_job_request(body: Any) -> tuple[dict, dict]:
+	"""Validate a job submission body into graph input and configurable settings.
+
+	The body holds either a "query" string or a list of chat "messages", plus optional "configurable" settings.
+
+	Raises:
+		ValueError: If the body is not a valid job submission
+	"""
+	if not isinstance(body, dict):
+		raise ValueError("Request body must be a JSON object")
+	messages = body.get("messages")
+	if messages is None and body.get("query"):
+		messages = [{"role": "user", "content": str(body["query"])}]
+	if not isinstance(messages, list) or not messages:
+		raise ValueError("Provide a non-empty 'query' or 'messages' list")
+	configurable = body.get("configurable") or {}
+	if not isinstance(configurable, dict):
+		raise ValueError("'configurable' must be a JSON object")
+	return {"messages": messages}, configurable
+
+
+def create_app(graph=None, workers: int = 4, per_client_limit: int = 2, max_queued: int = 100,
+               job_ttl_seconds: float = 3600) -> Starlette:
+	"""Create the job service application.
+
+	Args:
+		graph: The compiled research graph to run, defaults to deep_researcher
+		workers: Number of jobs run concurrently
+		per_client_limit: Maximum queued or running jobs per client
+		max_queued: Maximum jobs waiting for a worker
+		job_ttl_seconds: How long finished jobs stay available
+
+	Returns:
+		The Starlette application
+	"""
+	if graph is None:
+		from ODR_Agent.deep_researcher import deep_researcher
+		graph = deep_researcher
+	manager = JobManager(graph, workers, per_client_limit, max_queued, job_ttl_seconds)
+	
+	def get_job(request: Request) -> Optional[ResearchJob]:
+		return manager.jobs.get(request.path_params["job_id"])
+	
+	def job_not_found(request: Request) -> JSONResponse:
+		return JSONResponse({"error": f"Unknown job {request.path_params['job_id']}"}, status_code=404)
+	
+	async def submit_job(request: Request):
+		try:
+			graph_input, configurable = parse_job_request(await request.json())
+		except ValueError as e:
+			return JSONResponse({"error": str(e)}, status_code=400)
+		try:
+			job = manager.submit(get_client_id(request), graph_input, configurable)
+		except PermissionError as e:
+			return JSONResponse({"error": str(e)}, status_code=429)
+		except asyncio.QueueFull:
+			return JSONResponse({"error": "Job queue is full, retry later"}, status_code=503,
+			                    headers={"Retry-After": "5"})
+		return JSONResponse(job.describe(), status_code=202)
+	
+	async def job_status(request: Request):
+		job = get_job(request)
+		return JSONResponse(job.describe()) if job else job_not_found(request)
+	
+	async def job_result(request: Request):
+		job = get_job(request)
+		if not job:
+			return job_not_found(request)
+		if job.status == COMPLETED:
+			return JSONResponse({"job_id": job.id, "status": job.status, **job.result})
+		if job.finished:
+			return JSONResponse(job.describe(), status_code=409)
+		return JSONResponse(job.describe(), status_code=202)
+	
+	async def job_events(request: Request):
+		job = get_job(request)
+		if not job:
+			return job_not_found(request)
+		last_event_id = request.headers.get("last-event-id")
+		start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+		
+		async def send_events():
+			async for event in job.follow(start):
+				yield {**event, "data": json.dumps(event["data"])}
+		
+		return EventSourceResponse(send_events())
+	
+	async def cancel_job(request: Request):
+		job = get_job(request)
+		if not job:
+			return job_not_found(request)
+		manager.cancel(job)
+		return JSONResponse(job.describe())
+	
+	async def health(request: Request):
+		return JSONResponse({**manager.stats(), "mcp_result_cache": get_mcp_cache_metrics(),
+		                     "structured_output": get_structured_output_metrics()})
+	
+	@asynccontextmanager
+	async def lifespan(app: Starlette):
+		await manager.start()
+		try:
+			yield
+		finally:
+			await manager.stop()
+			await close_clients()
+	
+	routes = [Route("/jobs", submit_job, methods=["POST"]), Route("/jobs/{job_id}", job_status, methods=["GET"]),
+	          Route("/jobs/{job_id}", cancel_job, methods=["DELETE"]),
+	          Route("/jobs/{job_id}/result", job_result, methods=["GET"]),
+	          Route("/jobs/{job_id}/events", job_events, methods=["GET"]),
+	          Route("/health", health, methods=["GET"])]
+	app = Starlette(routes=routes, lifespan=lifespan)
+	app.state.manager = manager
+	return app
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run the Deep Research job service")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8000)
+	parser.add_argument("--workers", type=int, default=4, help="Research jobs run concurrently")
+	parser.add_argument("--per-client-limit", type=int, default=2, help="Queued or running jobs allowed per client")
+	parser.add_argument("--max-queued", type=int, default=100, help="Jobs allowed to wait for a worker")
+	parser.add_argument("--job-ttl", type=float, default=3600, help="Seconds finished jobs stay available")
+	args = parser.parse_args()
+	
+	import uvicorn
+	uvicorn.run(create_app(workers=args.workers, per_client_limit=args.per_client_limit, max_queued=args.max_queued,
+	                       job_ttl_seconds=args.job_ttl), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+	main()